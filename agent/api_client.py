@@ -1,94 +1,711 @@
 import requests
-from typing import Optional, Dict, Any
+from requests.adapters import HTTPAdapter
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from functools import partial
+from typing import Optional, Dict, Any, Generator, List, Callable, Tuple
+import math
+import threading
 import time
 import random
+from .models import iso_to_epoch
+from .resolution_cache import ResolutionCache
+from .resilience import CircuitBreaker
+from .rate_limiter import RateLimiter, RateLimited
+from .steps import advance
+from .symbol_filter import KnownSymbols, NegativeCache
+from . import metrics
+
+FILTERED_NEGATIVE = metrics.SYMBOL_FILTER.labels(result="negative_cache")
+FILTERED_UNLISTED = metrics.SYMBOL_FILTER.labels(result="unlisted")
 
 class FreeCryptoAPIClient:
     BASE_URL = "https://api.coincap.io/v2"
+    COINGECKO_URL = "https://api.coingecko.com/api/v3"
+    BINANCE_URL = "https://api.binance.com/api/v3"
+    HEADERS = {'User-Agent': 'Mozilla/5.0'}
+    # Max ids per CoinGecko /simple/price or CoinCap /assets?ids= call
+    BATCH_SIZE = 100
+    # Max rows per page of CoinGecko /coins/markets and CoinCap /assets listings
+    COINGECKO_PAGE_SIZE = 250
+    COINCAP_PAGE_SIZE = 2000
+    # Per-provider connection settings and request quotas (token bucket:
+    # rate_per_minute refill, up to `burst`; None = unlimited). Override any
+    # key via `provider_config`.
+    DEFAULT_PROVIDER_CONFIG: Dict[str, Dict[str, Any]] = {
+        "CoinGecko": {"base_url": COINGECKO_URL, "connect_timeout": 3.05, "read_timeout": 5.0, "retries": 2,
+                      "rate_per_minute": 30, "burst": 10},
+        "CoinCap": {"base_url": BASE_URL, "connect_timeout": 3.05, "read_timeout": 3.0, "retries": 2,
+                    "rate_per_minute": 200, "burst": 20},
+        "Binance": {"base_url": BINANCE_URL, "connect_timeout": 3.05, "read_timeout": 3.0, "retries": 2,
+                    "rate_per_minute": 1200, "burst": 50},
+    }
+
+    def __init__(self, resolution_cache: Optional[ResolutionCache] = None, hedge_delay: Optional[float] = 1.0,
+                 breaker_threshold: int = 3, breaker_cooldown: float = 30.0,
+                 provider_config: Optional[Dict[str, Dict[str, Any]]] = None,
+                 pool_maxsize: int = 20, backoff_base: float = 0.25, backoff_max: float = 4.0,
+                 verify_ssl: bool = False, rate_limiter: Optional[RateLimiter] = None,
+                 known_symbols: Optional[KnownSymbols] = None, unknown_symbols: Optional[NegativeCache] = None):
+        # symbol -> provider id, so a known coin costs one price call per provider
+        self.resolutions = resolution_cache or ResolutionCache()
+        # Symbols every provider recently missed, and the filter of all listed ones;
+        # both answer "not a coin" without a network call
+        self.unknown_symbols = unknown_symbols if unknown_symbols is not None else NegativeCache()
+        self.known_symbols = known_symbols or KnownSymbols()
+        # Seconds to wait on a provider before also starting the next one.
+        # None = strictly sequential fallback.
+        self.hedge_delay = hedge_delay
+        self.breakers = {
+            name: CircuitBreaker(breaker_threshold, breaker_cooldown)
+            for name in self.DEFAULT_PROVIDER_CONFIG
+        }
+        # Hedged attempts: one worker per pooled connection to each provider, so
+        # a hedge starts on time even while earlier losers are still running
+        self._executor = ThreadPoolExecutor(max_workers=pool_maxsize * len(self.DEFAULT_PROVIDER_CONFIG),
+                                            thread_name_prefix="provider")
+
+        self.provider_config = {
+            name: {**defaults, **(provider_config or {}).get(name, {})}
+            for name, defaults in self.DEFAULT_PROVIDER_CONFIG.items()
+        }
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # Pass a RateLimiter with a path to share quotas with other processes
+        self.limiter = rate_limiter or RateLimiter()
+        for name, config in self.provider_config.items():
+            self.limiter.configure(name, config.get('rate_per_minute'), config.get('burst'))
+        # How long _get may wait for a token on this thread (bulk jobs set it)
+        self._local = threading.local()
+        # One keep-alive session per provider host, so repeat calls skip the TCP+TLS handshake
+        self._sessions: Dict[str, requests.Session] = {}
+        for name in self.provider_config:
+            session = requests.Session()
+            # Retries are handled in _get so they can honour Retry-After and add jitter
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(self.HEADERS)
+            # verify=False by default to help with local proxy/SSL issues
+            session.verify = verify_ssl
+            self._sessions[name] = session
+
+    def _provider_lookups(self) -> List[Tuple[str, Callable[[str], Generator]]]:
+        # Preference order: CoinGecko (best for alts like Pi, Pepe, etc.), CoinCap, Binance.
+        # Providers that are out of request budget are left out.
+        return [
+            (name, lookup) for name, lookup in (
+                ("CoinGecko", self._coingecko_lookup),
+                ("CoinCap", self._coincap_lookup),
+                ("Binance", self._binance_lookup),
+            ) if self.limiter.has_budget(name)
+        ]
+
+    def _providers(self) -> List[Tuple[str, Callable[[str], Optional[Dict[str, Any]]]]]:
+        return [(name, partial(self._run_lookup, lookup)) for name, lookup in self._provider_lookups()]
 
     def fetch_coin_data(self, symbol: str) -> Optional[Dict[str, Any]]:
         """
         Fetches coin data from CoinGecko (best coverage), CoinCap, or Binance.
+        Providers whose circuit breaker is open are skipped. Symbols that every
+        provider recently missed (see unknown_symbols) return None without a call.
         """
-        # 1. Try CoinGecko (Best for alts like Pi, Pepe, etc.)
+        if self._negative_hit(symbol):
+            return None
+        # One outcome per provider tried; all "miss" means the symbol is unknown
+        outcomes: List[str] = []
+        if self.hedge_delay is None:
+            data = None
+            for name, fetch in self._providers():
+                data = self._attempt(name, fetch, symbol, outcomes)
+                if data:
+                    break
+        else:
+            data = self._fetch_hedged(symbol, outcomes)
+
+        if not data:
+            self._record_misses([symbol], outcomes)
+            print(f"All APIs failed for {symbol}. No hardcoded fallback available.")
+        return data
+
+    def is_listed(self, symbol: str) -> bool:
+        """
+        False if `symbol` is certainly not a coin any provider lists (known-symbol
+        filter). No network I/O; True until the filter has been loaded.
+        """
+        if self.known_symbols.might_exist(symbol):
+            return True
+        FILTERED_UNLISTED.inc()
+        return False
+
+    def _negative_hit(self, symbol: str) -> bool:
+        if symbol.upper() in self.unknown_symbols:
+            FILTERED_NEGATIVE.inc()
+            return True
+        return False
+
+    def _record_misses(self, symbols: List[str], outcomes: List[str]):
+        # Only a clean miss from every provider is cached: an error, open breaker
+        # or exhausted budget says nothing about whether the coin exists
+        if len(outcomes) == len(self.provider_config) and all(o == "miss" for o in outcomes):
+            for symbol in symbols:
+                self.unknown_symbols.add(symbol.upper())
+
+    def _attempt(self, name: str, fetch: Callable[[str], Optional[Dict[str, Any]]], symbol: str,
+                 outcomes: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        One provider call with circuit-breaker bookkeeping. A miss (unknown symbol)
+        is not a failure; exceptions (timeouts, 429, 5xx) are.
+        """
+        breaker = self.breakers[name]
+        if not breaker.allow():
+            self._record_call(name, "single", "skipped", outcomes=outcomes)
+            return None
+        start = time.perf_counter()
         try:
-            # CoinGecko requires Coin ID. Use search first.
-            search_url = "https://api.coingecko.com/api/v3/search"
-            params = {'query': symbol}
-            headers = {'User-Agent': 'Mozilla/5.0'}
-            # verify=False to help with local proxy/SSL issues
-            response = requests.get(search_url, params=params, headers=headers, timeout=5, verify=False)
-            
-            if response.status_code == 200:
-                coins = response.json().get('coins', [])
-                if coins:
-                    # Find exact symbol match
-                    target_coin = None
-                    for coin in coins:
-                        if coin['symbol'].upper() == symbol.upper():
-                            target_coin = coin
-                            break
-                    
-                    if target_coin:
-                        # Fetch price details
-                        price_url = "https://api.coingecko.com/api/v3/simple/price"
-                        p_params = {
-                            'ids': target_coin['id'],
-                            'vs_currencies': 'usd',
-                            'include_last_updated_at': 'true'
-                        }
-                        p_response = requests.get(price_url, params=p_params, headers=headers, timeout=5, verify=False)
-                        if p_response.status_code == 200:
-                            data = p_response.json()
-                            if target_coin['id'] in data:
-                                price_data = data[target_coin['id']]
-                                return {
-                                    "coin": target_coin['name'],
-                                    "symbol": target_coin['symbol'].upper(),
-                                    "launch_year": 2010, # Not provided in simple price
-                                    "consensus": "Unknown",
-                                    "last_price": float(price_data['usd']),
-                                    "price_timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
-                                }
+            data = fetch(symbol)
+        except RateLimited:
+            # Out of budget mid-lookup; not the provider's fault
+            breaker.release()
+            self._record_call(name, "single", "limited", outcomes=outcomes)
+            return None
         except Exception as e:
-            print(f"CoinGecko API Error: {e}")
+            breaker.record_failure()
+            self._record_call(name, "single", "error", time.perf_counter() - start, outcomes)
+            print(f"{name} API Error: {e}")
+            return None
+        breaker.record_success()
+        self._record_call(name, "single", "hit" if data else "miss", time.perf_counter() - start, outcomes)
+        return data
+
+    def _record_call(self, provider: str, mode: str, outcome: str, elapsed: Optional[float] = None,
+                     outcomes: Optional[List[str]] = None):
+        metrics.PROVIDER_CALLS.inc(provider=provider, mode=mode, outcome=outcome)
+        if elapsed is not None:
+            metrics.PROVIDER_SECONDS.observe(elapsed, provider=provider, mode=mode)
+        if outcomes is not None:
+            outcomes.append(outcome)
+
+    def _fetch_hedged(self, symbol: str, outcomes: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Start providers in preference order, launching the next one after
+        `hedge_delay` or as soon as a running one fails. First valid result wins.
+        """
+        # Not allow(): a half-open provider's probe is claimed when its attempt starts
+        queue = [(name, fetch) for name, fetch in self._providers() if not self.breakers[name].is_open]
+        running = set()
+        while queue or running:
+            if queue:
+                name, fetch = queue.pop(0)
+                running.add(self._executor.submit(self._attempt, name, fetch, symbol, outcomes))
+            done, running = wait(running, timeout=self.hedge_delay if queue else None, return_when=FIRST_COMPLETED)
+            for future in done:
+                data = future.result()
+                if data:
+                    # Attempts still queued never start; slower providers already
+                    # running finish in the pool and their results are dropped
+                    for other in running:
+                        other.cancel()
+                    return data
+        return None
+
+    def _get(self, provider: str, path: str, params: Optional[Dict[str, Any]] = None) -> requests.Response:
+        """
+        GET on a provider's pooled session. Connection errors, timeouts, 429 and 5xx
+        are retried with jittered exponential backoff (or the server's Retry-After);
+        once retries run out they raise, which counts against the circuit breaker.
+        Other 4xx responses are returned as-is (treated as a miss by callers).
+        """
+        config = self.provider_config[provider]
+        url = f"{config['base_url']}{path}"
+        timeout = (config['connect_timeout'], config['read_timeout'])
+        attempt = 0
+        while True:
+            # One token per HTTP request, retries included
+            self.limiter.acquire(provider, max_wait=getattr(self._local, 'max_wait', 0.0))
+            try:
+                response = self._sessions[provider].get(url, params=params, timeout=timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                delay = self._retry_delay(provider, attempt)
+                if delay is None:
+                    raise
+            else:
+                if response.status_code != 429 and response.status_code < 500:
+                    return response
+                delay = self._retry_delay(provider, attempt, response)
+                if delay is None:
+                    raise requests.HTTPError(f"{response.status_code} from {url}", response=response)
+            time.sleep(delay)
+            attempt += 1
+
+    def _retry_delay(self, provider: str, attempt: int, response: Any = None) -> Optional[float]:
+        """
+        Seconds to wait before retrying a request that failed with a 429/5xx
+        `response` (or a connection error/timeout if None), or None if it must
+        not be retried. Shared by _get and the async client's _aget.
+        """
+        if attempt >= self.provider_config[provider]['retries']:
+            return None
+        delay = self._retry_after(response) if response is not None else None
+        if delay is None:
+            return self._backoff(attempt)
+        # Don't park a chat request behind a long Retry-After; let the next provider answer
+        return delay if delay <= self.backoff_max else None
+
+    def _backoff(self, attempt: int) -> float:
+        # "Full jitter": uniform in [0, base * 2^attempt], capped
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
 
-        # 2. Try CoinCap
+    def _retry_after(self, response: requests.Response) -> Optional[float]:
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
         try:
-            url = f"{self.BASE_URL}/assets"
-            params = {'search': symbol, 'limit': 10}
-            headers = {'User-Agent': 'Mozilla/5.0'}
-            response = requests.get(url, params=params, headers=headers, timeout=3, verify=False)
-            
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def _run_lookup(self, lookup: Callable[[str], Generator], symbol: str) -> Any:
+        """
+        Run a single-symbol provider lookup (_coingecko_lookup, ...): a generator
+        that yields requests (provider, path, params) and is sent the responses.
+        This drives it with _get, the async client with _aget, so the request
+        and parsing logic exists once.
+        """
+        steps = lookup(symbol)
+        finished, value = advance(steps)
+        while not finished:
+            finished, value = advance(steps, self._get(*value))
+        return value
+
+    def _coingecko_id_lookup(self, symbol: str) -> Generator:
+        """
+        Symbol -> {"id", "name", "symbol"} on CoinGecko, from cache or /search.
+        """
+        cached = self.resolutions.get(symbol, "coingecko")
+        if cached:
+            return cached
+
+        # CoinGecko requires Coin ID. Use search first.
+        response = yield "CoinGecko", "/search", {'query': symbol}
+        if response.status_code != 200:
+            return None
+
+        # Find exact symbol match
+        for coin in response.json().get('coins', []):
+            if coin['symbol'].upper() == symbol.upper():
+                target = {"id": coin['id'], "name": coin['name'], "symbol": coin['symbol'].upper()}
+                self.resolutions.set(symbol, "coingecko", target)
+                return target
+        return None
+
+    def _resolve_coingecko(self, symbol: str) -> Optional[Dict[str, str]]:
+        return self._run_lookup(self._coingecko_id_lookup, symbol)
+
+    def _coingecko_lookup(self, symbol: str) -> Generator:
+        target_coin = yield from self._coingecko_id_lookup(symbol)
+        if not target_coin:
+            return None
+
+        # Fetch price details
+        p_params = {
+            'ids': target_coin['id'],
+            'vs_currencies': 'usd',
+            'include_last_updated_at': 'true'
+        }
+        p_response = yield "CoinGecko", "/simple/price", p_params
+        if p_response.status_code != 200:
+            return None
+
+        data = p_response.json()
+        if target_coin['id'] not in data:
+            # Id was delisted/renamed; resolve again next time
+            self.resolutions.invalidate(symbol, "coingecko")
+            return None
+
+        return self._map_coingecko_data(target_coin, data[target_coin['id']])
+
+    def _coincap_lookup(self, symbol: str) -> Generator:
+        asset_id = self.resolutions.get(symbol, "coincap")
+        if asset_id:
+            response = yield "CoinCap", f"/assets/{asset_id}", None
             if response.status_code == 200:
-                data = response.json().get('data', [])
-                for item in data:
-                    if item['symbol'].upper() == symbol.upper():
-                        return self._map_coincap_data(item)
-        except Exception as e:
-            print(f"CoinCap API Error: {e}")
+                item = response.json().get('data')
+                if item and item['symbol'].upper() == symbol.upper():
+                    return self._map_coincap_data(item)
+            self.resolutions.invalidate(symbol, "coincap")
+
+        response = yield "CoinCap", "/assets", {'search': symbol, 'limit': 10}
+        if response.status_code == 200:
+            for item in response.json().get('data', []):
+                if item['symbol'].upper() == symbol.upper():
+                    self.resolutions.set(symbol, "coincap", item['id'])
+                    return self._map_coincap_data(item)
+        return None
+
+    def _fetch_coincap(self, symbol: str) -> Optional[Dict[str, Any]]:
+        return self._run_lookup(self._coincap_lookup, symbol)
+
+    def _binance_lookup(self, symbol: str) -> Generator:
+        binance_symbol = self.resolutions.get(symbol, "binance") or f"{symbol.upper()}USDT"
+        response = yield "Binance", "/ticker/price", {'symbol': binance_symbol}
+        if response.status_code != 200:
+            return None
+
+        data = response.json()
+        self.resolutions.set(symbol, "binance", binance_symbol)
+        return self._map_binance_data(symbol, data['price'])
+
+    def _fetch_binance(self, symbol: str) -> Optional[Dict[str, Any]]:
+        return self._run_lookup(self._binance_lookup, symbol)
+
+    def fetch_many_coin_data(self, symbols: List[str], max_wait: float = 0.0) -> Dict[str, Dict[str, Any]]:
+        """
+        Bulk version of fetch_coin_data. Each provider gets the symbols the previous
+        ones missed, in as few calls as it allows. Returns {SYMBOL: data} for hits.
+
+        Each request may wait up to `max_wait` seconds for the provider's rate
+        limit (background jobs); once a provider is out of budget the remaining
+        symbols move on to the next one.
+        """
+        pending = list(dict.fromkeys(s.upper() for s in symbols if s and not self._negative_hit(s)))
+        results: Dict[str, Dict[str, Any]] = {}
+        outcomes: List[str] = []
 
-        # 3. Try Binance
+        self._local.max_wait = max_wait
         try:
-            binance_symbol = f"{symbol.upper()}USDT"
-            url = f"https://api.binance.com/api/v3/ticker/price?symbol={binance_symbol}"
-            response = requests.get(url, timeout=3, verify=False)
-            
-            if response.status_code == 200:
-                data = response.json()
-                return {
-                    "coin": symbol.upper(),
-                    "symbol": symbol.upper(),
-                    "launch_year": 2010,
-                    "consensus": "Unknown",
-                    "last_price": float(data['price']),
-                    "price_timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
-                }
+            for name, fetch_many in (
+                ("CoinGecko", self._fetch_many_coingecko),
+                ("CoinCap", self._fetch_many_coincap),
+                ("Binance", self._fetch_many_binance),
+            ):
+                if not pending:
+                    break
+                breaker = self.breakers[name]
+                if not breaker.allow():
+                    self._record_call(name, "bulk", "skipped", outcomes=outcomes)
+                    continue
+                start = time.perf_counter()
+                hits = len(results)
+                try:
+                    # Providers fill `results` as they go, so a mid-way failure keeps earlier hits
+                    fetch_many(pending, results)
+                    breaker.record_success()
+                    self._record_call(name, "bulk", "hit" if len(results) > hits else "miss",
+                                      time.perf_counter() - start, outcomes)
+                except RateLimited:
+                    # Out of budget: whatever is left goes to the next provider
+                    breaker.release()
+                    self._record_call(name, "bulk", "limited", time.perf_counter() - start, outcomes)
+                except Exception as e:
+                    breaker.record_failure()
+                    self._record_call(name, "bulk", "error", time.perf_counter() - start, outcomes)
+                    print(f"{name} API Error: {e}")
+                pending = [s for s in pending if s not in results]
+        finally:
+            self._local.max_wait = 0.0
+
+        if pending:
+            # A provider's "hit" here is for other symbols; these were misses
+            self._record_misses(pending, ["miss" if o == "hit" else o for o in outcomes])
+            print(f"All APIs failed for {', '.join(pending)}. No hardcoded fallback available.")
+        return results
+
+    def _fetch_many_coingecko(self, symbols: List[str], results: Dict[str, Dict[str, Any]]):
+        # Ids are priced in batches as they resolve, so a /search that fails or
+        # runs out of budget part-way still leaves the earlier symbols priced
+        targets: Dict[str, Tuple[str, Dict[str, str]]] = {}
+        try:
+            for symbol in symbols:
+                target = self._resolve_coingecko(symbol)
+                if target:
+                    targets[target['id']] = (symbol, target)
+                if len(targets) >= self.BATCH_SIZE:
+                    batch, targets = targets, {}
+                    self._price_coingecko(batch, results)
+        finally:
+            # Runs before a resolution error propagates to fetch_many_coin_data
+            if targets:
+                self._price_coingecko(targets, results)
+
+    def _price_coingecko(self, targets: Dict[str, Tuple[str, Dict[str, str]]], results: Dict[str, Dict[str, Any]]):
+        # One /simple/price call for up to BATCH_SIZE resolved ids
+        p_params = {
+            'ids': ",".join(targets),
+            'vs_currencies': 'usd',
+            'include_last_updated_at': 'true'
+        }
+        response = self._get("CoinGecko", "/simple/price", params=p_params)
+        if response.status_code != 200:
+            return
+        data = response.json()
+        for coin_id, (symbol, target) in targets.items():
+            if coin_id in data:
+                results[symbol] = self._map_coingecko_data(target, data[coin_id])
+            else:
+                self.resolutions.invalidate(symbol, "coingecko")
+
+    def _fetch_many_coincap(self, symbols: List[str], results: Dict[str, Dict[str, Any]]):
+        by_id = {}
+        for symbol in symbols:
+            asset_id = self.resolutions.get(symbol, "coincap")
+            if asset_id:
+                by_id[asset_id] = symbol
+
+        ids = list(by_id)
+        for start in range(0, len(ids), self.BATCH_SIZE):
+            chunk = ids[start:start + self.BATCH_SIZE]
+            params = {'ids': ",".join(chunk)}
+            response = self._get("CoinCap", "/assets", params=params)
+            if response.status_code != 200:
+                continue
+            for item in response.json().get('data', []):
+                symbol = by_id.get(item['id'])
+                if symbol and item['symbol'].upper() == symbol:
+                    results[symbol] = self._map_coincap_data(item)
+
+        # Unresolved (or stale) ids still need a search each
+        for symbol in symbols:
+            if symbol not in results:
+                data = self._fetch_coincap(symbol)
+                if data:
+                    results[symbol] = data
+
+    def _fetch_many_binance(self, symbols: List[str], results: Dict[str, Dict[str, Any]]):
+        if len(symbols) == 1:
+            data = self._fetch_binance(symbols[0])
+            if data:
+                results[symbols[0]] = data
+            return
+
+        # Without a symbol filter /ticker/price returns every pair in one response
+        response = self._get("Binance", "/ticker/price")
+        if response.status_code != 200:
+            return
+        prices = {item['symbol']: item['price'] for item in response.json()}
+        for symbol in symbols:
+            pair = self.resolutions.get(symbol, "binance") or f"{symbol}USDT"
+            if pair in prices:
+                self.resolutions.set(symbol, "binance", pair)
+                results[symbol] = self._map_binance_data(symbol, prices[pair])
+
+    def fetch_market_listing(self, limit: int, max_wait: float = 60.0, concurrency: int = 4) -> List[Dict[str, Any]]:
+        """
+        Top `limit` coins by market cap with names, ids and USD prices, read
+        from the providers' paged market listings: CoinGecko /coins/markets,
+        with CoinCap /assets pages filling in anything CoinGecko couldn't
+        return. Pages are fetched `concurrency` at a time, each waiting up to
+        `max_wait` seconds for rate-limit budget.
+
+        Provider ids are stored in the resolution cache, so later lookups of
+        these coins skip the /search call. Returns fetch_coin_data-style dicts
+        (plus "rank"), best-ranked first, one per symbol.
+        """
+        listing: Dict[str, Dict[str, Any]] = {}
+        resolutions = []
+
+        pages = self._fetch_pages("CoinGecko", self._coingecko_markets_page,
+                                  math.ceil(limit / self.COINGECKO_PAGE_SIZE), max_wait, concurrency)
+        for item in (item for page in pages for item in page):
+            if item.get('current_price') is None or not item.get('symbol'):
+                continue
+            data = self._map_coingecko_market(item)
+            if data['symbol'] not in listing:
+                listing[data['symbol']] = data
+                resolutions.append((data['symbol'], "coingecko",
+                                    {"id": item['id'], "name": item['name'], "symbol": data['symbol']}))
+
+        if len(listing) < limit:
+            # Ranks differ a little between providers; CoinCap only adds symbols CoinGecko missed
+            pages = self._fetch_pages("CoinCap", self._coincap_assets_page,
+                                      math.ceil(limit / self.COINCAP_PAGE_SIZE), max_wait, concurrency)
+            for item in (item for page in pages for item in page):
+                if item.get('priceUsd') is None or not item.get('symbol'):
+                    continue
+                data = self._map_coincap_data(item)
+                data['symbol'] = data['symbol'].upper()
+                data['rank'] = int(item.get('rank') or 0) or None
+                if data['symbol'] not in listing:
+                    listing[data['symbol']] = data
+                    resolutions.append((data['symbol'], "coincap", item['id']))
+
+        self.resolutions.set_many(resolutions)
+        ranked = sorted(listing.values(), key=lambda d: d['rank'] if d.get('rank') else float('inf'))
+        return ranked[:limit]
+
+    def fetch_coin_list(self, max_wait: float = 60.0) -> Optional[List[Dict[str, str]]]:
+        """
+        Every coin CoinGecko lists, as [{"id", "symbol", "name"}, ...] (one
+        request, ~15k coins). None if the provider is down or out of budget.
+        """
+        return self._fetch_reference("/coins/list", max_wait)
+
+    def fetch_exchange_rates(self, max_wait: float = 60.0) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        CoinGecko /exchange_rates: {code: {"name", "unit", "value", "type"}} for
+        fiat, metals and major coins, with values per 1 BTC. None on failure.
+        """
+        data = self._fetch_reference("/exchange_rates", max_wait)
+        return data.get('rates') if isinstance(data, dict) else None
+
+    def fetch_symbol_listing(self, max_wait: float = 60.0) -> Optional[List[Dict[str, str]]]:
+        """
+        Every coin any provider can look up, as [{"id", "symbol", "name"}, ...]:
+        CoinGecko /coins/list, all CoinCap /assets pages and Binance's USDT
+        pairs (the pairs _fetch_binance queries). None without CoinGecko's
+        list, the broadest one; a failed CoinCap or Binance listing is left out.
+        """
+        coins = self.fetch_coin_list(max_wait)
+        if not coins:
+            return None
+        coins = list(coins)
+
+        offset = 0
+        while True:
+            page = self._fetch_reference("/assets", max_wait, "CoinCap",
+                                         {'limit': self.COINCAP_PAGE_SIZE, 'offset': offset})
+            assets = page.get('data') if isinstance(page, dict) else None
+            if not assets:
+                break
+            coins.extend({"id": a.get('id'), "symbol": a.get('symbol'), "name": a.get('name')} for a in assets)
+            if len(assets) < self.COINCAP_PAGE_SIZE:
+                break
+            offset += self.COINCAP_PAGE_SIZE
+
+        tickers = self._fetch_reference("/ticker/price", max_wait, "Binance")
+        if isinstance(tickers, list):
+            coins.extend({"symbol": t['symbol'][:-4]} for t in tickers
+                         if t.get('symbol', '').endswith("USDT") and len(t['symbol']) > 4)
+        return coins
+
+    def _fetch_reference(self, path: str, max_wait: float, provider: str = "CoinGecko",
+                         params: Optional[Dict[str, Any]] = None) -> Optional[Any]:
+        # One request for slow-changing reference data (background jobs)
+        breaker = self.breakers[provider]
+        if not breaker.allow():
+            self._record_call(provider, "bulk", "skipped")
+            return None
+        self._local.max_wait = max_wait
+        start = time.perf_counter()
+        try:
+            response = self._get(provider, path, params=params)
+            data = response.json() if response.status_code == 200 else None
+        except RateLimited:
+            breaker.release()
+            self._record_call(provider, "bulk", "limited", time.perf_counter() - start)
+            return None
         except Exception as e:
-            print(f"Binance API Error: {e}")
+            breaker.record_failure()
+            self._record_call(provider, "bulk", "error", time.perf_counter() - start)
+            print(f"{provider} API Error: {e}")
+            return None
+        finally:
+            self._local.max_wait = 0.0
+        breaker.record_success()
+        self._record_call(provider, "bulk", "hit" if data else "miss", time.perf_counter() - start)
+        return data
 
-        print(f"All APIs failed for {symbol}. No hardcoded fallback available.")
-        return None
+    def start_symbol_refresh(self):
+        """
+        Keep the known-symbol filter current from a background thread.
+        """
+        self.known_symbols.start(self.fetch_symbol_listing)
+
+    def _fetch_pages(self, provider: str, fetch_page: Callable[[int], List[Dict[str, Any]]], count: int,
+                     max_wait: float, concurrency: int) -> List[List[Dict[str, Any]]]:
+        """
+        Pages 0..count-1 of a provider listing, concurrently. Failed or
+        rate-limited pages come back empty.
+        """
+        breaker = self.breakers[provider]
+        if count <= 0 or breaker.is_open:
+            return []
+
+        def one(page: int) -> List[Dict[str, Any]]:
+            # Stop paging once the provider's circuit opens mid-listing
+            if not breaker.allow():
+                self._record_call(provider, "bulk", "skipped")
+                return []
+            # Worker threads have their own rate-limit wait setting
+            self._local.max_wait = max_wait
+            start = time.perf_counter()
+            try:
+                items = fetch_page(page)
+            except RateLimited:
+                breaker.release()
+                self._record_call(provider, "bulk", "limited", time.perf_counter() - start)
+                return []
+            except Exception as e:
+                breaker.record_failure()
+                self._record_call(provider, "bulk", "error", time.perf_counter() - start)
+                print(f"{provider} API Error: {e}")
+                return []
+            finally:
+                self._local.max_wait = 0.0
+            breaker.record_success()
+            self._record_call(provider, "bulk", "hit" if items else "miss", time.perf_counter() - start)
+            return items
+
+        pages = []
+        if not breaker.is_closed:
+            # Half-open: the first page is the probe; the rest follow only if it closes the breaker
+            pages.append(one(0))
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, count)),
+                                thread_name_prefix=f"{provider.lower()}-pages") as pool:
+            pages.extend(pool.map(one, range(len(pages), count)))
+        return pages
+
+    def _coingecko_markets_page(self, page: int) -> List[Dict[str, Any]]:
+        params = {
+            'vs_currency': 'usd',
+            'order': 'market_cap_desc',
+            'per_page': self.COINGECKO_PAGE_SIZE,
+            'page': page + 1,
+        }
+        response = self._get("CoinGecko", "/coins/markets", params=params)
+        return response.json() if response.status_code == 200 else []
+
+    def _coincap_assets_page(self, page: int) -> List[Dict[str, Any]]:
+        params = {'limit': self.COINCAP_PAGE_SIZE, 'offset': page * self.COINCAP_PAGE_SIZE}
+        response = self._get("CoinCap", "/assets", params=params)
+        return response.json().get('data', []) if response.status_code == 200 else []
+
+    def _map_coingecko_market(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        # last_updated looks like "2026-01-17T10:55:09.123Z"; drop the milliseconds
+        updated = iso_to_epoch((item.get('last_updated') or '')[:19] + 'Z')
+        return {
+            "coin": item['name'],
+            "symbol": item['symbol'].upper(),
+            "launch_year": 2010, # Not provided by the listing
+            "consensus": "Unknown",
+            "last_price": float(item['current_price']),
+            "price_ts": updated or time.time(),
+            "rank": item.get('market_cap_rank'),
+        }
+
+    def _map_coingecko_data(self, target_coin: Dict[str, str], price_data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "coin": target_coin['name'],
+            "symbol": target_coin['symbol'].upper(),
+            "launch_year": 2010, # Not provided in simple price
+            "consensus": "Unknown",
+            "last_price": float(price_data['usd']),
+            "price_ts": time.time()
+        }
+
+    def _map_binance_data(self, symbol: str, price: str) -> Dict[str, Any]:
+        return {
+            "coin": symbol.upper(),
+            "symbol": symbol.upper(),
+            "launch_year": 2010,
+            "consensus": "Unknown",
+            "last_price": float(price),
+            "price_ts": time.time()
+        }
 
     def _map_coincap_data(self, item: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -100,7 +717,7 @@ class FreeCryptoAPIClient:
             "launch_year": 2009 if item.get('symbol') == 'BTC' else 2015,
             "consensus": "Proof of Work" if item.get('symbol') in ['BTC', 'DOGE', 'LTC'] else "Proof of Stake",
             "last_price": float(item.get('priceUsd', 0)),
-            "price_timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+            "price_ts": time.time()
         }
 
     def _simulate_responsive_data(self, symbol: str) -> Optional[Dict[str, Any]]:
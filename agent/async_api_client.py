@@ -0,0 +1,158 @@
+import asyncio
+import time
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Generator, List, Optional, Tuple
+
+try:
+    import httpx
+except ImportError:  # only the ASGI app needs the async client
+    httpx = None
+
+from .api_client import FreeCryptoAPIClient
+from .rate_limiter import RateLimited
+from .steps import advance
+
+
+class AsyncFreeCryptoAPIClient(FreeCryptoAPIClient):
+    """
+    asyncio version of FreeCryptoAPIClient for the ASGI app. Same providers,
+    fallback order, hedging, circuit breakers, retry policy and resolution
+    cache; the provider lookups themselves are shared (_run_lookup), only the
+    HTTP requests await. Upstream waits yield the event loop instead of
+    holding a thread, and the SQLite rate limiter runs on worker threads.
+
+    The blocking methods inherited from FreeCryptoAPIClient (e.g.
+    fetch_many_coin_data) keep working for background threads.
+    """
+
+    def __init__(self, *args, max_connections: int = 100, **kwargs):
+        if httpx is None:
+            raise ImportError("AsyncFreeCryptoAPIClient needs httpx: pip install httpx")
+        super().__init__(*args, **kwargs)
+        self.max_connections = max_connections
+        # Created lazily so they bind to the running event loop
+        self._clients: Dict[str, "httpx.AsyncClient"] = {}
+
+    def _client(self, provider: str) -> "httpx.AsyncClient":
+        client = self._clients.get(provider)
+        if client is None:
+            config = self.provider_config[provider]
+            client = self._clients[provider] = httpx.AsyncClient(
+                headers=self.HEADERS,
+                verify=self._sessions[provider].verify,
+                timeout=httpx.Timeout(config['read_timeout'], connect=config['connect_timeout']),
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+            )
+        return client
+
+    async def aclose(self):
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients = {}
+
+    async def _async_providers(self) -> List[Tuple[str, Callable[[str], Awaitable[Optional[Dict[str, Any]]]]]]:
+        # The budget check may read the shared SQLite rate limiter
+        lookups = await asyncio.to_thread(self._provider_lookups)
+        return [(name, partial(self._arun_lookup, lookup)) for name, lookup in lookups]
+
+    async def afetch_coin_data(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """
+        Async fetch_coin_data.
+        """
+        if self._negative_hit(symbol):
+            return None
+        outcomes: List[str] = []
+        if self.hedge_delay is None:
+            data = None
+            for name, fetch in await self._async_providers():
+                data = await self._aattempt(name, fetch, symbol, outcomes)
+                if data:
+                    break
+        else:
+            data = await self._afetch_hedged(symbol, outcomes)
+
+        if not data:
+            self._record_misses([symbol], outcomes)
+            print(f"All APIs failed for {symbol}. No hardcoded fallback available.")
+        return data
+
+    async def _aattempt(self, name: str, fetch: Callable[[str], Awaitable[Optional[Dict[str, Any]]]],
+                        symbol: str, outcomes: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        breaker = self.breakers[name]
+        if not breaker.allow():
+            self._record_call(name, "single", "skipped", outcomes=outcomes)
+            return None
+        start = time.perf_counter()
+        try:
+            data = await fetch(symbol)
+        except RateLimited:
+            breaker.release()
+            self._record_call(name, "single", "limited", outcomes=outcomes)
+            return None
+        except Exception as e:
+            breaker.record_failure()
+            self._record_call(name, "single", "error", time.perf_counter() - start, outcomes)
+            print(f"{name} API Error: {e}")
+            return None
+        breaker.record_success()
+        self._record_call(name, "single", "hit" if data else "miss", time.perf_counter() - start, outcomes)
+        return data
+
+    async def _afetch_hedged(self, symbol: str, outcomes: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        # Not allow(): a half-open provider's probe is claimed when its attempt starts
+        queue = [(name, fetch) for name, fetch in await self._async_providers() if not self.breakers[name].is_open]
+        running = set()
+        try:
+            while queue or running:
+                if queue:
+                    name, fetch = queue.pop(0)
+                    running.add(asyncio.ensure_future(self._aattempt(name, fetch, symbol, outcomes)))
+                done, running = await asyncio.wait(running, timeout=self.hedge_delay if queue else None,
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    data = task.result()
+                    if data:
+                        return data
+            return None
+        finally:
+            # Unlike threads, losing tasks can be cancelled outright
+            for task in running:
+                task.cancel()
+
+    async def _aget(self, provider: str, path: str, params: Optional[Dict[str, Any]] = None) -> "httpx.Response":
+        """
+        Async _get: same retry/backoff/Retry-After policy (_retry_delay).
+        """
+        config = self.provider_config[provider]
+        url = f"{config['base_url']}{path}"
+        attempt = 0
+        while True:
+            # Never waits for a token here; an exhausted provider is skipped instead.
+            # The shared limiter is SQLite, so take the token on a worker thread
+            await asyncio.to_thread(self.limiter.acquire, provider)
+            try:
+                response = await self._client(provider).get(url, params=params)
+            except httpx.TransportError:
+                delay = self._retry_delay(provider, attempt)
+                if delay is None:
+                    raise
+            else:
+                if response.status_code != 429 and response.status_code < 500:
+                    return response
+                delay = self._retry_delay(provider, attempt, response)
+                if delay is None:
+                    raise httpx.HTTPStatusError(f"{response.status_code} from {url}",
+                                                request=response.request, response=response)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _arun_lookup(self, lookup: Callable[[str], Generator], symbol: str) -> Any:
+        """
+        Async _run_lookup: the same provider lookups, with requests sent via _aget.
+        """
+        steps = lookup(symbol)
+        finished, value = advance(steps)
+        while not finished:
+            finished, value = advance(steps, await self._aget(*value))
+        return value
@@ -0,0 +1,72 @@
+import asyncio
+from typing import Optional
+from . import metrics
+from .models import AgentResponse, CoinData
+from .knowledge_base import KnowledgeBase
+from .async_api_client import AsyncFreeCryptoAPIClient
+from .core import CryptoAgent, QUERY_TIMER
+from .singleflight import AsyncSingleFlight
+from .steps import advance
+
+
+class AsyncCryptoAgent(CryptoAgent):
+    """
+    CryptoAgent with an async query path (aprocess_query) for the ASGI app.
+    Extraction, KB lookups and answer generation are the same steps as
+    process_query (_query_steps), run on worker threads; only the upstream
+    fetch awaits, so one process can hold many chats that are waiting on
+    providers.
+    """
+
+    def __init__(self, kb: Optional[KnowledgeBase] = None):
+        super().__init__(kb)
+        # Reuse the resolution cache, rate limiter and symbol filters set up next to the KB
+        self.api = AsyncFreeCryptoAPIClient(resolution_cache=self.api.resolutions, rate_limiter=self.api.limiter,
+                                            known_symbols=self.api.known_symbols,
+                                            unknown_symbols=self.api.unknown_symbols)
+        self._aflights = AsyncSingleFlight(metrics.FETCH_FLIGHTS)
+
+    async def aprocess_query(self, query: str, session_id: Optional[str] = None) -> AgentResponse:
+        with QUERY_TIMER.time():
+            return await self._aprocess_query(query, session_id)
+
+    async def _aprocess_query(self, query: str, session_id: Optional[str]) -> AgentResponse:
+        # Same steps as process_query. They look up the KB (SQLite reads for a
+        # shared backend), so they run on a worker thread; only the upstream
+        # fetch awaits on the event loop
+        steps = self._query_steps(query, session_id)
+        finished, value = await asyncio.to_thread(advance, steps)
+        while not finished:
+            coin = await self._afetch_coin(value)
+            finished, value = await asyncio.to_thread(advance, steps, coin)
+        return value
+
+    async def _afetch_coin(self, entity: str) -> Optional[CoinData]:
+        key = await asyncio.to_thread(self._flight_key, entity)
+        if key is None:
+            return None
+        return await self._aflights.do(key, lambda: self._afetch_and_store(entity))
+
+    async def _afetch_and_store(self, entity: str) -> Optional[CoinData]:
+        # KB reads and writes hit the disk; keep them off the event loop
+        steps = self._fetch_steps(entity)
+        finished, value = await asyncio.to_thread(advance, steps)
+        if not finished:
+            api_data = await self.api.afetch_coin_data(value)
+            finished, value = await asyncio.to_thread(advance, steps, api_data)
+        return value
+
+    def fetch_stats(self) -> dict:
+        sync_stats, async_stats = super().fetch_stats(), self._aflights.stats()
+        return {key: sync_stats[key] + async_stats[key] for key in sync_stats}
+
+    async def aclose(self):
+        self.refresher.stop()
+        self.api.known_symbols.stop()
+        self.kb.stop_watching()
+        self.history.stop()
+        self.fx.stop()
+        self.stop_price_stream()
+        await asyncio.to_thread(self.kb.checkpoint)
+        await asyncio.to_thread(self.api.resolutions.flush)
+        await self.api.aclose()
@@ -1,74 +1,193 @@
 import time
-from typing import List, Optional, Tuple
+from collections import deque
+from typing import Deque, Dict, Generator, List, Optional, Tuple
 from .models import CoinData, AgentResponse
 from .knowledge_base import KnowledgeBase
 from .api_client import FreeCryptoAPIClient
+from .resolution_cache import ResolutionCache
+from .rate_limiter import RateLimiter
+from .symbol_filter import KnownSymbols
+from .refresher import PriceRefresher
+from .singleflight import SingleFlight
+from .steps import advance
+from .sessions import SessionStore
+from .price_stream import PriceBroadcaster, PriceStreamIngestor, TickerSource
+from .price_history import PriceHistory
+from .fx import CURRENCY_CODES, FxRates, Quote
+from . import metrics
+import os
 import re
 
+# "Price of [X]"-style phrases, tried in order when no KB coin is mentioned
+ENTITY_PATTERNS = [
+    re.compile(p, re.IGNORECASE)
+    for p in (
+        r"price of\s+([a-zA-Z\s]+)",
+        r"value of\s+([a-zA-Z\s]+)",
+        r"about\s+([a-zA-Z\s]+)",
+        r"tell me about\s+([a-zA-Z\s]+)",
+        r"how much is\s+([a-zA-Z\s]+)",
+    )
+]
+STOP_WORDS_RE = re.compile(r'\b(today|now|right now)\b', re.IGNORECASE)
+NON_ALPHA_RE = re.compile(r'[^a-zA-Z]')
+
+# Questions answered from recorded price history, checked in order
+HISTORY_INTENTS = [
+    ("volatility", re.compile(r'\bvolatil', re.IGNORECASE)),
+    ("high_low", re.compile(r'\b(high|highest|low|lowest|range)\b', re.IGNORECASE)),
+    ("change", re.compile(r'\b(change[sd]?|move[sd]?|movement|gain(ed)?|drop(ped)?|up or down|perform(ed|ance)?)\b',
+                          re.IGNORECASE)),
+]
+# "last hour", "past 3 days", "24h"; default window is DEFAULT_HISTORY_WINDOW
+HISTORY_WINDOW_RE = re.compile(
+    r'\b(?:last|past)\s+(\d+)?\s*(minute|min|hour|hr|day|week)s?\b|\b(\d+)\s*(m|h|d|w)\b', re.IGNORECASE)
+# A history intent also needs a price word or a time reference: "has the consensus
+# changed?" and "all-time high" are not questions about recorded prices
+HISTORY_CONTEXT_RE = re.compile(r'\b(prices?|value|cost|worth|trad(e|ed|ing)|today|yesterday|this week)\b',
+                                re.IGNORECASE)
+ALL_TIME_RE = re.compile(r'\ball[- ]time\b', re.IGNORECASE)
+WINDOW_UNITS = {"m": 60, "min": 60, "minute": 60, "h": 3600, "hr": 3600, "hour": 3600,
+                "d": 86400, "day": 86400, "w": 604800, "week": 604800}
+DEFAULT_HISTORY_WINDOW = 86400
+# Quote currency at the end of a query: "price of ETH in EUR", "... in sats today?"
+# "to"/"into" only count in explicit conversions ("convert BTC to EUR"), not in
+# "is ETH similar to bitcoin?"
+CURRENCY_RE = re.compile(r'\s+(in|into|to)\s+([a-zA-Z]+)(?:\s+(?:today|now|right now))?(?=\s*[?.!]*\s*$)',
+                         re.IGNORECASE)
+CONVERT_RE = re.compile(r'\bconver(t|ts|ted|sion)\b', re.IGNORECASE)
+FOLLOW_UP_RE = re.compile(r'\b(it|its|this|the coin)\b', re.IGNORECASE)
+
+# Metric children bound once; process_query runs on every chat
+QUERY_TIMER = metrics.QUERY_SECONDS.labels()
+INTENT_STAGE = metrics.STAGE_SECONDS.labels(stage="intent")
+EXTRACT_STAGE = metrics.STAGE_SECONDS.labels(stage="extract")
+KB_STAGE = metrics.STAGE_SECONDS.labels(stage="kb_lookup")
+FETCH_STAGE = metrics.STAGE_SECONDS.labels(stage="fetch")
+ANSWER_STAGE = metrics.STAGE_SECONDS.labels(stage="answer")
+KB_HITS = metrics.KB_LOOKUPS.labels(result="hit")
+KB_MISSES = metrics.KB_LOOKUPS.labels(result="miss")
+BLOCKING_REFRESHES = metrics.STALE_REFRESHES.labels(mode="blocking")
+BACKGROUND_REFRESHES = metrics.STALE_REFRESHES.labels(mode="background")
+
 class ConversationMemory:
-    def __init__(self, limit: int = 10):
-        self.history: List[str] = [] # Stores user queries for context
+    # One of these per session, so keep it small
+    __slots__ = ("history", "last_entity", "limit", "watching")
+
+    def __init__(self, limit: int = 10, watch_limit: int = 20):
+        self.history: Deque[str] = deque(maxlen=limit) # Stores user queries for context
         self.last_entity: Optional[str] = None # Last discussed coin symbol
         self.limit = limit
+        # Coins this session asked about, for live price pushes (/prices/stream)
+        self.watching: Deque[str] = deque(maxlen=watch_limit)
 
     def add_turn(self, user_query: str):
+        # deque(maxlen) drops the oldest turn itself
         self.history.append(user_query)
-        if len(self.history) > self.limit:
-            self.history.pop(0)
 
     def set_last_entity(self, symbol: str):
         self.last_entity = symbol
+        if symbol not in self.watching:
+            self.watching.append(symbol)
     
     def get_last_entity(self) -> Optional[str]:
         return self.last_entity
 
 class CryptoAgent:
-    def __init__(self):
-        self.kb = KnowledgeBase()
-        self.api = FreeCryptoAPIClient()
+    # Prices older than SOFT_TTL are answered from the KB while a background
+    # refresh runs; past HARD_MAX_AGE the request waits for a fresh fetch.
+    SOFT_TTL = 120
+    HARD_MAX_AGE = 900
+    # Background refreshes may wait this long per request for provider rate limits
+    BACKGROUND_RATE_WAIT = 10.0
+
+    def __init__(self, kb: Optional[KnowledgeBase] = None):
+        self.kb = kb or KnowledgeBase()
+        # Keep the provider id cache, the shared rate-limit buckets and the
+        # known-symbol filter next to the KB file
+        data_dir = os.path.dirname(self.kb.data_path)
+        self.api = FreeCryptoAPIClient(
+            resolution_cache=ResolutionCache(os.path.join(data_dir, "resolution_cache.json")),
+            rate_limiter=RateLimiter(os.path.join(data_dir, "ratelimit.db")),
+            known_symbols=KnownSymbols(os.path.join(data_dir, "known_symbols.bloom")),
+        )
+        # Default memory for callers without a session (CLI, scripts)
         self.memory = ConversationMemory()
+        self.sessions = SessionStore(ConversationMemory)
+        # Concurrent fetches of the same coin share one upstream call + KB write
+        self._flights = SingleFlight(metrics.FETCH_FLIGHTS)
+        # Background refreshes join the same flights, so a chat request for a coin
+        # being refreshed waits for that fetch instead of starting its own
+        self.refresher = PriceRefresher(
+            lambda symbols: self._fetch_coins(symbols, max_wait=self.BACKGROUND_RATE_WAIT),
+            self._symbol_age, soft_ttl=self.SOFT_TTL)
+        # Price changes (stream, refresher, API fetches) fanned out to SSE clients
+        self.prices = PriceBroadcaster()
+        self.kb.add_listener(self.prices.publish)
+        self.stream: Optional[PriceStreamIngestor] = None
+        # Every KB price update is also recorded for change/high-low/volatility answers
+        self.history = PriceHistory(os.path.join(data_dir, "price_history.npz"))
+        self.kb.add_listener(self.history.record_coins)
+        # Rates for answers in other currencies, converted from the USD price
+        self.fx = FxRates(os.path.join(data_dir, "fx_rates.json"))
         
         # Simple keywords for intent/entity extraction
         # In a real system, use NLP. Here, regex/keywords.
         self.disallowed_keywords = ["predict", "prediction", "forecast", "invest", "buy", "sell", "future"]
 
-    def process_query(self, query: str) -> AgentResponse:
-        self.memory.add_turn(query)
+    def process_query(self, query: str, session_id: Optional[str] = None) -> AgentResponse:
+        with QUERY_TIMER.time():
+            return self._process_query(query, session_id)
+
+    def _process_query(self, query: str, session_id: Optional[str]) -> AgentResponse:
+        steps = self._query_steps(query, session_id)
+        finished, value = advance(steps)
+        while not finished:
+            finished, value = advance(steps, self._fetch_coin(value))
+        return value
+
+    def _query_steps(self, query: str, session_id: Optional[str]) -> Generator:
+        """
+        The query pipeline as a generator: yields each entity to fetch upstream
+        (sent back the fetched coin or None) and returns the AgentResponse.
+        _process_query and AsyncCryptoAgent._aprocess_query drive the same steps.
+        """
+        memory = self._memory_for(session_id)
+        memory.add_turn(query)
         
         # 1. Check Disallowed Queries
-        if any(bad in query.lower() for bad in self.disallowed_keywords):
-            return self._reject_response("Investment advice and predictions are not allowed.")
+        with INTENT_STAGE.time():
+            disallowed = self._is_disallowed(query)
+        if disallowed:
+            return self._reject_response("Investment advice and predictions are not allowed.", "disallowed")
 
         # 2. Extract Entity (Coin)
-        entity = self._extract_entity(query)
+        with EXTRACT_STAGE.time():
+            entity = self._resolve_entity(query, memory)
         if not entity:
-            # Check for context (follow-up)
-            if self._is_follow_up(query):
-                entity = self.memory.get_last_entity()
-        
-        if not entity:
-            return self._reject_response("INSUFFICIENT DATA – Could not identify cryptocurrency.")
+            return self._reject_response("INSUFFICIENT DATA – Could not identify cryptocurrency.", "no_entity")
 
         # Resolve entity handling names to symbols if possible via KB first
         # But if it's a new coin, we might have just the symbol or name.
         # Let's standardize on Symbol if found in KB, or assume input is symbol/name.
         
         # 3. Knowledge Base First
-        coin_data = self.kb.get_coin(entity)
+        with KB_STAGE.time():
+            coin_data = self.kb.get_coin(entity)
         source = "Knowledge Base"
         confidence = 1.0
         
         # If found in KB, update context
         if coin_data:
-            self.memory.set_last_entity(coin_data.symbol)
+            KB_HITS.inc()
+            memory.set_last_entity(coin_data.symbol)
+            self.refresher.record_query(coin_data.symbol)
             # Check Data Sufficiency & Freshness
             if self._needs_api_update(query, coin_data):
-                # Call API
-                api_data = self.api.fetch_coin_data(coin_data.symbol)
-                if api_data:
-                    # Merge/Update KB
-                    updated_coin = self._merge_data(coin_data, api_data)
-                    self.kb.update_coin(updated_coin)
+                # Call API (merges into the KB record)
+                with FETCH_STAGE.time():
+                    updated_coin = yield coin_data.symbol
+                if updated_coin:
                     coin_data = updated_coin
                     source = "FreeCryptoAPI" # Updated via API
                 else:
@@ -80,21 +199,81 @@ class CryptoAgent:
                     pass 
 
         else:
-            # Not in KB -> Call API
-            api_data = self.api.fetch_coin_data(entity)
-            if api_data:
-                # Create new record
-                coin_data = self._create_coin_from_api(api_data)
-                self.kb.update_coin(coin_data)
-                self.memory.set_last_entity(coin_data.symbol)
+            KB_MISSES.inc()
+            # Follow-ups later in a batch refer to this coin while it is fetched
+            previous = memory.get_last_entity()
+            memory.last_entity = entity
+            # Not in KB -> Call API (creates the KB record)
+            with FETCH_STAGE.time():
+                coin_data = yield entity
+            # Unless a later query in the batch has moved the conversation on
+            still_current = memory.get_last_entity() == entity
+            if coin_data:
+                if still_current:
+                    memory.set_last_entity(coin_data.symbol)
                 source = "FreeCryptoAPI"
             else:
-                return self._reject_response("INSUFFICIENT DATA – Not found in Knowledge Base or API")
+                if still_current:
+                    memory.last_entity = previous
+                return self._reject_response("INSUFFICIENT DATA – Not found in Knowledge Base or API", "not_found")
 
         # 4. Generate Answer
-        answer = self._generate_answer(query, coin_data)
+        with ANSWER_STAGE.time():
+            return self._build_response(query, coin_data, source, confidence)
+
+    def process_batch(self, queries: List[Tuple[str, Optional[str]]]) -> List[AgentResponse]:
+        """
+        Answer several (query, session_id) pairs in order. Every query runs the
+        same steps as process_query up to its upstream fetch, then every coin
+        that is missing or too stale is fetched in one de-duplicated bulk
+        refresh, so N questions about M coins cost at most M upstream lookups.
+        """
+        responses: List[Optional[AgentResponse]] = [None] * len(queries)
+        waiting = []  # (index, steps, entity to fetch)
+
+        # 1. Intent checks, entity extraction and KB lookups (no network)
+        for i, (query, session_id) in enumerate(queries):
+            steps = self._query_steps(query, session_id)
+            finished, value = advance(steps)
+            if finished:
+                responses[i] = value
+            else:
+                waiting.append((i, steps, value))
+
+        # 2. One bulk refresh for every coin the batch needs
+        fetched = self._fetch_coins([entity for _, _, entity in waiting]) if waiting else {}
+
+        # 3. Answers (_query_steps fetches at most once)
+        for i, steps, entity in waiting:
+            responses[i] = advance(steps, fetched.get(entity))[1]
+
+        return responses
+
+    def _memory_for(self, session_id: Optional[str]) -> ConversationMemory:
+        return self.sessions.get(session_id) if session_id else self.memory
+
+    def _is_disallowed(self, query: str) -> bool:
+        q = query.lower()
+        return any(bad in q for bad in self.disallowed_keywords)
+
+    def _resolve_entity(self, query: str, memory: ConversationMemory) -> Optional[str]:
+        # "How much is SOL in ETH": the quote currency is not the coin asked about
+        entity = self._extract_entity(self._split_currency(query)[0])
+        if not entity:
+            # Check for context (follow-up)
+            if self._is_follow_up(query):
+                entity = memory.get_last_entity()
+        return entity
+
+    def _build_response(self, query: str, coin_data: CoinData, source: str, confidence: float = 1.0) -> AgentResponse:
+        code = self._split_currency(query)[1]
+        quote = self._quote(code) if code and code != "USD" else None
+        answer = self._generate_answer(query, coin_data, quote)
         if not answer:
-             return self._reject_response("INSUFFICIENT DATA – Data point not available.")
+             return self._reject_response("INSUFFICIENT DATA – Data point not available.", "no_data_point")
+        if code and code != "USD" and quote is None:
+            # FX table not loaded yet (or stale): the USD price is still an answer
+            answer += f" (No exchange rate for {code}; prices are in USD.)"
              
         return AgentResponse(
             answer=answer,
@@ -103,33 +282,15 @@ class CryptoAgent:
         )
 
     def _extract_entity(self, query: str) -> Optional[str]:
-        # 1. Check against KB names/symbols first
-        query_words = query.split()
-        for word in query_words:
-            # Check exact symbol match (case-insensitive)
-            clean_word = re.sub(r'[^a-zA-Z]', '', word)
-            coin = self.kb.get_coin(clean_word)
-            if coin:
-                return coin.symbol
+        # 1. Check against KB names/symbols/aliases first (single pass, multi-word names)
+        coin = self.kb.find_in_text(query)
+        if coin:
+            return coin.symbol
 
         # 2. Pattern Matching for "Price of [X]", "About [X]"
-        # Capture the noun after key phrases
-        patterns = [
-            r"price of\s+([a-zA-Z\s]+)",
-            r"value of\s+([a-zA-Z\s]+)",
-            r"about\s+([a-zA-Z\s]+)",
-            r"tell me about\s+([a-zA-Z\s]+)",
-            r"how much is\s+([a-zA-Z\s]+)"
-        ]
-        
-        for p in patterns:
-            match = re.search(p, query, re.IGNORECASE)
-            if match:
-                candidate = match.group(1).strip()
-                # If candidate is short, assume symbol. If long, assume name.
-                # Remove common stop words if any like "today", "now"
-                candidate = re.sub(r'\b(today|now|right now)\b', '', candidate, flags=re.IGNORECASE).strip()
-                return candidate.split()[0] # Take first word if multiple, e.g. "Bitcoin Price" -> "Bitcoin"
+        candidate = self._pattern_entity(query)
+        if candidate:
+            return candidate
 
         # 3. Fallback: Upper case words in original query (potential Tickers)
         # Bitcoin, BTC, SOL, etc. usually capitalized by users or match common tickers
@@ -137,8 +298,8 @@ class CryptoAgent:
         # Exclude common keywords
         ignored = {"WHO", "WHAT", "WHERE", "WHEN", "WHY", "HOW", "IS", "THE", "A", "AN", "PRICE", "VALUE", "OF"}
         
-        for word in query_words:
-            clean = re.sub(r'[^a-zA-Z]', '', word)
+        for word in query.split():
+            clean = NON_ALPHA_RE.sub('', word)
             if clean.upper() not in ignored and len(clean) >= 2:
                  # If original was capitalized or it looks like a symbol
                  if word[0].isupper() or clean.isupper():
@@ -146,32 +307,205 @@ class CryptoAgent:
 
         return None
 
+    def _pattern_entity(self, query: str) -> Optional[str]:
+        # Capture the noun after key phrases
+        for p in ENTITY_PATTERNS:
+            match = p.search(query)
+            if match:
+                candidate = match.group(1).strip()
+                # If candidate is short, assume symbol. If long, assume name.
+                # Remove common stop words if any like "today", "now"
+                candidate = STOP_WORDS_RE.sub('', candidate).strip()
+                if candidate:
+                    return candidate.split()[0] # Take first word if multiple, e.g. "Bitcoin Price" -> "Bitcoin"
+        return None
+
+    def _split_currency(self, query: str) -> Tuple[str, Optional[str]]:
+        """
+        "Price of ETH in EUR?" -> ("Price of ETH?", "EUR"). Only a known fiat
+        code/word counts, or a KB coin when the rest of the query still names a
+        coin ("SOL in ETH", not "staking in Ethereum"); otherwise the query is
+        returned as-is.
+        """
+        match = CURRENCY_RE.search(query)
+        if not match or (match.group(1).lower() != "in" and not CONVERT_RE.search(query)):
+            return query, None
+        code = self.fx.code_for(match.group(2))
+        if code is None:
+            coin = self.kb.get_coin(match.group(2))
+            if coin is None:
+                return query, None
+            code = coin.symbol.upper()
+        rest = query[:match.start()] + query[match.end():]
+        if code not in CURRENCY_CODES and not self._names_coin(rest):
+            # "Which consensus is used in Bitcoin?": the coin is the subject
+            return query, None
+        return rest, code
+
+    def _names_coin(self, text: str) -> bool:
+        # A KB coin, or a "price of X"-style X that the providers list ("about
+        # staking" is not a coin); never the capitalised-word fallback
+        if self.kb.find_in_text(text) is not None:
+            return True
+        candidate = self._pattern_entity(text)
+        return candidate is not None and self.api.is_listed(candidate)
+
+    def _quote(self, code: str) -> Optional[Quote]:
+        """
+        Conversion for `code` without any upstream call: the FX table for fiat
+        and other currency words (sats, gold), otherwise the coin's fresh KB
+        price (falling back to the FX table).
+        """
+        quote = self.fx.quote(code)
+        if code in CURRENCY_CODES:
+            return quote
+        coin = self.kb.get_coin(code)
+        if coin and coin.last_price:
+            age = self._price_age(coin)
+            if age is not None and age <= self.HARD_MAX_AGE:
+                return Quote(coin.symbol.upper(), coin.symbol.upper(), 1.0 / coin.last_price, False)
+        return quote
+
     def _is_follow_up(self, query: str) -> bool:
-        combined = query.lower()
-        return "it" in combined or "its" in combined or "this" in combined or "the coin" in combined
+        # Whole words: "it" inside "bitcoin" is not a reference to the last coin
+        return FOLLOW_UP_RE.search(query) is not None
 
     def _needs_api_update(self, query: str, coin: CoinData) -> bool:
-        # Check staleness irrespective of query usage if we are using the data.
-        # "Stale (older than X minutes)" -> Let's say 2 minutes for "Live" feel
-        if not coin.price_timestamp:
+        """
+        True when the request must wait for fresh data. Slightly stale prices are
+        served as-is and refreshed in the background instead.
+        """
+        age = self._price_age(coin)
+        if age is None or age > self.HARD_MAX_AGE:
+            BLOCKING_REFRESHES.inc()
             return True
-        
-        # Check timestamp
-        try:
-            # flexible parsing
-            last_time = time.mktime(time.strptime(coin.price_timestamp, "%Y-%m-%dT%H:%M:%SZ"))
-            # If older than 120 seconds (2 mins), update it
-            if time.time() - last_time > 120: 
+        if age > self.SOFT_TTL:
+            if not self.refresher.is_running:
+                # No background refresher (e.g. scripts): keep the old blocking behaviour
+                BLOCKING_REFRESHES.inc()
                 return True
-        except:
-            return True
-            
+            BACKGROUND_REFRESHES.inc()
+            self.refresher.request_refresh(coin.symbol)
         return False
 
+    def _price_age(self, coin: CoinData) -> Optional[float]:
+        """
+        Seconds since the coin's price was fetched, or None if unknown.
+        """
+        if coin.price_ts is None:
+            return None
+        # Epoch seconds (UTC), no parsing needed
+        return time.time() - coin.price_ts
+
+    def _symbol_age(self, symbol: str) -> Optional[float]:
+        coin = self.kb.get_coin(symbol)
+        return self._price_age(coin) if coin else None
+
+    def start_background_refresh(self):
+        self.refresher.start()
+        self.kb.watch_changes()
+        self.history.start()
+        self.api.start_symbol_refresh()
+        self.fx.start(self.api.fetch_exchange_rates)
+
+    def start_price_stream(self, source: TickerSource, flush_interval: float = 10.0):
+        """
+        Apply a live ticker stream (see agent.price_stream) to KB prices, so
+        watched coins stay fresh without per-query upstream calls.
+        """
+        if self.stream is None:
+            self.stream = PriceStreamIngestor(self.kb, source, flush_interval=flush_interval)
+        self.stream.start()
+
+    def stop_price_stream(self):
+        if self.stream is not None:
+            self.stream.stop()
+
+    def watch_list(self, session_id: Optional[str]) -> Deque[str]:
+        """
+        The session's watched symbols (live; grows as the session asks about coins).
+        """
+        return self._memory_for(session_id).watching
+
+    def refresh_coins(self, symbols: List[str], max_wait: float = 0.0) -> Dict[str, CoinData]:
+        """
+        Bulk-refresh prices for several symbols and write them to the KB at once.
+        Returns {REQUESTED SYMBOL: coin} for the ones found upstream. `max_wait`
+        is how long each upstream request may wait for rate-limit budget.
+        """
+        results = self.api.fetch_many_coin_data(symbols, max_wait=max_wait)
+        updated = {}
+        for symbol, api_data in results.items():
+            existing = self.kb.get_coin(symbol)
+            if existing and existing.symbol.upper() != api_data.get('symbol', symbol).upper():
+                # Matched another coin's name, not this coin
+                existing = None
+            updated[symbol] = self._merge_data(existing, api_data) if existing else self._create_coin_from_api(api_data)
+        self.kb.update_coins(list(updated.values()))
+        return updated
+
+    def _fetch_coin(self, entity: str) -> Optional[CoinData]:
+        """
+        Fetch a coin upstream and write it to the KB. Concurrent requests for the
+        same coin share one upstream fetch and one KB write.
+        """
+        key = self._flight_key(entity)
+        if key is None:
+            return None
+        return self._flights.do(key, lambda: self._fetch_and_store(entity))
+
+    def _fetch_coins(self, entities: List[str], max_wait: float = 0.0) -> Dict[str, Optional[CoinData]]:
+        """
+        Bulk _fetch_coin: one refresh_coins call for every coin not already
+        being fetched by another request. Returns {entity: coin or None}.
+        """
+        keys = {entity: self._flight_key(entity) for entity in dict.fromkeys(entities)}
+        fetched = self._flights.do_many([key for key in keys.values() if key],
+                                        lambda symbols: self.refresh_coins(symbols, max_wait=max_wait))
+        return {entity: fetched.get(key) if key else None for entity, key in keys.items()}
+
+    def _flight_key(self, entity: str) -> Optional[str]:
+        # Fetches of one coin share a flight; None if it can't be a coin at all
+        existing = self.kb.get_coin(entity)
+        if existing is None and not self.api.is_listed(entity):
+            # Not a symbol any provider lists: reject without network I/O
+            return None
+        return (existing.symbol if existing else entity).upper()
+
+    def _fetch_and_store(self, entity: str) -> Optional[CoinData]:
+        steps = self._fetch_steps(entity)
+        finished, value = advance(steps)
+        if not finished:
+            finished, value = advance(steps, self.api.fetch_coin_data(value))
+        return value
+
+    def _fetch_steps(self, entity: str) -> Generator:
+        # Yields the symbol to fetch upstream (sent back the provider data) and
+        # returns the stored coin; shared with AsyncCryptoAgent._afetch_and_store
+        existing = self.kb.get_coin(entity)
+        if existing:
+            # A flight that finished just before this one may already have refreshed it
+            age = self._price_age(existing)
+            if age is not None and age <= self.SOFT_TTL:
+                return existing
+
+        api_data = yield existing.symbol if existing else entity
+        if not api_data:
+            return None
+        coin = self._merge_data(existing, api_data) if existing else self._create_coin_from_api(api_data)
+        self.kb.update_coin(coin)
+        return coin
+
+    def fetch_stats(self) -> dict:
+        """
+        Upstream fetch counters: calls, executions and coalesced (shared) calls.
+        """
+        return self._flights.stats()
+
     def _merge_data(self, existing: CoinData, api_data: dict) -> CoinData:
         # Update price fields
         existing.last_price = api_data.get('last_price', existing.last_price)
-        existing.price_timestamp = api_data.get('price_timestamp', time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()))
+        existing.price_ts = api_data.get('price_ts', time.time())
         return existing
 
     def _create_coin_from_api(self, api_data: dict) -> CoinData:
@@ -181,14 +515,25 @@ class CryptoAgent:
             launch_year=api_data.get('launch_year', 0),
             consensus=api_data.get('consensus', 'Unknown'),
             last_price=api_data.get('last_price'),
-            price_timestamp=api_data.get('price_timestamp', time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()))
+            price_ts=api_data.get('price_ts', time.time())
         )
 
-    def _generate_answer(self, query: str, coin: CoinData) -> Optional[str]:
+    def _generate_answer(self, query: str, coin: CoinData, quote: Optional[Quote] = None) -> Optional[str]:
         q = query.lower()
+        if (HISTORY_CONTEXT_RE.search(q) or HISTORY_WINDOW_RE.search(q)) and not ALL_TIME_RE.search(q):
+            for intent, pattern in HISTORY_INTENTS:
+                if pattern.search(q):
+                    answer = self._history_answer(intent, q, coin, quote)
+                    if answer:
+                        return answer
+                    # No recorded history yet: answer like any other question
+                    break
+
+        # USD answers keep the raw KB price; other currencies are converted
+        price = f"${coin.last_price}" if quote is None or not coin.last_price else _money(coin.last_price, quote)
         if "price" in q or "value" in q or "cost" in q:
             if coin.last_price:
-                return f"The price of {coin.coin} ({coin.symbol}) is ${coin.last_price}."
+                return f"The price of {coin.coin} ({coin.symbol}) is {price}."
             return None
         elif "consensus" in q or "proof" in q:
             if coin.consensus:
@@ -200,14 +545,71 @@ class CryptoAgent:
             return None
         elif "about" in q or "tell me" in q or "what is" in q:
              # General info
-             return f"{coin.coin} ({coin.symbol}) is a cryptocurrency launched in {coin.launch_year} using {coin.consensus}. Current Price: ${coin.last_price}"
+             return f"{coin.coin} ({coin.symbol}) is a cryptocurrency launched in {coin.launch_year} using {coin.consensus}. Current Price: {price}"
         
         # Default fallback context aware
-        return f"{coin.coin} ({coin.symbol}): Price ${coin.last_price}, Consensus: {coin.consensus}."
+        return f"{coin.coin} ({coin.symbol}): Price {price}, Consensus: {coin.consensus}."
+
+    def _history_answer(self, intent: str, q: str, coin: CoinData, quote: Optional[Quote] = None) -> Optional[str]:
+        seconds = self._history_window(q)
+        stats = self.history.stats(coin.symbol, seconds)
+        if not stats:
+            return None
 
-    def _reject_response(self, reason: str) -> AgentResponse:
+        # "the last hour" rather than "the last 1 hour"
+        period = "the last " + _duration(seconds).removeprefix("1 ")
+        # Be explicit when the recorded history is shorter than the window asked for
+        if stats.start_ts - (time.time() - seconds) > 2 * self.history.resolution:
+            period += f" (history covers only {_duration(stats.end_ts - stats.start_ts)})"
+
+        if intent == "volatility":
+            return (f"{coin.coin} ({coin.symbol}) volatility over {period}: {stats.volatility:.2f}% "
+                    f"(std. dev. of returns between {stats.samples} recorded prices).")
+        if intent == "high_low":
+            return (f"{coin.coin} ({coin.symbol}) over {period}: high {_money(stats.high, quote)}, "
+                    f"low {_money(stats.low, quote)}.")
+        direction = "up" if stats.change > 0 else "down" if stats.change < 0 else "flat"
+        return (f"{coin.coin} ({coin.symbol}) is {direction} {abs(stats.change_pct):.2f}% over {period}: "
+                f"{_money(stats.first, quote)} -> {_money(stats.last, quote)}.")
+
+    def _history_window(self, q: str) -> float:
+        match = HISTORY_WINDOW_RE.search(q)
+        if match:
+            count, unit = (match.group(1), match.group(2)) if match.group(2) else (match.group(3), match.group(4))
+            return int(count or 1) * WINDOW_UNITS[unit.lower()]
+        if "week" in q:
+            return WINDOW_UNITS["week"]
+        return DEFAULT_HISTORY_WINDOW
+
+    def _reject_response(self, reason: str, kind: str = "other") -> AgentResponse:
+        # `kind` is the short label counted in cryptoagent_rejections_total
+        metrics.REJECTIONS.inc(reason=kind)
         return AgentResponse(
             answer=reason,
             source="N/A",
             confidence=0.0
         )
+
+
+def _duration(seconds: float) -> str:
+    # 3600 -> "1 hour", 5400 -> "1.5 hours", 90 -> "1.5 minutes"
+    for unit, size in (("week", 604800), ("day", 86400), ("hour", 3600), ("minute", 60)):
+        if seconds >= size:
+            value = round(seconds / size, 1)
+            break
+    else:
+        unit, value = "second", round(seconds)
+    value = int(value) if value == int(value) else value
+    return f"{value} {unit}{'' if value == 1 else 's'}"
+
+
+def _format_price(price: float) -> str:
+    return f"{price:,.2f}" if abs(price) >= 1 else f"{price:.6g}"
+
+
+def _money(usd: float, quote: Optional[Quote]) -> str:
+    # History in other currencies uses today's rate; percentages are unaffected
+    if quote is None:
+        return f"${_format_price(usd)}"
+    value = _format_price(usd * quote.per_usd)
+    return f"{quote.unit}{value}" if quote.is_fiat else f"{value} {quote.code}"
@@ -0,0 +1,90 @@
+import re
+from typing import Any, Dict, List, Optional
+
+_TOKEN_RE = re.compile(r"[A-Za-z0-9]+")
+# Terminal marker inside a trie node; can't collide with a token
+_END = ""
+
+# Ordinary words that are also tickers or one-word coin names (Thena THE,
+# Magic Eden ME, JUST, Core, Gas, Story). They only match when typed in
+# uppercase ("price of ME").
+STOP_WORDS = frozenset("""
+    a about all an and any are as at be been but buy by can coin core cost did do does for from gas get
+    give go has have how i if in is it its just me more much my new no not now of on one or our out over
+    price sell so story tell than that the their them then there this to up us value was we what when
+    where which who why will with worth you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+class EntityTrie:
+    """
+    Token trie over coin names, symbols and aliases ("bitcoin cash" is the
+    path bitcoin -> cash). `find` walks the query once from each token, so the
+    cost depends on the query length and the longest name, not on how many
+    coins the KB holds.
+
+    Matches are ranked: multi-word or capitalised names/aliases and
+    uppercase-typed symbols first, then lowercase one-word names, then
+    lowercase symbols; within a rank longer phrases beat shorter ones, then
+    the leftmost wins. One-word matches that are stop-words are skipped
+    unless typed in uppercase.
+    """
+
+    def __init__(self):
+        self._root: Dict[str, dict] = {}
+        self._size = 0
+
+    def add(self, phrase: str, key: Any, is_name: bool = True):
+        """
+        Register `phrase`; `find` returns `key` when it matches. The first key
+        registered for a phrase wins, like the KB index, except that a name
+        replaces a symbol: "bitcoin" means Bitcoin, not a coin with that ticker.
+        """
+        tokens = tokenize(phrase)
+        if not tokens:
+            return
+        node = self._root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        entry = node.get(_END)
+        if entry is None:
+            node[_END] = (key, is_name)
+            self._size += 1
+        elif is_name and not entry[1]:
+            node[_END] = (key, True)
+
+    def find(self, text: str) -> Optional[Any]:
+        words = _TOKEN_RE.findall(text)
+        tokens = [word.lower() for word in words]
+        best = None  # ((strength, length, -start), key)
+        for start in range(len(tokens)):
+            node = self._root
+            for end in range(start, len(tokens)):
+                node = node.get(tokens[end])
+                if node is None:
+                    break
+                entry = node.get(_END)
+                if entry is None:
+                    continue
+                key, is_name = entry
+                length = end - start + 1
+                word = words[start]
+                typed_upper = length == 1 and len(word) > 1 and word.isupper()
+                if length == 1 and tokens[start] in STOP_WORDS and not typed_upper:
+                    continue
+                if is_name:
+                    # "ETH" beats "gas" in "how much gas does an ETH transfer cost"
+                    strength = 1 if length == 1 and word.islower() else 2
+                else:
+                    strength = 2 if typed_upper else 0
+                rank = (strength, length, -start)
+                if best is None or rank > best[0]:
+                    best = (rank, key)
+        return best[1] if best else None
+
+    def __len__(self) -> int:
+        return self._size
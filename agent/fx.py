@@ -0,0 +1,125 @@
+import json
+import os
+import time
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+from .refresher import PeriodicRefresh
+
+# Fiat (and metal) codes CoinGecko /exchange_rates quotes. Recognised in
+# queries even before the first rate refresh, so "in EUR" never silently
+# falls back to a USD answer.
+FIAT_CODES = {
+    "USD", "AED", "ARS", "AUD", "BDT", "BHD", "BMD", "BRL", "CAD", "CHF", "CLP", "CNY", "CZK", "DKK", "EUR",
+    "GBP", "GEL", "HKD", "HUF", "IDR", "ILS", "INR", "JPY", "KRW", "KWD", "LKR", "MMK", "MXN", "MYR", "NGN",
+    "NOK", "NZD", "PHP", "PKR", "PLN", "RUB", "SAR", "SEK", "SGD", "THB", "TRY", "TWD", "UAH", "VEF", "VND",
+    "ZAR", "XDR", "XAG", "XAU",
+}
+# Currency words people type instead of codes
+CURRENCY_ALIASES = {
+    "DOLLAR": "USD", "DOLLARS": "USD", "EURO": "EUR", "EUROS": "EUR", "POUND": "GBP", "POUNDS": "GBP",
+    "STERLING": "GBP", "YEN": "JPY", "YUAN": "CNY", "RENMINBI": "CNY", "RUPEE": "INR", "RUPEES": "INR",
+    "WON": "KRW", "FRANC": "CHF", "FRANCS": "CHF", "RUBLE": "RUB", "RUBLES": "RUB", "ROUBLE": "RUB",
+    "ROUBLES": "RUB", "REAL": "BRL", "REAIS": "BRL", "LIRA": "TRY", "GOLD": "XAU", "SILVER": "XAG",
+    "SATOSHI": "SATS", "SATOSHIS": "SATS",
+}
+# Everything that is a currency rather than a coin symbol
+CURRENCY_CODES = FIAT_CODES | set(CURRENCY_ALIASES.values())
+
+
+class Quote(NamedTuple):
+    code: str
+    unit: str  # "€", "CA$", "BTC"
+    per_usd: float  # units of this currency per 1 USD
+    is_fiat: bool
+
+
+class FxRates:
+    """
+    USD -> currency conversion table, held in memory so answers in any quote
+    currency are converted from the cached USD price without an upstream call.
+
+    Built from CoinGecko /exchange_rates (fiat, metals and the major coins,
+    all quoted per 1 BTC), refreshed every `refresh_interval` seconds by a
+    background thread and persisted to `path` for fast startup. Rates older
+    than `max_age` are not used.
+    """
+
+    def __init__(self, path: Optional[str] = None, refresh_interval: float = 3600.0, max_age: float = 86400.0):
+        self.path = path
+        self.max_age = max_age
+        # {"EUR": {"unit": "€", "per_usd": 0.92, "type": "fiat"}, ...}
+        self._rates: Dict[str, Dict[str, Any]] = {}
+        self._updated = 0.0
+        # Failed refreshes are retried after a minute
+        self._refresher = PeriodicRefresh("fx-rates", lambda: time.time() - self._updated, refresh_interval, 60.0)
+        if path and os.path.exists(path):
+            self._load(path)
+
+    def _load(self, path: str):
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            self._rates, self._updated = data["rates"], data["updated"]
+        except Exception as e:
+            print(f"Error loading FX rates: {e}")
+
+    def _save(self):
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({"updated": self._updated, "rates": self._rates}, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error saving FX rates: {e}")
+
+    def update(self, btc_rates: Dict[str, Dict[str, Any]]):
+        """
+        Replace the table from /exchange_rates "rates" ({code: {"unit", "value", "type"}},
+        values per 1 BTC).
+        """
+        usd = btc_rates.get("usd", {}).get("value")
+        if not usd:
+            raise ValueError("exchange rates have no USD rate")
+        rates = {
+            code.upper(): {"unit": item.get("unit") or code.upper(), "per_usd": item["value"] / usd,
+                           "type": item.get("type", "fiat")}
+            for code, item in btc_rates.items() if item.get("value")
+        }
+        # One assignment: readers see the old table or the new one
+        self._rates, self._updated = rates, time.time()
+        if self.path:
+            self._save()
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() - self._updated <= self.max_age
+
+    def code_for(self, word: str) -> Optional[str]:
+        """
+        "eur" / "euros" -> "EUR"; None if `word` isn't a currency this table knows.
+        """
+        code = word.upper()
+        code = CURRENCY_ALIASES.get(code, code)
+        return code if code in CURRENCY_CODES or code in self._rates else None
+
+    def quote(self, code: str) -> Optional[Quote]:
+        code = code.upper()
+        if code == "USD":
+            return Quote("USD", "$", 1.0, True)
+        rate = self._rates.get(code)
+        if rate is None or not self.is_fresh:
+            return None
+        return Quote(code, rate["unit"], rate["per_usd"], rate["type"] == "fiat")
+
+    def start(self, fetch_rates: Callable[[], Optional[Dict[str, Dict[str, Any]]]]):
+        self._refresher.start(lambda: self._refresh(fetch_rates))
+
+    def stop(self):
+        self._refresher.stop()
+
+    def _refresh(self, fetch_rates: Callable[[], Optional[Dict[str, Dict[str, Any]]]]) -> bool:
+        rates = fetch_rates()
+        if not rates:
+            return False
+        self.update(rates)
+        return True
@@ -1,73 +1,275 @@
-import json
-import os
-from typing import Optional, List
+import threading
+from typing import Callable, Iterable, Optional, List, Dict, Tuple
 from .models import CoinData
+from .storage import StorageBackend, open_storage
+from .entity_extractor import EntityTrie
+from . import metrics
+
+# Alternative tickers/names users type for well-known coins (alias -> symbol)
+DEFAULT_ALIASES: Dict[str, str] = {
+    "xbt": "BTC",
+    "ether": "ETH",
+    "tron": "TRX",
+    "ripple": "XRP",
+    "polygon": "MATIC",
+    "doge": "DOGE",
+}
 
 class KnowledgeBase:
-    def __init__(self, data_path: str = "data/kb.json"):
+    def __init__(self, data_path: str = "data/kb.json", aliases: Optional[Dict[str, str]] = None,
+                 storage: Optional[StorageBackend] = None):
         self.data_path = data_path
+        # JSON file by default; a .db/.sqlite path selects the SQLite backend
+        self._storage = storage or open_storage(data_path)
         self._data: List[CoinData] = []
+        # Lowercased symbol -> coin and name -> coin, so lookups don't scan _data.
+        # Kept apart so a coin's symbol is never shadowed by another coin's name
+        self._symbols: Dict[str, CoinData] = {}
+        self._names: Dict[str, CoinData] = {}
+        self._aliases: Dict[str, str] = {}
+        # Names/symbols/aliases as token paths, for finding coins inside a query
+        self._trie = EntityTrie()
+        # Request threads, the background refresher and _sync all write. Lookups
+        # don't lock: they are single dict reads
+        self._write_lock = threading.Lock()
+        # Streamed prices applied in memory but not yet persisted (SYMBOL -> coin)
+        self._dirty: Dict[str, CoinData] = {}
+        # Called with the coins whose price changed (e.g. the SSE broadcaster)
+        self._listeners: List[Callable[[List[CoinData]], None]] = []
+        self._watch_stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        for alias, symbol in (DEFAULT_ALIASES if aliases is None else aliases).items():
+            self.add_alias(alias, symbol)
         self._load_kb()
 
     def _load_kb(self):
-        if not os.path.exists(self.data_path):
-            self._data = []
-            return
+        self._data = self._storage.load()
+        self._rebuild_index()
 
-        try:
-            with open(self.data_path, 'r') as f:
-                raw_data = json.load(f)
-                self._data = [CoinData(**item) for item in raw_data]
-        except Exception as e:
-            print(f"Error loading KB: {e}")
-            self._data = []
+    def _rebuild_index(self):
+        # Built aside and swapped in: lookups don't lock, so they must never see
+        # a half-built index
+        symbols: Dict[str, CoinData] = {}
+        names: Dict[str, CoinData] = {}
+        trie = EntityTrie()
+        for coin in self._data:
+            self._index_coin(coin, symbols, names, trie)
+        self._symbols, self._names, self._trie = symbols, names, trie
+
+    def _index_coin(self, coin: CoinData, symbols: Optional[Dict[str, CoinData]] = None,
+                    names: Optional[Dict[str, CoinData]] = None, trie: Optional[EntityTrie] = None):
+        symbols = self._symbols if symbols is None else symbols
+        names = self._names if names is None else names
+        trie = self._trie if trie is None else trie
+        symbol_key = coin.symbol.lower().strip()
+        name_key = coin.coin.lower().strip()
+        # setdefault keeps the first coin for a key, same as the old linear scan
+        symbols.setdefault(symbol_key, coin)
+        names.setdefault(name_key, coin)
+        # The trie maps phrases straight to coins: "bitcoin" the name must not
+        # resolve to a coin whose symbol is BITCOIN
+        trie.add(symbol_key, symbols[symbol_key], is_name=False)
+        trie.add(name_key, names[name_key])
+        for alias, target in self._aliases.items():
+            if target == symbol_key:
+                trie.add(alias, symbols[symbol_key])
 
     def save_kb(self):
-        try:
-            # Convert objects back to dicts
-            raw_data = [
-                {
-                    "coin": item.coin,
-                    "symbol": item.symbol,
-                    "launch_year": item.launch_year,
-                    "consensus": item.consensus,
-                    "last_price": item.last_price,
-                    "price_timestamp": item.price_timestamp
-                }
-                for item in self._data
-            ]
-            
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(self.data_path), exist_ok=True)
-            
-            with open(self.data_path, 'w') as f:
-                json.dump(raw_data, f, indent=4)
-        except Exception as e:
-            print(f"Error saving KB: {e}")
+        with self._write_lock:
+            self._save()
+
+    def _save(self, changed: Optional[List[CoinData]] = None):
+        # Caller holds _write_lock. Any write also persists pending streamed prices.
+        if changed is not None and self._dirty:
+            changed = list({**self._dirty, **{c.symbol.upper(): c for c in changed}}.values())
+        self._dirty.clear()
+        with metrics.KB_SAVE_SECONDS.time():
+            self._storage.save(self._data, changed=changed)
+
+    def checkpoint(self):
+        """
+        Persist pending streamed prices and let the backend write its startup
+        snapshot. Call once at shutdown.
+        """
+        with self._write_lock:
+            if self._dirty:
+                self._save(changed=list(self._dirty.values()))
+            self._storage.checkpoint(self._data)
+
+    def add_listener(self, listener: Callable[[List[CoinData]], None]):
+        self._listeners.append(listener)
+
+    def _notify(self, coins: List[CoinData]):
+        for listener in self._listeners:
+            try:
+                listener(coins)
+            except Exception as e:
+                print(f"KB listener error: {e}")
+
+    def _sync(self):
+        """
+        Apply records other workers wrote to a shared backend (SQLite).
+        Must not be called with _write_lock held.
+        """
+        changes = self._storage.changes()
+        if not changes:
+            return
+        changed = []
+        with self._write_lock:
+            renamed = False
+            for coin in changes:
+                existing = self._symbols.get(coin.symbol.lower().strip())
+                if existing:
+                    if existing.coin != coin.coin or existing.symbol != coin.symbol:
+                        # The old name is still indexed (and in the trie); reindex below
+                        existing.coin = coin.coin
+                        existing.symbol = coin.symbol
+                        renamed = True
+                    # Batches are fetched outside the lock; never go back to an older price
+                    if existing.price_ts is None or (coin.price_ts or 0) >= existing.price_ts:
+                        if existing.last_price != coin.last_price or existing.price_ts != coin.price_ts:
+                            changed.append(existing)
+                        existing.last_price = coin.last_price
+                        existing.price_ts = coin.price_ts
+                    existing.consensus = coin.consensus
+                    existing.launch_year = coin.launch_year
+                else:
+                    self._data.append(coin)
+                    self._index_coin(coin)
+                    changed.append(coin)
+            if renamed:
+                self._rebuild_index()
+        # Prices other workers fetched reach SSE clients and history too
+        if changed:
+            self._notify(changed)
+
+    def watch_changes(self, interval: float = 1.0):
+        """
+        Pick up other workers' writes every `interval` seconds even when this
+        worker isn't serving lookups, so listeners (SSE, history) see them.
+        """
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._watch_stop.clear()
+
+        def run():
+            while not self._watch_stop.wait(interval):
+                try:
+                    self._sync()
+                except Exception as e:
+                    print(f"KB sync error: {e}")
+        self._watcher = threading.Thread(target=run, name="kb-sync", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._watch_stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def add_alias(self, alias: str, symbol: str):
+        """
+        Register an extra lookup key (e.g. "xbt") for a coin symbol.
+        """
+        alias, symbol = alias.lower().strip(), symbol.lower().strip()
+        self._aliases[alias] = symbol
+        if symbol in self._symbols:
+            self._trie.add(alias, self._symbols[symbol])
 
     def get_coin(self, query: str) -> Optional[CoinData]:
         """
-        Search for a coin by symbol or name (case-insensitive).
+        Search for a coin by symbol, then name, then alias (case-insensitive).
         """
+        self._sync()
+        return self._lookup(query)
+
+    def _lookup(self, query: str) -> Optional[CoinData]:
+        # get_coin without picking up other workers' writes
         query = query.lower().strip()
-        for coin in self._data:
-            if coin.symbol.lower() == query or coin.coin.lower() == query:
-                return coin
-        return None
+        coin = self._symbols.get(query) or self._names.get(query)
+        if coin is None and query in self._aliases:
+            coin = self._symbols.get(self._aliases[query])
+        return coin
+
+    def find_in_text(self, text: str) -> Optional[CoinData]:
+        """
+        Best coin name/symbol/alias mentioned in free text (e.g. "price of
+        bitcoin cash today" -> Bitcoin Cash); see EntityTrie for the ranking.
+        """
+        self._sync()
+        return self._trie.find(text)
 
     def update_coin(self, coin_data: CoinData):
         """
         Update existing coin or add new one.
         """
-        existing = self.get_coin(coin_data.symbol)
+        # Pick up a coin another worker created first, so it isn't added twice
+        self._sync()
+        with self._write_lock:
+            target = self._apply(coin_data)
+            self._save(changed=[target])
+        self._notify([target])
+
+    def update_coins(self, coins: List[CoinData]):
+        """
+        Update/add several coins with a single storage write.
+        """
+        if not coins:
+            return
+        self._sync()
+        with self._write_lock:
+            changed = [self._apply(coin_data) for coin_data in coins]
+            self._save(changed=changed)
+        self._notify(changed)
+
+    def apply_prices(self, ticks: Iterable[Tuple[str, float, float]]) -> List[CoinData]:
+        """
+        Apply streamed (symbol, price, epoch ts) ticks to coins already in the KB,
+        in memory only; flush() persists them. Unknown symbols and ticks older
+        than the stored price are ignored. Returns the coins whose price changed.
+        """
+        changed = []
+        with self._write_lock:
+            for symbol, price, ts in ticks:
+                coin = self._symbols.get(symbol.lower())
+                if coin is None:
+                    continue
+                if coin.price_ts is not None and ts <= coin.price_ts:
+                    continue
+                if coin.last_price != price:
+                    changed.append(coin)
+                coin.last_price = price
+                coin.price_ts = ts
+                self._dirty[coin.symbol.upper()] = coin
+        if changed:
+            self._notify(changed)
+        return changed
+
+    def flush(self) -> int:
+        """
+        Persist prices applied by apply_prices since the last write.
+        """
+        with self._write_lock:
+            if not self._dirty:
+                return 0
+            count = len(self._dirty)
+            self._save(changed=list(self._dirty.values()))
+        return count
+
+    def _apply(self, coin_data: CoinData) -> CoinData:
+        # Caller holds _write_lock. Same coin only if the symbol matches; a new
+        # coin whose symbol is another coin's name (BITCOIN) must not overwrite it
+        existing = self._symbols.get(coin_data.symbol.lower().strip())
         if existing:
+            target = existing
             # Update fields
             existing.last_price = coin_data.last_price
-            existing.price_timestamp = coin_data.price_timestamp
+            existing.price_ts = coin_data.price_ts
             # Update other static fields if needed, but usually static facts don't change often
             existing.consensus = coin_data.consensus
             existing.launch_year = coin_data.launch_year
         else:
+            target = coin_data
             self._data.append(coin_data)
-        
-        self.save_kb()
+            self._index_coin(coin_data)
+        return target
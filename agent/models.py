@@ -1,14 +1,80 @@
+import calendar
+import time
 from dataclasses import dataclass
-from typing import Optional
+from typing import Optional, Union
+
+ISO_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def iso_to_epoch(value: str) -> Optional[float]:
+    """
+    Parse our "2026-01-17T10:55:09Z" timestamps as UTC epoch seconds.
+    """
+    try:
+        if len(value) == 20 and value[10] == "T" and value[19] == "Z":
+            # Fast path for the fixed-width format we write ourselves
+            return float(calendar.timegm((
+                int(value[0:4]), int(value[5:7]), int(value[8:10]),
+                int(value[11:13]), int(value[14:16]), int(value[17:19]), 0, 0, 0
+            )))
+        return float(calendar.timegm(time.strptime(value, ISO_FORMAT)))
+    except (TypeError, ValueError):
+        return None
+
+
+def epoch_to_iso(ts: float) -> str:
+    return time.strftime(ISO_FORMAT, time.gmtime(ts))
+
 
-@dataclass
 class CoinData:
-    coin: str
-    symbol: str
-    launch_year: int
-    consensus: str
-    last_price: Optional[float] = None
-    price_timestamp: Optional[str] = None
+    """
+    One coin record. Slotted to keep 10k+ records small; the price time is kept
+    as UTC epoch seconds (`price_ts`) and only formatted as ISO-8601 on output
+    (`price_timestamp`, `to_dict`).
+    """
+    __slots__ = ("coin", "symbol", "launch_year", "consensus", "last_price", "price_ts")
+
+    def __init__(self, coin: str, symbol: str, launch_year: int, consensus: str,
+                 last_price: Optional[float] = None, price_timestamp: Union[str, float, None] = None,
+                 price_ts: Optional[float] = None):
+        self.coin = coin
+        self.symbol = symbol
+        self.launch_year = launch_year
+        self.consensus = consensus
+        self.last_price = last_price
+        self.price_ts = price_ts
+        if price_ts is None and price_timestamp is not None:
+            self.price_timestamp = price_timestamp
+
+    @property
+    def price_timestamp(self) -> Optional[str]:
+        return epoch_to_iso(self.price_ts) if self.price_ts is not None else None
+
+    @price_timestamp.setter
+    def price_timestamp(self, value: Union[str, float, None]):
+        if value is None or isinstance(value, (int, float)):
+            self.price_ts = value
+        else:
+            self.price_ts = iso_to_epoch(value)
+
+    def to_dict(self) -> dict:
+        return {
+            "coin": self.coin,
+            "symbol": self.symbol,
+            "launch_year": self.launch_year,
+            "consensus": self.consensus,
+            "last_price": self.last_price,
+            "price_timestamp": self.price_timestamp
+        }
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, CoinData):
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in self.__slots__)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{f}={getattr(self, f)!r}" for f in self.__slots__)
+        return f"CoinData({fields})"
 
 @dataclass
 class AgentResponse:
@@ -0,0 +1,236 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+from .models import CoinData
+
+
+class PriceRing:
+    """
+    Bounded ring of (timestamp, price) samples for one coin. Updates within
+    the same `resolution`-second bucket overwrite the newest sample, so the
+    ring spans at most capacity * resolution seconds. The two float64 arrays
+    start at INITIAL_SIZE samples and double as samples arrive, so a coin seen
+    a few times costs a few hundred bytes; once `capacity` is reached the
+    ring wraps and its memory never grows.
+    """
+
+    __slots__ = ("ts", "price", "head", "count", "capacity", "resolution")
+
+    INITIAL_SIZE = 16
+
+    def __init__(self, capacity: int, resolution: float):
+        size = min(capacity, self.INITIAL_SIZE)
+        self.ts = np.zeros(size, dtype=np.float64)
+        self.price = np.zeros(size, dtype=np.float64)
+        self.head = 0  # next write position; == len(ts) means grow first
+        self.count = 0
+        self.capacity = capacity
+        self.resolution = resolution
+
+    def _grow(self, size: int):
+        # Only before the first wrap, so the samples are ts[:count] in order
+        size = min(self.capacity, size)
+        ts = np.zeros(size, dtype=np.float64)
+        price = np.zeros(size, dtype=np.float64)
+        ts[:self.count] = self.ts[:self.count]
+        price[:self.count] = self.price[:self.count]
+        self.ts, self.price = ts, price
+
+    def append(self, ts: float, price: float):
+        if self.count:
+            last = (self.head - 1) % len(self.ts)
+            if ts < self.ts[last]:
+                return  # out of order
+            if ts // self.resolution == self.ts[last] // self.resolution:
+                self.ts[last] = ts
+                self.price[last] = price
+                return
+        if self.head == len(self.ts):
+            self._grow(2 * len(self.ts))
+        self.ts[self.head] = ts
+        self.price[self.head] = price
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Copies of the samples in chronological order.
+        """
+        if self.count < self.capacity:
+            return self.ts[:self.count].copy(), self.price[:self.count].copy()
+        order = np.r_[self.head:self.capacity, 0:self.head]
+        return self.ts[order], self.price[order]
+
+    def load(self, ts: np.ndarray, price: np.ndarray):
+        """
+        Replace contents with chronological samples (keeps the newest `capacity`).
+        """
+        ts, price = ts[-self.capacity:], price[-self.capacity:]
+        n = len(ts)
+        self.count = 0
+        self._grow(max(n, self.INITIAL_SIZE))
+        self.ts[:n] = ts
+        self.price[:n] = price
+        self.count = n
+        self.head = n % self.capacity
+
+
+class WindowStats:
+    __slots__ = ("start_ts", "end_ts", "first", "last", "high", "low", "change", "change_pct",
+                 "volatility", "samples")
+
+    def __init__(self, ts: np.ndarray, prices: np.ndarray):
+        self.start_ts = float(ts[0])
+        self.end_ts = float(ts[-1])
+        self.first = float(prices[0])
+        self.last = float(prices[-1])
+        self.high = float(prices.max())
+        self.low = float(prices.min())
+        self.change = self.last - self.first
+        self.change_pct = self.change / self.first * 100 if self.first else 0.0
+        # Standard deviation of log returns between consecutive samples, in %
+        returns = np.diff(np.log(prices[prices > 0]))
+        self.volatility = float(returns.std(ddof=1) * 100) if len(returns) > 1 else 0.0
+        self.samples = len(prices)
+
+
+class PriceHistory:
+    """
+    Price history per coin symbol, fed from KB price updates (register
+    `record_coins` as a KB listener) and queried over time windows. At most
+    `max_coins` coins are kept; the one updated least recently is dropped.
+
+    Persisted to one .npz file next to the KB by a background thread (start())
+    at most every `save_interval` seconds, and on save(). Only filled samples
+    are written: all coins' samples concatenated, plus per-coin offsets. With
+    several workers each keeps its own history; the last one to save wins.
+    """
+
+    def __init__(self, path: Optional[str] = None, capacity: int = 1440, resolution: float = 60.0,
+                 save_interval: float = 60.0, max_coins: int = 5000):
+        self.path = path
+        self.capacity = capacity
+        self.resolution = resolution
+        self.save_interval = save_interval
+        self.max_coins = max_coins
+        # Least recently updated first
+        self._rings: "OrderedDict[str, PriceRing]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if path and os.path.exists(path):
+            self._load(path)
+
+    def record(self, symbol: str, ts: float, price: float):
+        symbol = symbol.upper()
+        with self._lock:
+            ring = self._rings.get(symbol)
+            if ring is None:
+                ring = self._rings[symbol] = PriceRing(self.capacity, self.resolution)
+                self._evict()
+            else:
+                self._rings.move_to_end(symbol)
+            ring.append(ts, price)
+            self._dirty = True
+
+    def _evict(self):
+        # Caller holds _lock
+        while len(self._rings) > self.max_coins:
+            self._rings.popitem(last=False)
+
+    def record_coins(self, coins: Iterable[CoinData]):
+        # KB listener: runs on the writing thread (often a request), so no disk I/O here
+        for coin in coins:
+            if coin.last_price is not None and coin.price_ts is not None:
+                self.record(coin.symbol, coin.price_ts, coin.last_price)
+
+    def start(self):
+        """
+        Save every `save_interval` seconds (when changed) from a background thread.
+        """
+        if not self.path or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="price-history", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.save()
+
+    def _run(self):
+        while not self._stop.wait(self.save_interval):
+            self.save()
+
+    def window(self, symbol: str, seconds: float, now: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (timestamps, prices) recorded in the last `seconds`, oldest first.
+        """
+        with self._lock:
+            ring = self._rings.get(symbol.upper())
+            if ring is None:
+                return np.empty(0), np.empty(0)
+            ts, prices = ring.arrays()
+        since = (now if now is not None else time.time()) - seconds
+        start = int(np.searchsorted(ts, since, side="left"))
+        return ts[start:], prices[start:]
+
+    def stats(self, symbol: str, seconds: float, now: Optional[float] = None) -> Optional[WindowStats]:
+        """
+        Change, high/low and volatility over the window; None with fewer than 2 samples.
+        """
+        ts, prices = self.window(symbol, seconds, now)
+        if len(prices) < 2:
+            return None
+        return WindowStats(ts, prices)
+
+    def __len__(self) -> int:
+        return len(self._rings)
+
+    def save(self, path: Optional[str] = None):
+        path = path or self.path
+        if not path:
+            return
+        with self._lock:
+            if not self._dirty and path == self.path:
+                return
+            symbols = list(self._rings)
+            samples = [self._rings[symbol].arrays() for symbol in symbols]
+            self._dirty = False
+
+        # Coin i's samples are ts[offsets[i]:offsets[i + 1]], chronological
+        offsets = np.zeros(len(symbols) + 1, dtype=np.int64)
+        np.cumsum([len(t) for t, _ in samples], out=offsets[1:])
+        ts = np.concatenate([t for t, _ in samples]) if samples else np.empty(0)
+        prices = np.concatenate([p for _, p in samples]) if samples else np.empty(0)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                np.savez(f, symbols=np.array(symbols, dtype=str), offsets=offsets, ts=ts, prices=prices,
+                         resolution=np.array(self.resolution))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error saving price history: {e}")
+
+    def _load(self, path: str):
+        try:
+            with np.load(path) as data:
+                symbols, offsets, ts, prices = data["symbols"], data["offsets"], data["ts"], data["prices"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error loading price history: {e}")
+            return
+        for i, symbol in enumerate(symbols):
+            start, end = offsets[i], offsets[i + 1]
+            ring = self._rings[str(symbol)] = PriceRing(self.capacity, self.resolution)
+            ring.load(ts[start:end], prices[start:end])
+        # Saved least recently updated first, so this keeps the newest
+        self._evict()
@@ -0,0 +1,269 @@
+import asyncio
+import json
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from .models import CoinData
+from . import metrics
+
+# Streaming price ingestion (ticker stream -> KB, in memory) and fan-out of
+# price changes to Server-Sent Events subscribers.
+#
+# A "source" is a callable that connects and returns an iterator of raw
+# messages. It should yield None every second or so while idle, so the
+# ingestor can flush and notice stop() without waiting for the next tick.
+
+BINANCE_STREAM_URL = "wss://stream.binance.com:9443/ws/!miniTicker@arr"
+
+# (SYMBOL, price, epoch seconds)
+Tick = Tuple[str, float, float]
+TickerSource = Callable[[], Iterable[Optional[str]]]
+
+STREAM_TICKS = metrics.counter("cryptoagent_stream_ticks",
+                               "Streamed ticks that changed a KB price, or were skipped (unknown coin, old, same price).",
+                               ["result"])
+CHANGED_TICKS = STREAM_TICKS.labels(result="changed")
+SKIPPED_TICKS = STREAM_TICKS.labels(result="skipped")
+
+
+def parse_binance_tickers(message: str, quote: str = "USDT") -> List[Tick]:
+    """
+    Binance miniTicker payload (one object or the !miniTicker@arr array) ->
+    ticks for `quote` pairs, e.g. BTCUSDT close "95000.1" -> ("BTC", 95000.1, ts).
+    """
+    data = json.loads(message)
+    items = data if isinstance(data, list) else [data]
+    ticks = []
+    for item in items:
+        pair = item.get("s", "")
+        if not pair.endswith(quote) or "c" not in item:
+            continue
+        ts = item["E"] / 1000.0 if "E" in item else time.time()
+        ticks.append((pair[:-len(quote)], float(item["c"]), ts))
+    return ticks
+
+
+def binance_ticker_source(url: str = BINANCE_STREAM_URL, idle_timeout: float = 1.0) -> TickerSource:
+    """
+    All-market mini ticker stream from Binance (one array per second).
+    Needs the `websockets` package.
+    """
+    from websockets.sync.client import connect
+
+    def messages() -> Iterator[Optional[str]]:
+        with connect(url) as ws:
+            while True:
+                try:
+                    yield ws.recv(timeout=idle_timeout)
+                except TimeoutError:
+                    yield None
+    return messages
+
+
+class LocalTickerPublisher:
+    """
+    In-process stand-in for the Binance ticker stream (tests, demos, benchmarks):
+
+        publisher = LocalTickerPublisher()
+        agent.start_price_stream(publisher.source)
+        publisher.publish({"BTC": 95000.0})
+    """
+
+    def __init__(self, quote: str = "USDT", idle_timeout: float = 1.0):
+        self.quote = quote
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._queues: List["queue.Queue[str]"] = []
+
+    def publish(self, prices: Dict[str, float], ts: Optional[float] = None):
+        event_ms = int((ts if ts is not None else time.time()) * 1000)
+        message = json.dumps([
+            {"e": "24hrMiniTicker", "E": event_ms, "s": f"{symbol.upper()}{self.quote}", "c": str(price)}
+            for symbol, price in prices.items()
+        ])
+        with self._lock:
+            for q in self._queues:
+                q.put(message)
+
+    def source(self) -> Iterator[Optional[str]]:
+        q: "queue.Queue[str]" = queue.Queue()
+        with self._lock:
+            self._queues.append(q)
+        try:
+            while True:
+                try:
+                    yield q.get(timeout=self.idle_timeout)
+                except queue.Empty:
+                    yield None
+        finally:
+            with self._lock:
+                self._queues.remove(q)
+
+
+class PriceStreamIngestor:
+    """
+    Background thread that reads a ticker source and applies prices to known
+    KB coins in memory. Persistence is throttled: changed coins are written
+    at most once per `flush_interval` seconds (and on stop). The source is
+    reconnected with capped exponential backoff if it fails or ends.
+    """
+
+    def __init__(self, kb, source: TickerSource, parse: Callable[[str], List[Tick]] = parse_binance_tickers,
+                 flush_interval: float = 10.0, max_backoff: float = 30.0):
+        self.kb = kb
+        self.source = source
+        self.parse = parse
+        self.flush_interval = flush_interval
+        self.max_backoff = max_backoff
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_flush = time.monotonic()
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.is_running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="price-stream", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.kb.flush()
+
+    def _run(self):
+        failures = 0
+        while not self._stop.is_set():
+            try:
+                for message in self.source():
+                    if self._stop.is_set():
+                        break
+                    if message is not None:
+                        self.handle(message)
+                        failures = 0
+                    self._maybe_flush()
+            except Exception as e:
+                print(f"Price stream error: {e}")
+            if self._stop.is_set():
+                break
+            failures += 1
+            self._stop.wait(min(self.max_backoff, 2 ** (failures - 1)))
+
+    def handle(self, message: str) -> List[CoinData]:
+        """
+        Apply one raw stream message; returns the coins whose price changed.
+        """
+        try:
+            ticks = self.parse(message)
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"Price stream: bad message ({e})")
+            return []
+        changed = self.kb.apply_prices(ticks)
+        CHANGED_TICKS.inc(len(changed))
+        SKIPPED_TICKS.inc(len(ticks) - len(changed))
+        return changed
+
+    def _maybe_flush(self):
+        now = time.monotonic()
+        if now - self._last_flush >= self.flush_interval:
+            self._last_flush = now
+            self.kb.flush()
+
+
+def price_event(coin: CoinData) -> Dict[str, object]:
+    return {"symbol": coin.symbol.upper(), "coin": coin.coin, "price": coin.last_price, "price_ts": coin.price_ts}
+
+
+class PriceSubscription:
+    """
+    One SSE client. `symbols` is read live on every publish, so passing a
+    session's watch list picks up coins the user asks about later. Updates
+    that arrive while the client is slow are coalesced to the latest price
+    per coin instead of queueing up.
+    """
+
+    def __init__(self, symbols: Iterable[str], loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.symbols = symbols
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Dict[str, object]] = {}
+        self._loop = loop
+        self._event = asyncio.Event() if loop is not None else threading.Event()
+
+    def offer(self, updates: Dict[str, Dict[str, object]]):
+        hits = {}
+        for symbol in list(self.symbols):
+            update = updates.get(symbol.upper())
+            if update is not None:
+                hits[symbol.upper()] = update
+        if not hits:
+            return
+        with self._lock:
+            self._pending.update(hits)
+        if self._loop is None:
+            self._event.set()
+        else:
+            try:
+                self._loop.call_soon_threadsafe(self._event.set)
+            except RuntimeError:
+                pass  # loop already closed
+
+    def _take(self) -> List[Dict[str, object]]:
+        # Clear first: an update landing in between is taken now and leaves the
+        # event set, so the next wait just returns an empty list
+        self._event.clear()
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return list(pending.values())
+
+    def get(self, timeout: float) -> List[Dict[str, object]]:
+        """
+        Block until updates arrive (or `timeout`); [] on timeout.
+        """
+        return self._take() if self._event.wait(timeout) else []
+
+    async def aget(self, timeout: float) -> List[Dict[str, object]]:
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        return self._take()
+
+
+class PriceBroadcaster:
+    """
+    Fans KB price changes out to subscriptions. Registered as a KB listener,
+    so streamed ticks, background refreshes and API fetches all reach clients.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions: List[PriceSubscription] = []
+
+    def subscribe(self, symbols: Iterable[str], loop: Optional[asyncio.AbstractEventLoop] = None) -> PriceSubscription:
+        subscription = PriceSubscription(symbols, loop)
+        with self._lock:
+            self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: PriceSubscription):
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+    def publish(self, coins: List[CoinData]):
+        subscriptions = self._subscriptions
+        if not subscriptions:
+            return
+        updates = {coin.symbol.upper(): price_event(coin) for coin in coins}
+        for subscription in list(subscriptions):
+            subscription.offer(updates)
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
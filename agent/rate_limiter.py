@@ -0,0 +1,135 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+class RateLimited(Exception):
+    """
+    A provider has no request budget left (within the allowed wait).
+    Not a provider failure: callers move on to the next provider.
+    """
+
+    def __init__(self, provider: str, retry_in: float):
+        super().__init__(f"{provider} rate limit reached, next token in {retry_in:.2f}s")
+        self.provider = provider
+        self.retry_in = retry_in
+
+
+class RateLimiter:
+    """
+    Token bucket per provider: `rate_per_minute` tokens refill continuously up
+    to `burst`, and every upstream HTTP request takes one.
+
+    With a `path`, bucket state lives in a small SQLite file (WAL) so the web
+    workers, populate_kb.py and background jobs all draw from the same quota.
+    Without one, buckets are per process.
+    """
+
+    def __init__(self, path: Optional[str] = None, busy_timeout_ms: int = 5000):
+        self.path = path
+        # provider -> (tokens per second, burst); unconfigured providers are unlimited
+        self._quotas: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        # Bucket state without a path: provider -> (tokens, updated)
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # Bucket state is cheap to lose; don't fsync on every request
+            self._conn.execute("PRAGMA synchronous=OFF")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS buckets (
+                    provider TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated REAL NOT NULL
+                )
+            """)
+
+    def configure(self, provider: str, rate_per_minute: Optional[float], burst: Optional[float] = None):
+        """
+        Set a provider's quota; rate_per_minute=None removes the limit.
+        """
+        with self._lock:
+            if rate_per_minute is None:
+                self._quotas.pop(provider, None)
+            else:
+                self._quotas[provider] = (rate_per_minute / 60.0, float(burst or max(1.0, rate_per_minute / 60.0)))
+
+    def _take(self, provider: str, tokens: float, consume: bool) -> float:
+        """
+        Refill, then take `tokens` if there are enough. Returns 0.0 on success,
+        otherwise the seconds until enough tokens will be available.
+        """
+        quota = self._quotas.get(provider)
+        if quota is None:
+            return 0.0
+        rate, burst = quota
+        now = time.time()
+        with self._lock:
+            if self._conn is None:
+                wait, state = self._refill(self._buckets.get(provider), tokens, now, rate, burst)
+                if state and consume:
+                    self._buckets[provider] = state
+                return wait
+            if not consume:
+                row = self._conn.execute("SELECT tokens, updated FROM buckets WHERE provider = ?",
+                                         (provider,)).fetchone()
+                return self._refill(row, tokens, now, rate, burst)[0]
+            # IMMEDIATE: the read-modify-write must not interleave with other processes
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT tokens, updated FROM buckets WHERE provider = ?",
+                                         (provider,)).fetchone()
+                wait, state = self._refill(row, tokens, now, rate, burst)
+                if state:
+                    self._conn.execute("INSERT OR REPLACE INTO buckets (provider, tokens, updated) VALUES (?, ?, ?)",
+                                       (provider, *state))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            return wait
+
+    @staticmethod
+    def _refill(state: Optional[Tuple[float, float]], tokens: float, now: float, rate: float,
+                burst: float) -> Tuple[float, Optional[Tuple[float, float]]]:
+        # -> (seconds to wait, bucket state after taking `tokens`, or None if not enough)
+        current, updated = state if state else (burst, now)
+        current = min(burst, current + max(0.0, now - updated) * rate)
+        if current >= tokens:
+            return 0.0, (current - tokens, now)
+        return (tokens - current) / rate, None
+
+    def try_acquire(self, provider: str, tokens: float = 1.0) -> float:
+        """
+        Take tokens without waiting. Returns 0.0 if taken, else seconds to wait.
+        """
+        return self._take(provider, tokens, consume=True)
+
+    def acquire(self, provider: str, tokens: float = 1.0, max_wait: float = 0.0):
+        """
+        Take tokens, sleeping for up to `max_wait` seconds in total until the
+        bucket has them. Raises RateLimited if that isn't enough.
+        """
+        deadline = time.monotonic() + max_wait
+        while True:
+            wait = self.try_acquire(provider, tokens)
+            if wait == 0.0:
+                return
+            if time.monotonic() + wait > deadline:
+                raise RateLimited(provider, wait)
+            # Other processes may take the refill first, so check again after sleeping
+            time.sleep(wait)
+
+    def has_budget(self, provider: str, tokens: float = 1.0) -> bool:
+        return self._take(provider, tokens, consume=False) == 0.0
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
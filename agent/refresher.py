@@ -0,0 +1,161 @@
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class PriceRefresher:
+    """
+    Background thread that keeps popular coins fresh so chat requests rarely
+    wait on an upstream fetch.
+
+    Popularity is an exponentially decaying query count per symbol. Every
+    `interval` seconds the `top_n` hottest coins that would go stale before the
+    next tick are refreshed in one bulk call, together with any symbols queued
+    by `request_refresh` (stale-while-revalidate answers). A symbol whose score
+    has decayed below `min_score` is no longer hot and is forgotten, so a coin
+    asked about once stops using upstream budget after about one half-life.
+    """
+
+    def __init__(self, refresh_fn: Callable[[List[str]], object], age_fn: Callable[[str], Optional[float]],
+                 interval: float = 30.0, top_n: int = 20, soft_ttl: float = 120.0,
+                 half_life: float = 600.0, max_tracked: int = 5000, min_score: float = 0.5):
+        self.refresh_fn = refresh_fn
+        self.age_fn = age_fn
+        self.interval = interval
+        self.top_n = top_n
+        self.soft_ttl = soft_ttl
+        self.half_life = half_life
+        self.max_tracked = max_tracked
+        self.min_score = min_score
+
+        self._lock = threading.Lock()
+        # symbol -> (score, time the score was last decayed)
+        self._scores: Dict[str, Tuple[float, float]] = {}
+        self._pending: set = set()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.is_running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="price-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _decayed(self, score: float, last: float, now: float) -> float:
+        return score * 0.5 ** ((now - last) / self.half_life)
+
+    def record_query(self, symbol: str):
+        now = time.time()
+        symbol = symbol.upper()
+        with self._lock:
+            score, last = self._scores.get(symbol, (0.0, now))
+            self._scores[symbol] = (self._decayed(score, last, now) + 1.0, now)
+            if len(self._scores) > self.max_tracked:
+                self._prune(now)
+
+    def _prune(self, now: float):
+        # Keep the hottest half; long-tail symbols can earn their way back in
+        ranked = sorted(self._scores.items(), key=lambda kv: self._decayed(kv[1][0], kv[1][1], now), reverse=True)
+        self._scores = dict(ranked[: self.max_tracked // 2])
+
+    def hot_symbols(self, n: Optional[int] = None) -> List[str]:
+        now = time.time()
+        with self._lock:
+            scores = {symbol: self._decayed(score, last, now) for symbol, (score, last) in self._scores.items()}
+            for symbol, score in scores.items():
+                if score < self.min_score:
+                    del self._scores[symbol]
+        ranked = sorted((kv for kv in scores.items() if kv[1] >= self.min_score), key=lambda kv: kv[1], reverse=True)
+        return [symbol for symbol, _ in ranked[: n or self.top_n]]
+
+    def request_refresh(self, symbol: str):
+        """
+        Queue a symbol for the next background refresh and wake the thread.
+        """
+        with self._lock:
+            self._pending.add(symbol.upper())
+        self._wake.set()
+
+    def _due_symbols(self) -> List[str]:
+        with self._lock:
+            due = list(self._pending)
+            self._pending.clear()
+        # Refresh hot coins that would go stale before the next tick
+        horizon = self.soft_ttl - self.interval
+        for symbol in self.hot_symbols():
+            age = self.age_fn(symbol)
+            if symbol not in due and (age is None or age >= horizon):
+                due.append(symbol)
+        return due
+
+    def run_once(self):
+        due = self._due_symbols()
+        if due:
+            self.refresh_fn(due)
+
+    def _run(self):
+        while not self._stop.is_set():
+            # Clear before working so a request queued mid-refresh wakes the next round
+            self._wake.clear()
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Background refresh error: {e}")
+            self._wake.wait(self.interval)
+
+
+class PeriodicRefresh:
+    """
+    Daemon thread that keeps a cached table fresh (FX rates, the known-symbol
+    filter): calls `refresh()` whenever `age_fn()` reaches `interval` seconds.
+    A failed refresh (False or an exception) is retried after
+    `retry_interval`, not a full interval.
+    """
+
+    def __init__(self, name: str, age_fn: Callable[[], float], interval: float, retry_interval: float):
+        self.name = name
+        self.age_fn = age_fn
+        self.interval = interval
+        self.retry_interval = retry_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, refresh: Callable[[], bool]):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(refresh,), name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, refresh: Callable[[], bool]):
+        while not self._stop.is_set():
+            age = self.age_fn()
+            if age >= self.interval:
+                ok = False
+                try:
+                    ok = refresh()
+                except Exception as e:
+                    print(f"{self.name} refresh error: {e}")
+                wait = self.interval if ok else min(self.retry_interval, self.interval)
+            else:
+                wait = self.interval - age
+            self._stop.wait(wait)
@@ -0,0 +1,71 @@
+import threading
+import time
+
+
+class CircuitBreaker:
+    """
+    Skips a provider for `cooldown` seconds after `failure_threshold` consecutive
+    failures. Once the cool-down passes the breaker is half-open: allow() lets
+    one caller through as a probe and refuses the rest; the probe's success
+    closes it and its failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        # When it opened, or when the last half-open probe was let through
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_closed(self) -> bool:
+        return self._failures < self.failure_threshold
+
+    @property
+    def is_open(self) -> bool:
+        """
+        True while calls are refused. Unlike allow(), never claims the probe.
+        """
+        return not self.is_closed and time.monotonic() - self._opened_at < self.cooldown
+
+    def allow(self) -> bool:
+        """
+        True if the caller may make the call; call this right before it and
+        report the outcome with record_success/record_failure (or release).
+        """
+        with self._lock:
+            if self.is_closed:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at < self.cooldown:
+                return False
+            # Half-open: this caller is the probe. Restarting the clock refuses
+            # everyone else until it reports back, or for another cool-down
+            self._opened_at = now
+            self._probing = True
+            return True
+
+    def release(self):
+        """
+        The allowed call ended without telling us anything about the provider
+        (e.g. our own rate limit stopped it): if it was the probe, the next
+        caller may probe at once.
+        """
+        with self._lock:
+            if self._probing:
+                self._probing = False
+                self._opened_at = time.monotonic() - self.cooldown
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
@@ -0,0 +1,97 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+
+class ResolutionCache:
+    """
+    Persistent symbol -> provider id map (CoinGecko id, CoinCap id, Binance pair).
+    Ids almost never change, so a resolved symbol skips the provider's search call.
+
+    Changes are written to `path` by a background thread, so set/invalidate
+    never block a lookup (or the event loop) on disk I/O.
+    """
+
+    def __init__(self, path: str = "data/resolution_cache.json", ttl: float = 7 * 24 * 3600):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # {"BTC": {"coingecko": {"value": {...}, "ts": 1737100000.0}, ...}}
+        self._entries: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._dirty = False
+        self._writer: Optional[threading.Thread] = None
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                self._entries = json.load(f)
+        except Exception as e:
+            print(f"Error loading resolution cache: {e}")
+            self._entries = {}
+
+    def _save(self):
+        # Caller holds _lock; the writer thread picks the change up
+        self._dirty = True
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_pending, name="resolution-cache", daemon=True)
+            self._writer.start()
+
+    def _write_pending(self):
+        while True:
+            with self._lock:
+                if not self._dirty:
+                    self._writer = None
+                    return
+                self._dirty = False
+                data = json.dumps(self._entries)
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                # Write then rename so a crash never leaves a half-written file
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, 'w') as f:
+                    f.write(data)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                print(f"Error saving resolution cache: {e}")
+
+    def flush(self):
+        """
+        Wait until pending changes are on disk (e.g. before shutdown).
+        """
+        writer = self._writer
+        if writer is not None:
+            writer.join()
+
+    def get(self, symbol: str, provider: str) -> Optional[Any]:
+        entry = self._entries.get(symbol.upper(), {}).get(provider)
+        if not entry or time.time() - entry["ts"] > self.ttl:
+            return None
+        return entry["value"]
+
+    def set(self, symbol: str, provider: str, value: Any):
+        with self._lock:
+            current = self._entries.get(symbol.upper(), {}).get(provider)
+            if current and current["value"] == value and time.time() - current["ts"] <= self.ttl:
+                return
+            self._entries.setdefault(symbol.upper(), {})[provider] = {"value": value, "ts": time.time()}
+            self._save()
+
+    def set_many(self, entries: Iterable[Tuple[str, str, Any]]):
+        """
+        Store many (symbol, provider, value) entries with a single file write.
+        """
+        now = time.time()
+        with self._lock:
+            for symbol, provider, value in entries:
+                self._entries.setdefault(symbol.upper(), {})[provider] = {"value": value, "ts": now}
+            self._save()
+
+    def invalidate(self, symbol: str, provider: str):
+        with self._lock:
+            if self._entries.get(symbol.upper(), {}).pop(provider, None) is not None:
+                self._save()
@@ -0,0 +1,47 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+
+class SessionStore:
+    """
+    Per-session state (ConversationMemory) keyed by session id, bounded by an
+    LRU cap and an idle TTL so memory stays flat as the number of users grows.
+    """
+
+    def __init__(self, factory: Callable[[], Any], max_sessions: int = 50000, idle_ttl: float = 1800.0):
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self._lock = threading.Lock()
+        # session id -> [state, last access]; ordered oldest access first
+        self._sessions: "OrderedDict[str, list]" = OrderedDict()
+
+    def get(self, session_id: str) -> Any:
+        """
+        Return the session's state, creating it on first use.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                entry = self._sessions[session_id] = [self.factory(), now]
+                if len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                entry[1] = now
+                self._sessions.move_to_end(session_id)
+            return entry[0]
+
+    def _evict_idle(self, now: float):
+        # LRU order means idle sessions are always at the front
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest[1] <= self.idle_ttl:
+                break
+            self._sessions.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
@@ -0,0 +1,152 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .metrics import Counter
+
+
+class _Roles:
+    # Pre-bound leader/coalesced children of an optional role-labelled counter
+    __slots__ = ("leader", "coalesced")
+
+    def __init__(self, metric: Optional[Counter]):
+        self.leader = metric.labels(role="leader") if metric else None
+        self.coalesced = metric.labels(role="coalesced") if metric else None
+
+    def observe(self, leaders: int, coalesced: int):
+        if self.leader is None:
+            return
+        if leaders:
+            self.leader.inc(leaders)
+        if coalesced:
+            self.coalesced.inc(coalesced)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one execution: the first
+    caller runs `fn`, everyone who arrives while it is in flight waits and gets
+    the same result (or exception). Pass a counter labelled by `role` to also
+    count leader and coalesced calls there (e.g. for /metrics).
+    """
+
+    def __init__(self, metric: Optional[Counter] = None):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._stats = {"calls": 0, "executions": 0, "coalesced": 0}
+        self._roles = _Roles(metric)
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            self._stats["calls"] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                self._stats["coalesced"] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self._stats["executions"] += 1
+                leader = True
+        self._roles.observe(int(leader), int(not leader))
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def do_many(self, keys: List[str], fn: Callable[[List[str]], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        do() for several keys with one execution: `fn` is called once with the
+        keys nobody else has in flight and returns {key: result}; keys already
+        in flight are waited on. Returns {key: result} for every key.
+        """
+        led: Dict[str, _Call] = {}
+        joined: Dict[str, _Call] = {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                self._stats["calls"] += 1
+                call = self._calls.get(key)
+                if call is not None:
+                    self._stats["coalesced"] += 1
+                    joined[key] = call
+                else:
+                    led[key] = self._calls[key] = _Call()
+                    self._stats["executions"] += 1
+        self._roles.observe(len(led), len(joined))
+
+        results: Dict[str, Any] = {}
+        if led:
+            try:
+                found = fn(list(led))
+                for key, call in led.items():
+                    call.result = results[key] = found.get(key)
+            except BaseException as e:
+                for call in led.values():
+                    call.error = e
+                raise
+            finally:
+                with self._lock:
+                    for key in led:
+                        del self._calls[key]
+                for call in led.values():
+                    call.done.set()
+
+        for key, call in joined.items():
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            results[key] = call.result
+        return results
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "in_flight": len(self._calls)}
+
+
+class AsyncSingleFlight:
+    """
+    SingleFlight for coroutines on one event loop: concurrent awaits of the
+    same key share one task.
+    """
+
+    def __init__(self, metric: Optional[Counter] = None):
+        self._tasks: Dict[str, "asyncio.Future"] = {}
+        self._stats = {"calls": 0, "executions": 0, "coalesced": 0}
+        self._roles = _Roles(metric)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self._stats["calls"] += 1
+        task = self._tasks.get(key)
+        self._roles.observe(int(task is None), int(task is not None))
+        if task is not None:
+            self._stats["coalesced"] += 1
+        else:
+            self._stats["executions"] += 1
+            task = self._tasks[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        # shield: one caller disconnecting must not cancel the fetch for the others
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._stats, "in_flight": len(self._tasks)}
@@ -0,0 +1,83 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import List
+from .models import CoinData
+
+# Compact binary KB snapshot, written next to kb.json so startup doesn't parse JSON.
+#
+#   header   b"CKB2", uint32 count, uint32 strings_len        (little-endian)
+#   float64  last_price[count]      (NaN = unknown)
+#   float64  price_ts[count]        (NaN = unknown)
+#   int32    launch_year[count]     (-1 = unknown)
+#   uint8    no_consensus[count]    (1 = consensus is None)
+#   utf-8    coin[0..n] + symbol[0..n] + consensus[0..n], NUL-separated
+#
+# Columns are bulk-decoded with array.frombytes straight from an mmap.
+
+MAGIC = b"CKB2"
+HEADER = struct.Struct("<4sII")
+_NAN = float("nan")
+NO_YEAR = -1
+
+
+def _column(typecode: str, values) -> bytes:
+    col = array(typecode, values)
+    if sys.byteorder == "big":
+        col.byteswap()
+    return col.tobytes()
+
+
+def write_snapshot(path: str, coins: List[CoinData]):
+    strings = "\0".join(
+        [c.coin for c in coins] + [c.symbol for c in coins] + [c.consensus or "" for c in coins]
+    ).encode("utf-8")
+    body = b"".join([
+        _column("d", [_NAN if c.last_price is None else c.last_price for c in coins]),
+        _column("d", [_NAN if c.price_ts is None else c.price_ts for c in coins]),
+        _column("i", [NO_YEAR if c.launch_year is None else c.launch_year for c in coins]),
+        _column("B", [c.consensus is None for c in coins]),
+        strings,
+    ])
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(coins), len(strings)))
+        f.write(body)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path: str) -> List[CoinData]:
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        magic, count, strings_len = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a KB snapshot")
+
+        def column(typecode: str, offset: int) -> array:
+            col = array(typecode)
+            col.frombytes(mm[offset:offset + col.itemsize * count])
+            if sys.byteorder == "big":
+                col.byteswap()
+            return col
+
+        offset = HEADER.size
+        prices = column("d", offset)
+        offset += prices.itemsize * count
+        stamps = column("d", offset)
+        offset += stamps.itemsize * count
+        years = column("i", offset)
+        offset += years.itemsize * count
+        no_consensus = column("B", offset)
+        offset += no_consensus.itemsize * count
+        strings = mm[offset:offset + strings_len].decode("utf-8").split("\0") if count else []
+
+    names, symbols, consensus = strings[:count], strings[count:2 * count], strings[2 * count:]
+    # NaN != NaN, which is how missing prices/timestamps are stored
+    return [
+        CoinData(names[i], symbols[i], None if years[i] == NO_YEAR else years[i],
+                 None if no_consensus[i] else consensus[i],
+                 last_price=prices[i] if prices[i] == prices[i] else None,
+                 price_ts=stamps[i] if stamps[i] == stamps[i] else None)
+        for i in range(count)
+    ]
@@ -0,0 +1,15 @@
+from typing import Any, Generator, Tuple
+
+
+def advance(steps: Generator, value: Any = None) -> Tuple[bool, Any]:
+    """
+    Resume `steps` with `value` -> (False, what it yields next) or (True, what it
+    returns). Logic that waits on I/O is written once as a generator that
+    yields its requests, then driven by a blocking loop (FreeCryptoAPIClient,
+    CryptoAgent) or an awaiting one (the async versions). Never raises
+    StopIteration, so it can run through asyncio.to_thread.
+    """
+    try:
+        return False, steps.send(value)
+    except StopIteration as done:
+        return True, done.value
@@ -0,0 +1,252 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+from typing import List, Optional
+from .models import CoinData, iso_to_epoch
+from .snapshot import read_snapshot, write_snapshot
+
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+
+
+class StorageBackend:
+    """
+    Where the KnowledgeBase persists its coins.
+    """
+
+    def load(self) -> List[CoinData]:
+        raise NotImplementedError
+
+    def save(self, coins: List[CoinData], changed: Optional[List[CoinData]] = None):
+        """
+        Persist coins. `changed` lists the records touched since the last save;
+        backends that can write rows individually only write those.
+        """
+        raise NotImplementedError
+
+    def changes(self) -> List[CoinData]:
+        """
+        Records written by other processes since the last call.
+        """
+        return []
+
+    def checkpoint(self, coins: List[CoinData]):
+        """
+        Write whatever makes the next startup fast (called at shutdown, after
+        the last save).
+        """
+        pass
+
+    def close(self):
+        pass
+
+
+class JSONStorage(StorageBackend):
+    """
+    Whole-file JSON storage (data/kb.json). Single process only.
+
+    A binary snapshot (data/kb.bin) is written next to the JSON file by
+    checkpoint() and used for loading while it is at least as new as the JSON,
+    which skips JSON parsing and ISO timestamp parsing at startup. Saves only
+    rewrite the JSON, so the snapshot is bypassed until the next checkpoint.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.snapshot_path = os.path.splitext(path)[0] + ".bin"
+
+    def load(self) -> List[CoinData]:
+        if not os.path.exists(self.path):
+            return []
+
+        if self._snapshot_is_current():
+            try:
+                return read_snapshot(self.snapshot_path)
+            except Exception as e:
+                print(f"Error loading KB snapshot, falling back to JSON: {e}")
+
+        try:
+            with open(self.path, 'r') as f:
+                raw_data = json.load(f)
+                return [CoinData(**item) for item in raw_data]
+        except Exception as e:
+            print(f"Error loading KB: {e}")
+            return []
+
+    def _snapshot_is_current(self) -> bool:
+        return (os.path.exists(self.snapshot_path)
+                and os.path.getmtime(self.snapshot_path) >= os.path.getmtime(self.path))
+
+    def checkpoint(self, coins: List[CoinData]):
+        # The snapshot only stands in for a JSON file it is newer than
+        if not os.path.exists(self.path):
+            return
+        try:
+            write_snapshot(self.snapshot_path, coins)
+        except Exception as e:
+            print(f"Error saving KB snapshot: {e}")
+
+    def save(self, coins: List[CoinData], changed: Optional[List[CoinData]] = None):
+        try:
+            raw_data = [item.to_dict() for item in coins]
+
+            # Ensure directory exists
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+            with open(self.path, 'w') as f:
+                json.dump(raw_data, f, indent=4)
+        except Exception as e:
+            print(f"Error saving KB: {e}")
+
+
+class SQLiteStorage(StorageBackend):
+    """
+    SQLite storage in WAL mode. Each update is a row-level upsert, and several
+    worker processes can share one database file and see each other's writes.
+    """
+
+    COLUMNS = ("coin", "symbol", "launch_year", "consensus", "last_price", "price_ts")
+
+    def __init__(self, path: str, busy_timeout_ms: int = 5000):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Flask serves requests from several threads; serialise access ourselves
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS coins (
+                symbol TEXT PRIMARY KEY COLLATE NOCASE,
+                coin TEXT NOT NULL,
+                launch_year INTEGER,
+                consensus TEXT,
+                last_price REAL,
+                price_ts REAL,
+                version INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_coins_name ON coins(coin COLLATE NOCASE);
+            CREATE INDEX IF NOT EXISTS idx_coins_version ON coins(version);
+        """)
+        self._migrate()
+        # Highest row version this process has seen, and the connection's
+        # data_version (it only moves when another connection commits)
+        self._seen_version = 0
+        self._data_version = self._read_data_version()
+
+    def _migrate(self):
+        # Databases created before price_ts stored ISO strings in price_timestamp
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(coins)")}
+        if "price_ts" in columns:
+            return
+        self._conn.execute("ALTER TABLE coins ADD COLUMN price_ts REAL")
+        rows = self._conn.execute("SELECT symbol, price_timestamp FROM coins").fetchall()
+        self._conn.executemany(
+            "UPDATE coins SET price_ts = ? WHERE symbol = ?",
+            [(iso_to_epoch(ts) if ts else None, symbol) for symbol, ts in rows],
+        )
+
+    def _read_data_version(self) -> int:
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _rows_to_coins(self, rows) -> List[CoinData]:
+        coins = []
+        for row in rows:
+            coins.append(CoinData(*row[:5], price_ts=row[5]))
+            self._seen_version = max(self._seen_version, row[-1])
+        return coins
+
+    def load(self) -> List[CoinData]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)}, version FROM coins ORDER BY rowid"
+            ).fetchall()
+            self._data_version = self._read_data_version()
+            return self._rows_to_coins(rows)
+
+    def save(self, coins: List[CoinData], changed: Optional[List[CoinData]] = None):
+        rows = changed if changed is not None else coins
+        if not rows:
+            return
+        try:
+            with self._lock:
+                # IMMEDIATE takes the write lock up front so the version bump
+                # can't race another worker
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    version = self._conn.execute(
+                        "SELECT COALESCE(MAX(version), 0) + 1 FROM coins"
+                    ).fetchone()[0]
+                    self._conn.executemany(
+                        """
+                        INSERT INTO coins (coin, symbol, launch_year, consensus, last_price, price_ts, version)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT(symbol) DO UPDATE SET
+                            coin = excluded.coin,
+                            launch_year = excluded.launch_year,
+                            consensus = excluded.consensus,
+                            last_price = excluded.last_price,
+                            price_ts = excluded.price_ts,
+                            version = excluded.version
+                        """,
+                        [
+                            (c.coin, c.symbol, c.launch_year, c.consensus, c.last_price, c.price_ts, version)
+                            for c in rows
+                        ],
+                    )
+                    self._conn.execute("COMMIT")
+                    if version == self._seen_version + 1:
+                        # Nobody else wrote in between; skip our own rows in changes()
+                        self._seen_version = version
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+        except Exception as e:
+            print(f"Error saving KB: {e}")
+
+    def changes(self) -> List[CoinData]:
+        with self._lock:
+            data_version = self._read_data_version()
+            if data_version == self._data_version:
+                return []
+            self._data_version = data_version
+            rows = self._conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)}, version FROM coins WHERE version > ? ORDER BY version",
+                (self._seen_version,),
+            ).fetchall()
+            return self._rows_to_coins(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_storage(path: str) -> StorageBackend:
+    """
+    Pick a backend from the file extension (.db/.sqlite -> SQLite, else JSON).
+    """
+    if path.lower().endswith(SQLITE_EXTENSIONS):
+        return SQLiteStorage(path)
+    return JSONStorage(path)
+
+
+def import_json(json_path: str, db_path: str) -> int:
+    """
+    One-shot import of an existing kb.json into a SQLite database.
+    """
+    coins = JSONStorage(json_path).load()
+    db = SQLiteStorage(db_path)
+    try:
+        db.save(coins)
+    finally:
+        db.close()
+    return len(coins)
+
+
+if __name__ == "__main__":
+    # python -m agent.storage data/kb.json data/kb.db
+    src = sys.argv[1] if len(sys.argv) > 1 else "data/kb.json"
+    dst = sys.argv[2] if len(sys.argv) > 2 else "data/kb.db"
+    print(f"Imported {import_json(src, dst)} coins from {src} into {dst}")
@@ -0,0 +1,167 @@
+import hashlib
+import math
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from .refresher import PeriodicRefresh
+
+
+class BloomFilter:
+    """
+    Compact set membership with no false negatives: `x in bloom` is False only
+    if x was never added. Sized for `capacity` items at `error_rate` false
+    positives (~1.8 bytes per item at 0.1%).
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        # Double hashing: k positions from one 128-bit digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = struct.unpack("<QQ", digest)
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    # File layout: b"BLM1", uint64 size, uint32 hashes, float64 built_at, bits
+    HEADER = struct.Struct("<4sQId")
+
+    def dump(self, path: str, built_at: float):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(self.HEADER.pack(b"BLM1", self.size, self.hashes, built_at))
+            f.write(self.bits)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        """
+        -> (filter, built_at)
+        """
+        with open(path, "rb") as f:
+            magic, size, hashes, built_at = cls.HEADER.unpack(f.read(cls.HEADER.size))
+            if magic != b"BLM1":
+                raise ValueError(f"{path} is not a Bloom filter file")
+            bloom = cls.__new__(cls)
+            bloom.size, bloom.hashes = size, hashes
+            bloom.bits = bytearray(f.read())
+        if len(bloom.bits) != (size + 7) // 8:
+            raise ValueError(f"{path} is truncated")
+        return bloom, built_at
+
+
+class NegativeCache:
+    """
+    Symbols every provider said they don't know, remembered for `ttl`
+    seconds (bounded LRU), so repeats are rejected without network I/O.
+    """
+
+    def __init__(self, ttl: float = 3600.0, max_size: int = 10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._expiry: "OrderedDict[str, float]" = OrderedDict()
+
+    def add(self, key: str):
+        with self._lock:
+            self._expiry[key] = time.monotonic() + self.ttl
+            self._expiry.move_to_end(key)
+            while len(self._expiry) > self.max_size:
+                self._expiry.popitem(last=False)
+
+    def discard(self, key: str):
+        with self._lock:
+            self._expiry.pop(key, None)
+
+    def __contains__(self, key: str) -> bool:
+        expiry = self._expiry.get(key)
+        if expiry is None:
+            return False
+        if expiry < time.monotonic():
+            self.discard(key)
+            return False
+        return True
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+
+class KnownSymbols:
+    """
+    Bloom filter of every symbol, name and id the providers can look up
+    (FreeCryptoAPIClient.fetch_symbol_listing: CoinGecko, CoinCap and Binance
+    listings). A lookup term that isn't in it is not a coin.
+
+    Fails open: until the first successful refresh every term "might exist".
+    Coins listed after the last refresh are missed until the next one, so the
+    filter is rebuilt every `refresh_interval` seconds by a background thread
+    and persisted to `path` for fast startup.
+    """
+
+    def __init__(self, path: Optional[str] = None, refresh_interval: float = 3600.0,
+                 error_rate: float = 0.001):
+        self.path = path
+        self.error_rate = error_rate
+        self._bloom: Optional[BloomFilter] = None
+        self._built_at = 0.0
+        # Failed refreshes are retried after five minutes
+        self._refresher = PeriodicRefresh("known-symbols", lambda: time.time() - self._built_at,
+                                          refresh_interval, 300.0)
+        if path and os.path.exists(path):
+            try:
+                self._bloom, self._built_at = BloomFilter.load(path)
+            except (OSError, ValueError, struct.error) as e:
+                print(f"Error loading known symbols: {e}")
+
+    def might_exist(self, term: str) -> bool:
+        bloom = self._bloom
+        return bloom is None or term.lower().strip() in bloom
+
+    def build(self, coins: List[Dict[str, str]]):
+        """
+        Replace the filter with one built from [{"id", "symbol", "name"}, ...].
+        """
+        terms = set()
+        for coin in coins:
+            for field in ("id", "symbol", "name"):
+                value = coin.get(field)
+                if value:
+                    terms.add(value.lower().strip())
+        bloom = BloomFilter(len(terms), self.error_rate)
+        for term in terms:
+            bloom.add(term)
+        # Swap in one assignment; readers never see a half-built filter
+        self._bloom, self._built_at = bloom, time.time()
+        if self.path:
+            try:
+                bloom.dump(self.path, self._built_at)
+            except OSError as e:
+                print(f"Error saving known symbols: {e}")
+
+    def start(self, fetch_list: Callable[[], Optional[List[Dict[str, str]]]]):
+        self._refresher.start(lambda: self._refresh(fetch_list))
+
+    def stop(self):
+        self._refresher.stop()
+
+    def _refresh(self, fetch_list: Callable[[], Optional[List[Dict[str, str]]]]) -> bool:
+        coins = fetch_list()
+        if not coins:
+            return False
+        self.build(coins)
+        return True
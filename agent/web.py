@@ -0,0 +1,83 @@
+"""
+Request parsing and response helpers shared by the Flask (app.py) and ASGI
+(asgi.py) front ends, so both serve the same API.
+"""
+import json
+import uuid
+from typing import Any, List, Mapping, Optional, Tuple
+
+from .models import AgentResponse
+
+# Upper bound on queries per /chat/batch request
+MAX_BATCH_SIZE = 100
+# Upper bound on ?symbols= per /prices/stream connection
+MAX_WATCH_SYMBOLS = 50
+# Seconds between SSE keep-alive comments on an idle stream
+SSE_KEEPALIVE = 15
+
+
+def session_id(headers: Mapping[str, str], cookies: Mapping[str, str]) -> Tuple[str, bool]:
+    """
+    -> (session id, True if it was just created and should be set as a cookie)
+    """
+    # Conversation context is per session: header, then cookie, else a new id
+    existing = headers.get('X-Session-Id') or cookies.get('session_id')
+    if existing:
+        return existing, False
+    return uuid.uuid4().hex, True
+
+
+def response_dict(response: AgentResponse) -> dict:
+    return {
+        'answer': response.answer,
+        'source': response.source,
+        'confidence': response.confidence
+    }
+
+
+def parse_query(data: Any) -> Tuple[Optional[str], Optional[str]]:
+    """
+    {"query": "..."} -> (query, None), or (None, error message) for a 400.
+    """
+    query = data.get('query') if isinstance(data, dict) else None
+    if not query or not isinstance(query, str):
+        return None, 'No query provided'
+    return query, None
+
+
+def parse_batch(data: Any, default_session: str) -> Tuple[List[Tuple[str, str]], Optional[str]]:
+    """
+    {"queries": ["Price of BTC", {"query": "...", "session_id": "..."}, ...]}
+    -> ([(query, session_id), ...], None), or ([], error message) for a 400.
+    Entries without their own session id use `default_session`.
+    """
+    items = data.get('queries') if isinstance(data, dict) else None
+    if not items or not isinstance(items, list):
+        return [], 'No queries provided'
+    if len(items) > MAX_BATCH_SIZE:
+        return [], f'At most {MAX_BATCH_SIZE} queries per batch'
+
+    queries = []
+    for item in items:
+        if isinstance(item, str):
+            item = {'query': item}
+        if not isinstance(item, dict) or not item.get('query') or not isinstance(item['query'], str):
+            return [], 'Each entry needs a query'
+        session = item.get('session_id')
+        if session is not None and not isinstance(session, str):
+            return [], 'session_id must be a string'
+        queries.append((item['query'], session or default_session))
+    return queries, None
+
+
+def watch_symbols(symbols: Optional[str]) -> Optional[List[str]]:
+    """
+    ?symbols=BTC,eth -> ["BTC", "ETH"] (at most MAX_WATCH_SYMBOLS); None if not given.
+    """
+    if not symbols:
+        return None
+    return [s.strip().upper() for s in symbols.split(',') if s.strip()][:MAX_WATCH_SYMBOLS]
+
+
+def sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -1,9 +1,51 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory
 from agent.core import CryptoAgent
+from agent.knowledge_base import KnowledgeBase
+from agent import metrics, web
+from agent.price_stream import binance_ticker_source, price_event
+import atexit
 import os
+import threading
 
 app = Flask(__name__, static_folder='static')
-agent = CryptoAgent()
+# Background threads start with the first request, not on import, so tools that
+# import this module (benchmarks) stay offline. Set to False to never start them.
+app.config['BACKGROUND_TASKS'] = True
+# KB_PATH=data/kb.db switches to the SQLite backend (needed for multiple workers). The
+# agent's other files (rate-limit buckets, caches, price history) live next to it.
+agent = CryptoAgent(kb=KnowledgeBase(os.environ.get('KB_PATH', 'data/kb.json')))
+_background_lock = threading.Lock()
+_background_started = False
+
+
+def start_background():
+    """
+    Start the agent's background work once per process.
+    """
+    global _background_started
+    with _background_lock:
+        if _background_started:
+            return
+        _background_started = True
+    # Runs last at exit (after the stream flush below): binary KB snapshot for fast startup
+    atexit.register(agent.kb.checkpoint)
+    # Keep popular coins fresh so chats are answered straight from the KB
+    agent.start_background_refresh()
+    # Price history is saved periodically; also keep the last samples on shutdown
+    atexit.register(agent.history.save)
+    # Resolution cache writes happen on a background thread; finish them on shutdown
+    atexit.register(agent.api.resolutions.flush)
+    # PRICE_STREAM=binance applies Binance's live ticker stream to KB prices (needs `pip install websockets`)
+    if os.environ.get('PRICE_STREAM') == 'binance':
+        agent.start_price_stream(binance_ticker_source())
+        # Persist the last streamed prices on shutdown
+        atexit.register(agent.stop_price_stream)
+
+
+@app.before_request
+def _start_background():
+    if app.config['BACKGROUND_TASKS']:
+        start_background()
 
 @app.route('/')
 def index():
@@ -17,20 +59,80 @@ def style():
 def script():
     return send_from_directory('static', 'script.js')
 
+def _request_session_id():
+    return web.session_id(request.headers, request.cookies)
+
 @app.route('/chat', methods=['POST'])
 def chat():
-    data = request.json
-    query = data.get('query')
-    if not query:
-        return jsonify({'error': 'No query provided'}), 400
+    query, error = web.parse_query(request.get_json(silent=True))
+    if error:
+        return jsonify({'error': error}), 400
     
-    response = agent.process_query(query)
+    session_id, new_session = _request_session_id()
+    response = agent.process_query(query, session_id=session_id)
     
-    return jsonify({
-        'answer': response.answer,
-        'source': response.source,
-        'confidence': response.confidence
-    })
+    resp = jsonify(web.response_dict(response))
+    if new_session:
+        resp.set_cookie('session_id', session_id, httponly=True, samesite='Lax')
+    return resp
+
+@app.route('/chat/batch', methods=['POST'])
+def chat_batch():
+    """
+    {"queries": ["Price of BTC", {"query": "...", "session_id": "..."}, ...]}
+    -> {"results": [{"answer", "source", "confidence"}, ...]} in the same order.
+    """
+    # Entries without their own session id use the caller's
+    default_session, new_session = _request_session_id()
+    queries, error = web.parse_batch(request.get_json(silent=True), default_session)
+    if error:
+        return jsonify({'error': error}), 400
+
+    responses = agent.process_batch(queries)
+    resp = jsonify({'results': [web.response_dict(r) for r in responses]})
+    # Follow-ups in the next batch (or /chat) continue this conversation
+    if new_session:
+        resp.set_cookie('session_id', default_session, httponly=True, samesite='Lax')
+    return resp
+
+@app.route('/prices/stream')
+def price_stream():
+    """
+    Server-Sent Events: a `price` event whenever a watched coin's price changes.
+    Watches ?symbols=BTC,ETH if given, else the coins this session has asked about.
+    """
+    session_id, new_session = _request_session_id()
+    watching = web.watch_symbols(request.args.get('symbols'))
+    if watching is None:
+        watching = agent.watch_list(session_id)
+    subscription = agent.prices.subscribe(watching)
+
+    def events():
+        try:
+            # Current prices first, then changes as they happen
+            for symbol in list(watching):
+                coin = agent.kb.get_coin(symbol)
+                if coin and coin.last_price is not None:
+                    yield web.sse('price', price_event(coin))
+            while True:
+                updates = subscription.get(timeout=web.SSE_KEEPALIVE)
+                if not updates:
+                    yield ': keep-alive\n\n'
+                for update in updates:
+                    yield web.sse('price', update)
+        finally:
+            agent.prices.unsubscribe(subscription)
+
+    resp = Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    if new_session:
+        resp.set_cookie('session_id', session_id, httponly=True, samesite='Lax')
+    return resp
+
+@app.route('/metrics')
+def metrics_endpoint():
+    # Prometheus text format: per-stage/provider latency histograms and counters
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
 
 if __name__ == '__main__':
     print("Starting Crypto Agent Web UI on http://localhost:5000")
@@ -0,0 +1,135 @@
+"""
+ASGI entry point with the same routes as app.py, backed by AsyncCryptoAgent.
+
+    pip install httpx starlette uvicorn
+    uvicorn asgi:app --port 5000
+"""
+import asyncio
+import contextlib
+import os
+
+try:
+    from starlette.applications import Starlette
+    from starlette.requests import Request
+    from starlette.responses import FileResponse, JSONResponse, Response, StreamingResponse
+    from starlette.routing import Route
+except ImportError as e:
+    raise ImportError("asgi.py needs the ASGI extras: pip install httpx starlette uvicorn") from e
+
+from agent import metrics, web
+from agent.async_core import AsyncCryptoAgent
+from agent.knowledge_base import KnowledgeBase
+from agent.price_stream import binance_ticker_source, price_event
+
+agent = AsyncCryptoAgent(kb=KnowledgeBase(os.environ.get('KB_PATH', 'data/kb.json')))
+
+
+def _request_session_id(request: Request):
+    return web.session_id(request.headers, request.cookies)
+
+
+async def index(request: Request):
+    return FileResponse(os.path.join('static', 'index.html'))
+
+
+async def style(request: Request):
+    return FileResponse(os.path.join('static', 'style.css'))
+
+
+async def script(request: Request):
+    return FileResponse(os.path.join('static', 'script.js'))
+
+
+async def _json_body(request: Request) -> dict:
+    try:
+        data = await request.json()
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+async def chat(request: Request):
+    query, error = web.parse_query(await _json_body(request))
+    if error:
+        return JSONResponse({'error': error}, status_code=400)
+
+    session_id, new_session = _request_session_id(request)
+    response = await agent.aprocess_query(query, session_id=session_id)
+
+    resp = JSONResponse(web.response_dict(response))
+    if new_session:
+        resp.set_cookie('session_id', session_id, httponly=True, samesite='lax')
+    return resp
+
+
+async def chat_batch(request: Request):
+    default_session, new_session = _request_session_id(request)
+    queries, error = web.parse_batch(await _json_body(request), default_session)
+    if error:
+        return JSONResponse({'error': error}, status_code=400)
+
+    # The batch path does one bulk refresh; run it on a worker thread
+    responses = await asyncio.to_thread(agent.process_batch, queries)
+    resp = JSONResponse({'results': [web.response_dict(r) for r in responses]})
+    # Follow-ups in the next batch (or /chat) continue this conversation
+    if new_session:
+        resp.set_cookie('session_id', default_session, httponly=True, samesite='lax')
+    return resp
+
+
+async def price_stream(request: Request):
+    session_id, new_session = _request_session_id(request)
+    watching = web.watch_symbols(request.query_params.get('symbols'))
+    if watching is None:
+        watching = agent.watch_list(session_id)
+    subscription = agent.prices.subscribe(watching, loop=asyncio.get_running_loop())
+
+    async def events():
+        try:
+            for symbol in list(watching):
+                # KB lookups may read SQLite; keep them off the event loop
+                coin = await asyncio.to_thread(agent.kb.get_coin, symbol)
+                if coin and coin.last_price is not None:
+                    yield web.sse('price', price_event(coin))
+            while True:
+                updates = await subscription.aget(timeout=web.SSE_KEEPALIVE)
+                if not updates:
+                    yield ': keep-alive\n\n'
+                for update in updates:
+                    yield web.sse('price', update)
+        finally:
+            agent.prices.unsubscribe(subscription)
+
+    resp = StreamingResponse(events(), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    if new_session:
+        resp.set_cookie('session_id', session_id, httponly=True, samesite='lax')
+    return resp
+
+
+async def metrics_endpoint(request: Request):
+    return Response(metrics.render(), headers={'Content-Type': metrics.CONTENT_TYPE})
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    agent.start_background_refresh()
+    if os.environ.get('PRICE_STREAM') == 'binance':
+        agent.start_price_stream(binance_ticker_source())
+    yield
+    # Also saves the price history
+    await agent.aclose()
+
+
+app = Starlette(
+    routes=[
+        Route('/', index),
+        Route('/style.css', style),
+        Route('/script.js', script),
+        Route('/chat', chat, methods=['POST']),
+        Route('/chat/batch', chat_batch, methods=['POST']),
+        Route('/prices/stream', price_stream),
+        Route('/metrics', metrics_endpoint),
+    ],
+    lifespan=lifespan,
+)
@@ -0,0 +1,124 @@
+"""
+Per-query entity extraction cost vs. KB size.
+
+    python -m benchmarks.bench_entity_extraction
+
+Builds synthetic KBs of increasing size (no network) and times
+CryptoAgent._extract_entity over a fixed set of queries. With the token trie
+the per-query cost should stay roughly flat as the KB grows.
+
+First checks extraction against coins whose symbols or names are ordinary
+words (Thena THE, Magic Eden ME, Core, Story, ...), as a top-N bootstrap
+loads them; random tickers never collide with the query text.
+"""
+import os
+import random
+import string
+import tempfile
+import time
+
+from agent.core import CryptoAgent
+from agent.knowledge_base import KnowledgeBase
+from agent.models import CoinData
+from agent.storage import JSONStorage
+
+QUERIES = [
+    "What is the price of Bitcoin?",
+    "Tell me about Bitcoin Cash",
+    "price of shiba inu right now",
+    "When was ETH launched?",
+    "What consensus does Solana use?",
+    "How much is one unknowncoin worth today",
+]
+
+BASE_COINS = [
+    CoinData("Bitcoin", "BTC", 2009, "Proof of Work", 95000.0),
+    CoinData("Bitcoin Cash", "BCH", 2017, "Proof of Work", 450.0),
+    CoinData("Ethereum", "ETH", 2015, "Proof of Stake", 3300.0),
+    CoinData("Solana", "SOL", 2020, "Proof of History", 145.0),
+    CoinData("Shiba Inu", "SHIB", 2020, "Proof of Stake", 0.00002),
+    # Real tickers that are also English words
+    CoinData("Thena", "THE", 2023, "Unknown", 1.0),
+    CoinData("Magic Eden", "ME", 2024, "Unknown", 1.0),
+    CoinData("IS Coin", "IS", 2021, "Unknown", 1.0),
+    CoinData("ITO Token", "IT", 2021, "Unknown", 1.0),
+    CoinData("Ofcoin", "OF", 2021, "Unknown", 1.0),
+    # Real coins whose names are ordinary words
+    CoinData("JUST", "JST", 2020, "Unknown", 1.0),
+    CoinData("Story", "IP", 2025, "Unknown", 1.0),
+    CoinData("Core", "CORE", 2023, "Unknown", 1.0),
+    CoinData("Gas", "GAS", 2017, "Unknown", 1.0),
+]
+
+# query -> expected symbol
+EXPECTED = {
+    "What is the price of Bitcoin?": "BTC",
+    "Tell me about Ethereum": "ETH",
+    "Give me the consensus of Solana": "SOL",
+    "Is it proof of stake?": None,
+    "What is the price of bitcoin cash": "BCH",
+    "eth price": "ETH",
+    "Is ETH similar to bitcoin?": "ETH",
+    "What is the price of THE?": "THE",
+    "Tell me about ME": "ME",
+    "price of magic eden": "ME",
+    "I just want the price of ETH": "ETH",
+    "What's the story with BTC?": "BTC",
+    "How much gas does an ETH transfer cost?": "ETH",
+    "what is the core idea of bitcoin": "BTC",
+    "price of JST": "JST",
+    "price of IP": "IP",
+    "What is the price of CORE?": "CORE",
+}
+
+
+def synthetic_coins(n: int):
+    rng = random.Random(n)
+    coins = list(BASE_COINS)
+    while len(coins) < n:
+        symbol = "".join(rng.choices(string.ascii_uppercase, k=rng.randint(3, 6)))
+        name = " ".join(
+            "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9))).capitalize()
+            for _ in range(rng.randint(1, 3))
+        )
+        coins.append(CoinData(name, symbol, 2020, "Unknown", 1.0))
+    return coins
+
+
+def check(n: int = 1000) -> int:
+    """
+    Extraction results for EXPECTED; returns the number of wrong answers.
+    """
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = JSONStorage(os.path.join(tmp, "kb.json"))
+        storage.save(synthetic_coins(n))
+        kb = KnowledgeBase(os.path.join(tmp, "kb.json"), storage=storage)
+        for query, expected in EXPECTED.items():
+            coin = kb.find_in_text(query)
+            got = coin.symbol if coin else None
+            if got != expected:
+                failures += 1
+                print(f"WRONG {query!r}: got {got}, expected {expected}")
+    return failures
+
+
+def bench(n: int, rounds: int = 2000) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = JSONStorage(os.path.join(tmp, "kb.json"))
+        storage.save(synthetic_coins(n))
+        kb = KnowledgeBase(os.path.join(tmp, "kb.json"), storage=storage)
+        agent = CryptoAgent(kb=kb)
+
+        start = time.perf_counter()
+        for i in range(rounds):
+            agent._extract_entity(QUERIES[i % len(QUERIES)])
+        return (time.perf_counter() - start) / rounds * 1e6
+
+
+if __name__ == "__main__":
+    failures = check()
+    print(f"Extraction check: {len(EXPECTED) - failures}/{len(EXPECTED)} correct\n")
+    print(f"{'KB size':>10} | {'us/query':>10}")
+    for size in (10, 100, 1000, 10000, 50000):
+        print(f"{size:>10} | {bench(size):>10.1f}")
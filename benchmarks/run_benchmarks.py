@@ -0,0 +1,169 @@
+"""
+Offline latency/throughput benchmarks for CryptoAgent.process_query and the
+Flask /chat route, against local stub providers (benchmarks/stub_servers.py).
+
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --scenario stampede --requests 2000 --concurrency 64
+
+Scenarios:
+    warm       every queried coin is in the KB and fresh (no upstream calls)
+    cold       empty KB, each query asks for a coin not seen before
+    outage     cold KB with CoinGecko returning 503s (fallback + circuit breaker)
+    stampede   many concurrent requests for one stale coin (single-flight)
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+from agent.api_client import FreeCryptoAPIClient
+from agent.core import CryptoAgent
+from agent.knowledge_base import KnowledgeBase
+from agent.models import CoinData
+from .stub_servers import StubProviders, synthetic_coins
+
+SCENARIOS = ("warm", "cold", "outage", "stampede")
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def make_agent(tmp: str, stubs: StubProviders, hedge_delay) -> CryptoAgent:
+    agent = CryptoAgent(kb=KnowledgeBase(os.path.join(tmp, "kb.json")))
+    # Stub servers have no quota; measure the agent, not the rate limiter
+    config = {name: {**c, "rate_per_minute": None} for name, c in stubs.provider_config().items()}
+    agent.api = FreeCryptoAPIClient(
+        resolution_cache=agent.api.resolutions,
+        provider_config=config,
+        hedge_delay=hedge_delay,
+    )
+    return agent
+
+
+def flask_target(agent: CryptoAgent) -> Callable[[str], bool]:
+    # Keep app.py's own default agent away from data/kb.json
+    os.environ.setdefault('KB_PATH', os.path.join(tempfile.mkdtemp(), 'kb.json'))
+    import app as web
+
+    # No refresher, symbol list or FX fetches against the real providers
+    web.app.config['BACKGROUND_TASKS'] = False
+    # Route handlers look the agent up as a module global
+    web.agent = agent
+
+    def call(query: str) -> bool:
+        response = web.app.test_client().post('/chat', json={'query': query})
+        return response.status_code == 200 and response.get_json()['confidence'] > 0
+    return call
+
+
+def run_load(call: Callable[[str], bool], queries: List[str], concurrency: int,
+             before_round: Callable[[], None] = None) -> Dict[str, float]:
+    latencies: List[float] = []
+    failures = 0
+    lock = threading.Lock()
+
+    def one(query: str):
+        nonlocal failures
+        start = time.perf_counter()
+        try:
+            ok = call(query)
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            failures += 0 if ok else 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        if before_round is None:
+            list(pool.map(one, queries))
+        else:
+            # Rounds of `concurrency` simultaneous requests
+            for start in range(0, len(queries), concurrency):
+                before_round()
+                list(pool.map(one, queries[start:start + concurrency]))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "n": len(latencies),
+        "failed": failures,
+        "p50": percentile(latencies, 50) * 1000,
+        "p95": percentile(latencies, 95) * 1000,
+        "p99": percentile(latencies, 99) * 1000,
+        "rps": len(latencies) / wall if wall else 0.0,
+    }
+
+
+def run_scenario(name: str, target: str, args) -> Dict[str, float]:
+    coins = synthetic_coins(max(args.coins, args.requests + 10))
+    stubs = StubProviders.start(coins, latency=args.latency_ms / 1000.0, jitter=args.jitter_ms / 1000.0)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            agent = make_agent(tmp, stubs, args.hedge_delay)
+            call = flask_target(agent) if target == "http" else (
+                lambda q: agent.process_query(q).confidence > 0)
+            before_round = None
+
+            if name == "warm":
+                now = time.time()
+                agent.kb.update_coins([CoinData(n, s, 2020, "Unknown", p, price_ts=now) for _, n, s, p in coins[:50]])
+                queries = [f"Price of {coins[i % 50][2]}" for i in range(args.requests)]
+            elif name in ("cold", "outage"):
+                if name == "outage":
+                    stubs.set("CoinGecko", error_rate=1.0)
+                queries = [f"Price of {c[2]}" for c in coins[:args.requests]]
+            else:  # stampede
+                btc = CoinData("Bitcoin", "BTC", 2009, "Proof of Work", 1.0, price_ts=0.0)
+                agent.kb.update_coin(btc)
+
+                def expire_btc():
+                    # Make BTC stale again so every round triggers a refresh
+                    agent.kb.get_coin("BTC").price_ts = 0.0
+                before_round = expire_btc
+                queries = ["Price of BTC"] * args.requests
+
+            stubs.reset_counts()
+            result = run_load(call, queries, args.concurrency, before_round)
+            result["upstream"] = sum(stubs.request_counts().values())
+            result["coalesced"] = agent.fetch_stats()["coalesced"]
+            return result
+    finally:
+        stubs.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=SCENARIOS + ("all",), default="all")
+    parser.add_argument("--target", choices=("agent", "http", "both"), default="both")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--coins", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="stub upstream latency")
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--hedge-delay", type=float, default=1.0)
+    args = parser.parse_args()
+
+    scenarios = SCENARIOS if args.scenario == "all" else (args.scenario,)
+    targets = ("agent", "http") if args.target == "both" else (args.target,)
+
+    header = f"{'scenario':<10} {'target':<6} {'n':>6} {'failed':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'upstream':>8} {'coalesced':>9}"
+    print(header)
+    print("-" * len(header))
+    for name in scenarios:
+        for target in targets:
+            r = run_scenario(name, target, args)
+            print(f"{name:<10} {target:<6} {r['n']:>6} {r['failed']:>6} {r['p50']:>8.1f} {r['p95']:>8.1f} "
+                  f"{r['p99']:>8.1f} {r['rps']:>8.0f} {r['upstream']:>8} {r['coalesced']:>9}")
+
+
+if __name__ == "__main__":
+    main()
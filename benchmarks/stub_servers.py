@@ -0,0 +1,235 @@
+"""
+Local stand-ins for the CoinGecko, CoinCap and Binance endpoints that
+FreeCryptoAPIClient parses, so benchmarks never touch the real public APIs.
+
+Each provider runs its own HTTP server with adjustable latency, error rate
+and 429 rate (or a fixed number of upcoming 429s, for tests):
+
+    servers = StubProviders.start(latency=0.05)
+    client = FreeCryptoAPIClient(provider_config=servers.provider_config())
+    ...
+    servers.set("CoinGecko", error_rate=1.0)   # simulate an outage
+    servers.stop()
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+# (id, name, symbol, usd price)
+Coin = Tuple[str, str, str, float]
+
+BASE_COINS: List[Coin] = [
+    ("bitcoin", "Bitcoin", "BTC", 95000.0),
+    ("ethereum", "Ethereum", "ETH", 3300.0),
+    ("solana", "Solana", "SOL", 145.0),
+    ("ripple", "XRP", "XRP", 2.1),
+    ("dogecoin", "Dogecoin", "DOGE", 0.14),
+    ("pepe", "Pepe", "PEPE", 0.0000058),
+    ("tether", "Tether", "USDT", 1.0),
+]
+
+
+def synthetic_coins(n: int, seed: int = 7) -> List[Coin]:
+    """
+    BASE_COINS plus generated coins up to `n` (symbols QAAA, QAAB, ...; letters
+    only, like real tickers, so the agent's entity patterns pick them up).
+    """
+    rng = random.Random(seed)
+    coins = list(BASE_COINS)
+    for i in range(len(coins), n):
+        letters = "".join(chr(ord("A") + (i // 26 ** k) % 26) for k in (2, 1, 0))
+        coins.append((f"coin-{letters.lower()}", f"Coin {letters.title()}", f"Q{letters}", round(rng.uniform(0.01, 500.0), 4)))
+    return coins[:max(n, len(BASE_COINS))]
+
+
+class StubBehaviour:
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, retry_after: float = 1.0, rate_limit_next: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        # The next N requests get a 429 regardless of rate_limit_rate
+        self.rate_limit_next = rate_limit_next
+        self.requests = 0
+
+
+class _StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, provider: str, coins: List[Coin], behaviour: StubBehaviour):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.provider = provider
+        self.behaviour = behaviour
+        self.lock = threading.Lock()
+        self.set_coins(coins)
+
+    def set_coins(self, coins: List[Coin]):
+        self.coins = coins
+        self.by_id = {c[0]: c for c in coins}
+        self.by_symbol: Dict[str, List[Coin]] = {}
+        for c in coins:
+            self.by_symbol.setdefault(c[2].upper(), []).append(c)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: _StubServer
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body=None, headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        server = self.server
+        behaviour = server.behaviour
+        with server.lock:
+            behaviour.requests += 1
+            limited = behaviour.rate_limit_next > 0
+            if limited:
+                behaviour.rate_limit_next -= 1
+
+        delay = behaviour.latency + random.uniform(0, behaviour.jitter)
+        if delay:
+            time.sleep(delay)
+        if limited or random.random() < behaviour.rate_limit_rate:
+            return self._send(429, {"error": "rate limited"}, {"Retry-After": str(behaviour.retry_after)})
+        if random.random() < behaviour.error_rate:
+            return self._send(503, {"error": "unavailable"})
+
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        route = getattr(self, f"_{server.provider.lower()}", None)
+        status, body = route(url.path, params) if route else (404, None)
+        self._send(status, body)
+
+    # CoinGecko (/api/v3)
+    def _coingecko(self, path: str, params: Dict[str, str]):
+        server = self.server
+        if path.endswith("/search"):
+            q = params.get("query", "").upper()
+            hits = server.by_symbol.get(q, []) + [c for c in server.coins if c[1].upper() == q]
+            return 200, {"coins": [{"id": c[0], "name": c[1], "symbol": c[2]} for c in hits]}
+        if path.endswith("/simple/price"):
+            now = int(time.time())
+            ids = params.get("ids", "").split(",")
+            return 200, {i: {"usd": server.by_id[i][3], "last_updated_at": now} for i in ids if i in server.by_id}
+        if path.endswith("/coins/markets"):
+            per_page, page = int(params.get("per_page", 100)), int(params.get("page", 1))
+            start = (page - 1) * per_page
+            updated = time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime())
+            return 200, [
+                {"id": c[0], "symbol": c[2].lower(), "name": c[1], "current_price": c[3],
+                 "market_cap_rank": start + i + 1, "last_updated": updated}
+                for i, c in enumerate(server.coins[start:start + per_page])
+            ]
+        if path.endswith("/exchange_rates"):
+            # Values per 1 BTC, like the real endpoint; fiat rates are fixed
+            btc = server.by_symbol.get("BTC", [("bitcoin", "Bitcoin", "BTC", 95000.0)])[0][3]
+            rates = {"btc": {"name": "Bitcoin", "unit": "BTC", "value": 1.0, "type": "crypto"}}
+            for code, unit, per_usd in (("usd", "$", 1.0), ("eur", "€", 0.92), ("gbp", "£", 0.79), ("jpy", "¥", 150.0)):
+                rates[code] = {"name": code.upper(), "unit": unit, "value": btc * per_usd, "type": "fiat"}
+            return 200, {"rates": rates}
+        if path.endswith("/coins/list"):
+            return 200, [{"id": c[0], "symbol": c[2].lower(), "name": c[1]} for c in server.coins]
+        return 404, {"error": "not found"}
+
+    # CoinCap (/v2)
+    def _coincap(self, path: str, params: Dict[str, str]):
+        server = self.server
+
+        def asset(c: Coin, rank: int = 1):
+            return {"id": c[0], "rank": str(rank), "name": c[1], "symbol": c[2], "priceUsd": str(c[3])}
+
+        if "/assets/" in path:
+            coin = server.by_id.get(path.rsplit("/", 1)[1])
+            return (200, {"data": asset(coin)}) if coin else (404, {"error": "not found"})
+        if path.endswith("/assets"):
+            if "ids" in params:
+                hits = [server.by_id[i] for i in params["ids"].split(",") if i in server.by_id]
+            elif "search" in params:
+                q = params["search"].upper()
+                hits = [c for c in server.coins if q in c[2].upper() or q in c[1].upper()][: int(params.get("limit", 10))]
+            else:
+                offset, limit = int(params.get("offset", 0)), int(params.get("limit", 100))
+                return 200, {"data": [asset(c, offset + i + 1) for i, c in enumerate(server.coins[offset:offset + limit])]}
+            return 200, {"data": [asset(c) for c in hits]}
+        return 404, {"error": "not found"}
+
+    # Binance (/api/v3)
+    def _binance(self, path: str, params: Dict[str, str]):
+        server = self.server
+        if path.endswith("/ticker/price"):
+            if "symbol" in params:
+                pair = params["symbol"]
+                hits = server.by_symbol.get(pair[:-4]) if pair.endswith("USDT") else None
+                if not hits:
+                    return 400, {"code": -1121, "msg": "Invalid symbol."}
+                return 200, {"symbol": pair, "price": str(hits[0][3])}
+            return 200, [{"symbol": f"{c[2]}USDT", "price": str(c[3])} for c in server.coins]
+        return 404, {"error": "not found"}
+
+
+class StubProviders:
+    """
+    The three stub servers, one per provider, each on its own free port.
+    """
+
+    PATHS = {"CoinGecko": "/api/v3", "CoinCap": "/v2", "Binance": "/api/v3"}
+
+    def __init__(self, coins: List[Coin], **behaviour):
+        self.servers: Dict[str, _StubServer] = {}
+        for provider in self.PATHS:
+            server = _StubServer(provider, coins, StubBehaviour(**behaviour))
+            threading.Thread(target=server.serve_forever, name=f"stub-{provider}", daemon=True).start()
+            self.servers[provider] = server
+
+    @classmethod
+    def start(cls, coins: Optional[List[Coin]] = None, **behaviour) -> "StubProviders":
+        return cls(coins or list(BASE_COINS), **behaviour)
+
+    def set(self, provider: str, **behaviour):
+        """
+        Change latency/jitter/error_rate/rate_limit_rate/retry_after/rate_limit_next
+        of one provider.
+        """
+        for key, value in behaviour.items():
+            setattr(self.servers[provider].behaviour, key, value)
+
+    def set_all(self, **behaviour):
+        for provider in self.servers:
+            self.set(provider, **behaviour)
+
+    def request_counts(self) -> Dict[str, int]:
+        return {provider: server.behaviour.requests for provider, server in self.servers.items()}
+
+    def reset_counts(self):
+        for server in self.servers.values():
+            server.behaviour.requests = 0
+
+    def provider_config(self) -> Dict[str, Dict[str, str]]:
+        """
+        `provider_config` for FreeCryptoAPIClient pointing at these servers.
+        """
+        return {
+            provider: {"base_url": f"http://127.0.0.1:{server.server_address[1]}{self.PATHS[provider]}"}
+            for provider, server in self.servers.items()
+        }
+
+    def stop(self):
+        for server in self.servers.values():
+            server.shutdown()
+            server.server_close()
@@ -1,12 +1,34 @@
+import argparse
+import os
+import time
 from agent.api_client import FreeCryptoAPIClient
 from agent.knowledge_base import KnowledgeBase
 from agent.models import CoinData
-import time
+from agent.rate_limiter import RateLimiter
+from agent.resolution_cache import ResolutionCache
+
+# Each request may wait this long for provider rate-limit budget
+RATE_LIMIT_WAIT = 60.0
+
+
+def open_kb():
+    """
+    -> (api, kb) for the KB the app uses (KB_PATH), with the rate-limit buckets
+    and provider id cache next to it like CryptoAgent's, so this job shares
+    the app's quotas and resolved ids.
+    """
+    kb = KnowledgeBase(os.environ.get('KB_PATH', 'data/kb.json'))
+    data_dir = os.path.dirname(kb.data_path)
+    api = FreeCryptoAPIClient(
+        resolution_cache=ResolutionCache(os.path.join(data_dir, "resolution_cache.json")),
+        rate_limiter=RateLimiter(os.path.join(data_dir, "ratelimit.db")),
+    )
+    return api, kb
 
 def populate():
     print("Starting Knowledge Base Expansion...")
-    api = FreeCryptoAPIClient()
-    kb = KnowledgeBase()
+    # Same KB and quota buckets as the running app, so this job can't push it into 429s
+    api, kb = open_kb()
     
     # List of top coins to pre-populate
     top_coins = [
@@ -14,31 +36,76 @@ def populate():
         "TRX", "DOT", "LINK", "MATIC", "LTC", "BCH", "UNI", "DAI", "SHIB", "PEPE", "PI"
     ]
     
-    count = 0
+    print(f"Fetching data for {len(top_coins)} coins...")
+    # One bulk refresh: providers are asked for all symbols at once and only
+    # the misses fall through to the next provider
+    results = api.fetch_many_coin_data(top_coins, max_wait=RATE_LIMIT_WAIT)
+
+    records = []
     for symbol in top_coins:
-        print(f"Fetching data for {symbol}...")
-        try:
-            data = api.fetch_coin_data(symbol)
-            if data:
-                coin_record = CoinData(
-                    coin=data['coin'],
-                    symbol=data['symbol'],
-                    launch_year=data['launch_year'],
-                    consensus=data['consensus'],
-                    last_price=data['last_price'],
-                    price_timestamp=data['price_timestamp']
-                )
-                kb.update_coin(coin_record)
-                print(f"  -> Added/Updated {data['coin']} (${data['last_price']})")
-                count += 1
-                # Respect API rate limits
-                time.sleep(1.5)
-            else:
-                print(f"  -> Failed to fetch {symbol}")
-        except Exception as e:
-            print(f"  -> Error fetching {symbol}: {e}")
-            
+        data = results.get(symbol.upper())
+        if data:
+            records.append(CoinData(
+                coin=data['coin'],
+                symbol=data['symbol'],
+                launch_year=data['launch_year'],
+                consensus=data['consensus'],
+                last_price=data['last_price'],
+                price_ts=data['price_ts']
+            ))
+            print(f"  -> Added/Updated {data['coin']} (${data['last_price']})")
+        else:
+            print(f"  -> Failed to fetch {symbol}")
+
+    # Single KB write for the whole batch
+    kb.update_coins(records)
+    # Snapshot for the app's next startup
+    kb.checkpoint()
+    count = len(records)
+    # Resolved provider ids are written in the background; finish before exiting
+    api.resolutions.flush()
+
     print(f"\nExpansion Complete. Added {count} coins to Knowledge Base.")
 
+def bootstrap(limit: int):
+    """
+    Load the top `limit` coins by market cap from the providers' paged market
+    listings (250 CoinGecko / 2000 CoinCap rows per call) in one KB write.
+    """
+    print(f"Bootstrapping Knowledge Base with the top {limit} coins...")
+    started = time.time()
+    api, kb = open_kb()
+
+    listing = api.fetch_market_listing(limit, max_wait=RATE_LIMIT_WAIT)
+    records = []
+    for data in listing:
+        existing = kb.get_coin(data['symbol'])
+        if existing and existing.symbol.upper() == data['symbol']:
+            # Keep curated facts (launch year, consensus); only the price is new
+            records.append(CoinData(existing.coin, existing.symbol, existing.launch_year, existing.consensus,
+                                    last_price=data['last_price'], price_ts=data['price_ts']))
+        else:
+            records.append(CoinData(
+                coin=data['coin'],
+                symbol=data['symbol'],
+                launch_year=data['launch_year'],
+                consensus=data['consensus'],
+                last_price=data['last_price'],
+                price_ts=data['price_ts']
+            ))
+
+    # Single KB write for the whole listing
+    kb.update_coins(records)
+    kb.checkpoint()
+    api.resolutions.flush()
+    print(f"\nBootstrap Complete. Loaded {len(records)} coins in {time.time() - started:.1f}s.")
+
 if __name__ == "__main__":
-    populate()
+    parser = argparse.ArgumentParser(description="Pre-populate the Knowledge Base.")
+    parser.add_argument("--bootstrap", type=int, metavar="N",
+                        help="load the top N coins by market cap from paged market listings")
+    args = parser.parse_args()
+    if args.bootstrap:
+        bootstrap(args.bootstrap)
+    else:
+        populate()
@@ -1,6 +1,40 @@
 const chatHistory = document.getElementById('chat-history');
 const userInput = document.getElementById('user-input');
 const sendBtn = document.getElementById('send-btn');
+const ticker = document.getElementById('ticker');
+
+// Live prices for the coins this session has asked about (Server-Sent Events).
+// Opened after the first answer so the session cookie already exists.
+let priceStream = null;
+
+function updateTicker(update) {
+    let item = document.getElementById('ticker-' + update.symbol);
+    if (!item) {
+        item = document.createElement('span');
+        item.id = 'ticker-' + update.symbol;
+        item.className = 'ticker-item';
+        // Symbols come from provider data: text only, never markup
+        item.textContent = update.symbol;
+        const price = document.createElement('span');
+        price.className = 'ticker-price';
+        item.appendChild(price);
+        ticker.appendChild(item);
+    }
+    const priceSpan = item.querySelector('.ticker-price');
+    const previous = parseFloat(item.dataset.price);
+    if (!isNaN(previous) && update.price !== previous) {
+        item.classList.toggle('up', update.price > previous);
+        item.classList.toggle('down', update.price < previous);
+    }
+    item.dataset.price = update.price;
+    priceSpan.textContent = '$' + update.price;
+}
+
+function startPriceStream() {
+    if (priceStream || !window.EventSource) return;
+    priceStream = new EventSource('/prices/stream');
+    priceStream.addEventListener('price', (e) => updateTicker(JSON.parse(e.data)));
+}
 
 function appendMessage(text, sender, meta = null) {
     const msgDiv = document.createElement('div');
@@ -60,6 +94,9 @@ async function sendMessage() {
                 source: data.source,
                 confidence: data.confidence
             });
+            if (data.confidence > 0) {
+                startPriceStream();
+            }
         }
 
     } catch (error) {
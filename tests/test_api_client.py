@@ -0,0 +1,268 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import pytest
+import requests
+
+from agent.api_client import FreeCryptoAPIClient
+from agent.resilience import CircuitBreaker
+from agent.resolution_cache import ResolutionCache
+from benchmarks.stub_servers import StubProviders
+
+
+def coin(symbol, provider):
+    return {"coin": symbol, "symbol": symbol, "last_price": 1.0, "provider": provider}
+
+
+def providers(client, monkeypatch, *fetches):
+    # [(name, fetch(symbol)), ...] in preference order, in place of the HTTP lookups
+    names = list(client.DEFAULT_PROVIDER_CONFIG)
+    monkeypatch.setattr(client, "_providers", lambda: list(zip(names, fetches)))
+
+
+@pytest.fixture
+def release():
+    # Lets "hanging" providers return once the test has its answer
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+@pytest.fixture
+def waits(monkeypatch):
+    # How each wait in the hedging loop ended: True if a provider finished,
+    # False if it timed out and started a hedge
+    outcomes = []
+
+    def recording(futures, timeout=None, return_when=None):
+        done, running = wait(futures, timeout=timeout, return_when=return_when)
+        outcomes.append(bool(done))
+        return done, running
+
+    monkeypatch.setattr("agent.api_client.wait", recording)
+    return outcomes
+
+
+def test_hedge_starts_next_provider_after_delay(monkeypatch, release, waits):
+    client = FreeCryptoAPIClient(hedge_delay=0.05)
+
+    def hanging(symbol):
+        release.wait(5)
+        return coin(symbol, "hanging")
+
+    providers(client, monkeypatch, hanging, lambda symbol: coin(symbol, "fast"))
+    assert client.fetch_coin_data("BTC")["provider"] == "fast"
+    # Timed out on the hanging provider, then the hedge answered
+    assert waits == [False, True]
+
+
+def test_failure_starts_next_provider_at_once(monkeypatch, waits):
+    client = FreeCryptoAPIClient(hedge_delay=10.0)
+    calls = []
+
+    def broken(symbol):
+        calls.append("broken")
+        raise ConnectionError("down")
+
+    def second(symbol):
+        calls.append("second")
+        return coin(symbol, "second")
+
+    providers(client, monkeypatch, broken, second)
+    assert client.fetch_coin_data("BTC")["provider"] == "second"
+    assert calls == ["broken", "second"]
+    # No wait ran into the 10-second hedge delay
+    assert all(waits)
+
+
+def test_hedges_start_on_time_under_load(monkeypatch, release):
+    # As many concurrent lookups as each provider has pooled connections, all
+    # with a hanging first provider: no hedge waits behind the losers (if one
+    # did, it would get the hanging provider's answer)
+    client = FreeCryptoAPIClient(hedge_delay=0.05, pool_maxsize=4)
+
+    def hanging(symbol):
+        release.wait(5)
+        return coin(symbol, "hanging")
+
+    providers(client, monkeypatch, hanging, lambda symbol: coin(symbol, "fast"))
+    with ThreadPoolExecutor(max_workers=4) as requests:
+        results = list(requests.map(client.fetch_coin_data, ["BTC", "ETH", "SOL", "ADA"]))
+    assert [r["provider"] for r in results] == ["fast"] * 4
+
+
+def test_pool_sized_for_every_provider():
+    client = FreeCryptoAPIClient(pool_maxsize=4)
+    assert client._executor._max_workers == 4 * len(client.DEFAULT_PROVIDER_CONFIG)
+
+
+def test_breaker_opens_half_opens_and_closes(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("agent.resilience.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=30.0)
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.is_open and not breaker.allow()
+
+    # Half-open after the cool-down: one probe, and its failure re-opens it
+    now[0] += 31
+    assert not breaker.is_open
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    now[0] += 31
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.allow()
+
+
+def test_half_open_breaker_admits_one_probe(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("agent.resilience.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=30.0)
+    breaker.record_failure()
+    now[0] += 31
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        admitted = list(pool.map(lambda _: breaker.allow(), range(8)))
+    assert admitted.count(True) == 1
+
+    # A probe that ends without a verdict (rate-limited) hands over at once
+    breaker.release()
+    assert breaker.allow() and not breaker.allow()
+    breaker.record_success()
+    assert breaker.is_closed and breaker.allow() and breaker.allow()
+
+
+def test_half_open_provider_gets_one_request(monkeypatch, release):
+    now = [1000.0]
+    monkeypatch.setattr("agent.resilience.time.monotonic", lambda: now[0])
+    client = FreeCryptoAPIClient(hedge_delay=None, breaker_threshold=1, breaker_cooldown=30.0)
+    client.breakers["CoinGecko"].record_failure()
+    now[0] += 31
+    calls = []
+    started = threading.Event()
+
+    def recovering(symbol):
+        calls.append(symbol)
+        started.set()
+        release.wait(5)
+        return coin(symbol, "first")
+
+    providers(client, monkeypatch, recovering, lambda symbol: coin(symbol, "second"))
+    probe = threading.Thread(target=client.fetch_coin_data, args=("BTC",))
+    probe.start()
+    try:
+        assert started.wait(5)
+        # Everyone else skips CoinGecko while the probe is out
+        for symbol in ("ETH", "SOL", "ADA"):
+            assert client.fetch_coin_data(symbol)["provider"] == "second"
+        assert calls == ["BTC"]
+    finally:
+        release.set()
+        probe.join()
+    assert client.breakers["CoinGecko"].is_closed
+
+
+def test_open_breaker_skips_provider(monkeypatch):
+    client = FreeCryptoAPIClient(hedge_delay=None, breaker_threshold=2, breaker_cooldown=60.0)
+    calls = []
+
+    def broken(symbol):
+        calls.append(symbol)
+        raise ConnectionError("down")
+
+    providers(client, monkeypatch, broken, lambda symbol: coin(symbol, "second"))
+    for _ in range(3):
+        assert client.fetch_coin_data("BTC")["provider"] == "second"
+    # The third lookup skipped the open breaker without calling the provider
+    assert len(calls) == 2
+    assert not client.breakers["CoinGecko"].allow()
+    assert client.breakers["CoinCap"].allow()
+
+
+def test_miss_is_not_a_failure(monkeypatch):
+    client = FreeCryptoAPIClient(hedge_delay=None, breaker_threshold=1)
+    providers(client, monkeypatch, lambda symbol: None, lambda symbol: coin(symbol, "second"))
+    assert client.fetch_coin_data("BTC")["provider"] == "second"
+    assert client.breakers["CoinGecko"].allow()
+
+
+@pytest.fixture(scope="module")
+def servers():
+    stubs = StubProviders.start()
+    yield stubs
+    stubs.stop()
+
+
+@pytest.fixture
+def stubs(servers):
+    servers.set_all(error_rate=0.0, rate_limit_next=0, retry_after=1.0)
+    servers.reset_counts()
+    return servers
+
+
+@pytest.fixture
+def stub_client(stubs, tmp_path):
+    config = {name: {**c, "rate_per_minute": None} for name, c in stubs.provider_config().items()}
+    client = FreeCryptoAPIClient(hedge_delay=None, provider_config=config, backoff_base=0.01,
+                                 resolution_cache=ResolutionCache(str(tmp_path / "resolution_cache.json")))
+    # Record every retry decision _get makes
+    client.retry_delays = []
+    retry_delay = client._retry_delay
+
+    def recording(*args):
+        client.retry_delays.append(retry_delay(*args))
+        return client.retry_delays[-1]
+
+    client._retry_delay = recording
+    return client
+
+
+def test_short_retry_after_is_honoured(stub_client, stubs):
+    stubs.set("CoinGecko", rate_limit_next=2, retry_after=0.2)
+    assert stub_client.fetch_coin_data("BTC")["last_price"] == 95000.0
+    assert stub_client.retry_delays == [0.2, 0.2]
+    # Two 429s, then /search and /simple/price
+    assert stubs.request_counts() == {"CoinGecko": 4, "CoinCap": 0, "Binance": 0}
+
+
+def test_long_retry_after_falls_through(stub_client, stubs):
+    stubs.set("CoinGecko", rate_limit_next=1, retry_after=30)
+    assert stub_client.fetch_coin_data("BTC")["last_price"] == 95000.0
+    assert stub_client.retry_delays == [None]
+    counts = stubs.request_counts()
+    assert counts["CoinGecko"] == 1 and counts["CoinCap"] > 0
+
+
+def test_server_errors_back_off_then_raise(stub_client, stubs):
+    stubs.set("CoinGecko", error_rate=1.0)
+    with pytest.raises(requests.HTTPError):
+        stub_client._get("CoinGecko", "/search", {"query": "BTC"})
+    # retries=2: two jittered backoffs, then give up
+    assert len(stub_client.retry_delays) == 3 and stub_client.retry_delays[-1] is None
+    assert all(0.0 <= d <= 0.01 * 2 ** i for i, d in enumerate(stub_client.retry_delays[:2]))
+    assert stubs.request_counts()["CoinGecko"] == 3
+
+
+def test_other_4xx_is_not_retried(stub_client, stubs):
+    response = stub_client._get("Binance", "/ticker/price", {"symbol": "NOPEUSDT"})
+    assert response.status_code == 400
+    assert stub_client.retry_delays == []
+    assert stubs.request_counts()["Binance"] == 1
+
+
+def test_backoff_is_capped(monkeypatch):
+    client = FreeCryptoAPIClient(backoff_base=0.25, backoff_max=4.0)
+    monkeypatch.setattr("agent.api_client.random.uniform", lambda low, high: high)
+    assert [client._backoff(attempt) for attempt in range(6)] == [0.25, 0.5, 1.0, 2.0, 4.0, 4.0]
+
+
+@pytest.fixture(autouse=True)
+def quiet(capsys):
+    # Provider errors are printed; keep test output clean
+    yield
+    capsys.readouterr()
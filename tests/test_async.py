@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("httpx")
+
+from agent.async_api_client import AsyncFreeCryptoAPIClient  # noqa: E402
+from agent.async_core import AsyncCryptoAgent  # noqa: E402
+from agent.knowledge_base import KnowledgeBase  # noqa: E402
+from agent.singleflight import AsyncSingleFlight  # noqa: E402
+from benchmarks.stub_servers import StubProviders  # noqa: E402
+
+
+@pytest.fixture
+def stubs():
+    stubs = StubProviders.start(latency=0.05)
+    yield stubs
+    stubs.stop()
+
+
+@pytest.fixture
+def agent(stubs, tmp_path):
+    agent = AsyncCryptoAgent(kb=KnowledgeBase(str(tmp_path / "kb.json")))
+    config = {name: {**c, "retries": 0, "rate_per_minute": None} for name, c in stubs.provider_config().items()}
+    agent.api = AsyncFreeCryptoAPIClient(resolution_cache=agent.api.resolutions, provider_config=config)
+    return agent
+
+
+def test_aprocess_query(agent, stubs):
+    async def run():
+        try:
+            first = await agent.aprocess_query("Price of SOL", session_id="a")
+            follow_up = await agent.aprocess_query("What is its price?", session_id="a")
+        finally:
+            await agent.api.aclose()
+        return first, follow_up
+
+    first, follow_up = asyncio.run(run())
+    assert first.answer == "The price of Solana (SOL) is $145.0."
+    assert first.source == "FreeCryptoAPI"
+    # Answered from the KB the first query filled
+    assert follow_up.answer == first.answer and follow_up.source == "Knowledge Base"
+    assert stubs.request_counts() == {"CoinGecko": 2, "CoinCap": 0, "Binance": 0}
+
+
+def test_concurrent_queries_share_one_fetch(agent, stubs):
+    async def run():
+        try:
+            return await asyncio.gather(*(agent.aprocess_query("Price of DOGE", session_id=str(i)) for i in range(5)))
+        finally:
+            await agent.api.aclose()
+
+    responses = asyncio.run(run())
+    assert {r.answer for r in responses} == {"The price of Dogecoin (DOGE) is $0.14."}
+    # /search + /simple/price once for all five
+    assert stubs.request_counts()["CoinGecko"] == 2
+    stats = agent._aflights.stats()
+    assert stats["executions"] == 1 and stats["in_flight"] == 0
+
+
+def test_async_single_flight_coalesces_and_survives_cancel():
+    flights = AsyncSingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "BTC"
+
+    async def run():
+        cancelled = asyncio.ensure_future(flights.do("BTC", fetch))
+        others = [asyncio.ensure_future(flights.do("BTC", fetch)) for _ in range(3)]
+        await asyncio.sleep(0)
+        # One caller going away doesn't cancel the shared fetch
+        cancelled.cancel()
+        return await asyncio.gather(*others)
+
+    assert asyncio.run(run()) == ["BTC"] * 3
+    assert calls == [1]
+    assert flights.stats() == {"calls": 4, "executions": 1, "coalesced": 3, "in_flight": 0}
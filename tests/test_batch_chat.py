@@ -0,0 +1,108 @@
+import importlib
+import sys
+
+import pytest
+
+from agent import web
+from agent.api_client import FreeCryptoAPIClient
+from agent.core import CryptoAgent
+from agent.knowledge_base import KnowledgeBase
+from benchmarks.stub_servers import StubProviders
+
+
+@pytest.fixture
+def stubs():
+    stubs = StubProviders.start()
+    yield stubs
+    stubs.stop()
+
+
+@pytest.fixture
+def agent(stubs, tmp_path):
+    agent = CryptoAgent(kb=KnowledgeBase(str(tmp_path / "kb.json")))
+    config = {name: {**c, "retries": 0, "rate_per_minute": None} for name, c in stubs.provider_config().items()}
+    agent.api = FreeCryptoAPIClient(resolution_cache=agent.api.resolutions, provider_config=config)
+    return agent
+
+
+def test_batch_fetches_each_coin_once(agent, stubs):
+    responses = agent.process_batch([
+        ("Price of SOL", "a"),
+        ("Price of DOGE", "b"),
+        ("What is its price?", "a"),
+        ("What is the SOL price?", "c"),
+    ])
+    assert [r.answer for r in responses] == [
+        "The price of Solana (SOL) is $145.0.",
+        "The price of Dogecoin (DOGE) is $0.14.",
+        "The price of Solana (SOL) is $145.0.",
+        "The price of Solana (SOL) is $145.0.",
+    ]
+    # One /search per coin and one /simple/price for both
+    assert stubs.request_counts() == {"CoinGecko": 3, "CoinCap": 0, "Binance": 0}
+    assert agent.sessions.get("a").get_last_entity() == "SOL"
+
+
+def test_batch_rejections_keep_their_place(agent):
+    responses = agent.process_batch([("Should I buy BTC?", "a"), ("Price of SOL", "a")])
+    assert responses[0].confidence == 0.0
+    assert responses[1].answer == "The price of Solana (SOL) is $145.0."
+
+
+def test_parse_batch():
+    queries, error = web.parse_batch({"queries": ["Price of BTC", {"query": "and ETH?", "session_id": "s2"}]}, "s1")
+    assert (queries, error) == ([("Price of BTC", "s1"), ("and ETH?", "s2")], None)
+    assert web.parse_batch({"queries": []}, "s1") == ([], "No queries provided")
+    assert web.parse_batch({"queries": [{"session_id": "s2"}]}, "s1") == ([], "Each entry needs a query")
+    too_many = {"queries": ["Price of BTC"] * (web.MAX_BATCH_SIZE + 1)}
+    assert web.parse_batch(too_many, "s1")[1] == f"At most {web.MAX_BATCH_SIZE} queries per batch"
+    assert web.parse_batch({"queries": [{"query": 5}]}, "s1") == ([], "Each entry needs a query")
+    assert web.parse_batch({"queries": [{"query": "Price of BTC", "session_id": ["x"]}]}, "s1") == \
+        ([], "session_id must be a string")
+
+
+def test_parse_query():
+    assert web.parse_query({"query": "Price of BTC"}) == ("Price of BTC", None)
+    for data in ({"query": 5}, {"query": ["Price of BTC"]}, {}, ["Price of BTC"], None):
+        assert web.parse_query(data) == (None, "No query provided")
+
+
+def import_app(module, monkeypatch, tmp_path):
+    # Both front ends build their agent on import; keep it away from data/
+    monkeypatch.setenv("KB_PATH", str(tmp_path / "kb.json"))
+    monkeypatch.delitem(sys.modules, module, raising=False)
+    return importlib.import_module(module)
+
+
+@pytest.fixture
+def flask_client(monkeypatch, tmp_path):
+    app = import_app("app", monkeypatch, tmp_path).app
+    # No refresher/listing threads talking to the real providers
+    app.config["BACKGROUND_TASKS"] = False
+    yield app.test_client()
+    sys.modules.pop("app", None)
+
+
+@pytest.fixture
+def asgi_client(monkeypatch, tmp_path):
+    testclient = pytest.importorskip("starlette.testclient")
+    yield testclient.TestClient(import_app("asgi", monkeypatch, tmp_path).app)
+    sys.modules.pop("asgi", None)
+
+
+BAD_BODIES = [
+    ("/chat", {"query": 5}),
+    ("/chat", ["Price of BTC"]),
+    ("/chat/batch", {"queries": [{"query": 5}]}),
+    ("/chat/batch", {"queries": [{"query": "Price of BTC", "session_id": ["x"]}]}),
+]
+
+
+@pytest.mark.parametrize("path, body", BAD_BODIES)
+def test_flask_rejects_malformed_bodies(flask_client, path, body):
+    assert flask_client.post(path, json=body).status_code == 400
+
+
+@pytest.mark.parametrize("path, body", BAD_BODIES)
+def test_asgi_rejects_malformed_bodies(asgi_client, path, body):
+    assert asgi_client.post(path, json=body).status_code == 400
@@ -0,0 +1,77 @@
+import time
+
+import pytest
+
+from agent.api_client import FreeCryptoAPIClient
+from agent.core import CryptoAgent
+from agent.knowledge_base import KnowledgeBase
+from agent.models import CoinData
+from agent.resolution_cache import ResolutionCache
+from benchmarks.stub_servers import StubProviders, synthetic_coins
+
+SYMBOLS = ["BTC", "ETH", "SOL", "DOGE", "PEPE"]
+
+
+@pytest.fixture(scope="module")
+def servers():
+    stubs = StubProviders.start(synthetic_coins(250))
+    yield stubs
+    stubs.stop()
+
+
+@pytest.fixture
+def stubs(servers):
+    servers.set_all(error_rate=0.0)
+    servers.reset_counts()
+    return servers
+
+
+@pytest.fixture
+def client(stubs, tmp_path):
+    config = {name: {**c, "retries": 0, "rate_per_minute": None} for name, c in stubs.provider_config().items()}
+    return FreeCryptoAPIClient(resolution_cache=ResolutionCache(str(tmp_path / "resolution_cache.json")),
+                               provider_config=config)
+
+
+def test_one_price_call_for_all_symbols(client, stubs):
+    results = client.fetch_many_coin_data(SYMBOLS + ["btc"])
+    assert sorted(results) == sorted(SYMBOLS)
+    # One /search per unresolved symbol, then a single /simple/price
+    assert stubs.request_counts() == {"CoinGecko": len(SYMBOLS) + 1, "CoinCap": 0, "Binance": 0}
+
+    stubs.reset_counts()
+    client.fetch_many_coin_data(SYMBOLS)
+    assert stubs.request_counts() == {"CoinGecko": 1, "CoinCap": 0, "Binance": 0}
+
+
+def test_price_calls_are_batched(client, stubs):
+    symbols = [c[2] for c in synthetic_coins(250)]
+    client.fetch_many_coin_data(symbols)
+    stubs.reset_counts()
+    assert len(client.fetch_many_coin_data(symbols)) == len(symbols)
+    assert stubs.request_counts()["CoinGecko"] == -(-len(symbols) // client.BATCH_SIZE)
+
+
+def test_failed_provider_passes_symbols_on(client, stubs):
+    stubs.set("CoinGecko", error_rate=1.0)
+    results = client.fetch_many_coin_data(SYMBOLS)
+    assert sorted(results) == sorted(SYMBOLS)
+    assert stubs.request_counts()["Binance"] == 0
+
+
+def test_refresh_coins_writes_kb_once(client, stubs, tmp_path):
+    kb = KnowledgeBase(str(tmp_path / "kb.json"))
+    kb.update_coin(CoinData("Bitcoin", "BTC", 2009, "Proof of Work", 1.0, price_ts=0.0))
+    agent = CryptoAgent(kb=kb)
+    agent.api = client
+    saves = []
+    storage_save = kb._storage.save
+    kb._storage.save = lambda coins, changed=None: (saves.append(changed), storage_save(coins, changed))
+
+    updated = agent.refresh_coins(["BTC", "ETH"])
+    assert sorted(updated) == ["BTC", "ETH"]
+    assert [sorted(c.symbol for c in changed) for changed in saves] == [["BTC", "ETH"]]
+    # Curated facts are kept; only the price is refreshed
+    btc = kb.get_coin("BTC")
+    assert btc.consensus == "Proof of Work" and btc.last_price == 95000.0
+    assert time.time() - btc.price_ts < 60
@@ -0,0 +1,116 @@
+import time
+
+import pytest
+
+from agent.core import CryptoAgent
+from agent.fx import FxRates
+from agent.knowledge_base import KnowledgeBase
+from agent.models import CoinData
+
+# /exchange_rates values are per 1 BTC
+BTC_RATES = {
+    "usd": {"unit": "$", "value": 100000.0, "type": "fiat"},
+    "eur": {"unit": "€", "value": 90000.0, "type": "fiat"},
+    "sats": {"unit": "sats", "value": 100000000.0, "type": "crypto"},
+}
+
+
+@pytest.fixture
+def agent(tmp_path):
+    kb = KnowledgeBase(str(tmp_path / "kb.json"))
+    kb.update_coins([
+        CoinData("Bitcoin", "BTC", 2009, "Proof of Work", 100000.0, price_ts=time.time()),
+        CoinData("Ethereum", "ETH", 2015, "Proof of Stake", 4000.0, price_ts=time.time()),
+    ])
+    agent = CryptoAgent(kb=kb)
+    agent.api.known_symbols.build([
+        {"id": "bitcoin", "symbol": "btc", "name": "Bitcoin"},
+        {"id": "ethereum", "symbol": "eth", "name": "Ethereum"},
+    ])
+    # Any upstream call would be a bug in these offline tests
+    agent.api.fetch_coin_data = lambda symbol: pytest.fail(f"upstream fetch for {symbol}")
+    agent.api.fetch_many_coin_data = lambda symbols, **kwargs: pytest.fail(f"upstream fetch for {symbols}")
+    return agent
+
+
+def test_split_fiat_and_coin_quotes(agent):
+    assert agent._split_currency("Price of ETH in EUR?") == ("Price of ETH?", "EUR")
+    assert agent._split_currency("price of eth in euros today") == ("price of eth", "EUR")
+    assert agent._split_currency("How much is ETH in bitcoin") == ("How much is ETH", "BTC")
+    # "to" only in explicit conversions
+    assert agent._split_currency("convert ETH to EUR") == ("convert ETH", "EUR")
+    assert agent._split_currency("Is ETH similar to bitcoin?")[1] is None
+    assert agent._split_currency("Price of ETH in Narnia")[1] is None
+
+
+@pytest.mark.parametrize("query", [
+    "Which consensus is used in Bitcoin?",
+    "What is staking in Ethereum?",
+    "What is proof of work in bitcoin?",
+    "Tell me about staking in Ethereum",
+    "Tell me about mining in Bitcoin",
+    "How much is staking in Ethereum",
+])
+def test_trailing_coin_is_the_subject(agent, query):
+    assert agent._split_currency(query) == (query, None)
+
+
+def test_consensus_in_coin(agent):
+    response = agent.process_query("Which consensus is used in Bitcoin?")
+    assert response.answer == "Bitcoin uses Proof of Work consensus."
+
+
+def test_what_is_in_coin(agent):
+    response = agent.process_query("What is staking in Ethereum?")
+    assert response.answer.startswith("Ethereum (ETH) is a cryptocurrency")
+
+
+@pytest.mark.parametrize("query, name", [
+    ("Tell me about staking in Ethereum", "Ethereum"),
+    ("Tell me about mining in Bitcoin", "Bitcoin"),
+])
+def test_about_topic_in_coin(agent, query, name):
+    assert agent.process_query(query).answer.startswith(name)
+
+
+def test_in_coin_is_not_a_follow_up(agent):
+    agent.process_query("Price of ETH")
+    response = agent.process_query("What is proof of work in bitcoin?")
+    assert response.answer == "Bitcoin uses Proof of Work consensus."
+    assert agent.memory.get_last_entity() == "BTC"
+
+
+def test_follow_up_matches_whole_words(agent):
+    assert agent._is_follow_up("what is its price?")
+    assert agent._is_follow_up("When was the coin launched?")
+    assert not agent._is_follow_up("bitcoin")
+    assert not agent._is_follow_up("What is the consensus?")
+
+
+def test_answers_converted_from_fx_table(agent):
+    agent.fx.update(BTC_RATES)
+    assert agent.process_query("Price of ETH in EUR?").answer == "The price of Ethereum (ETH) is €3,600.00."
+    assert agent.process_query("price of btc in sats").answer == \
+        "The price of Bitcoin (BTC) is 100,000,000.00 SATS."
+
+
+def test_coin_quote_uses_kb_price(agent):
+    response = agent.process_query("What is the price of ETH in BTC?")
+    assert response.answer == "The price of Ethereum (ETH) is 0.04 BTC."
+
+
+def test_missing_fx_rate_falls_back_to_usd(agent):
+    response = agent.process_query("Price of ETH in EUR?")
+    assert response.answer == "The price of Ethereum (ETH) is $4000.0. (No exchange rate for EUR; prices are in USD.)"
+    assert response.confidence > 0.0
+
+
+def test_stale_fx_table_is_not_used(tmp_path):
+    fx = FxRates(str(tmp_path / "fx_rates.json"), max_age=60)
+    fx.update(BTC_RATES)
+    assert fx.quote("EUR").per_usd == pytest.approx(0.9)
+    # Reloaded from disk
+    assert FxRates(fx.path).quote("eur").unit == "€"
+    fx._updated -= 120
+    assert fx.quote("EUR") is None
+    assert fx.quote("USD").per_usd == 1.0
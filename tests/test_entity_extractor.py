@@ -0,0 +1,55 @@
+import pytest
+
+from agent.entity_extractor import EntityTrie
+from agent.knowledge_base import KnowledgeBase
+from agent.storage import JSONStorage
+from benchmarks.bench_entity_extraction import BASE_COINS, EXPECTED
+
+
+@pytest.fixture
+def kb(tmp_path):
+    path = str(tmp_path / "kb.json")
+    storage = JSONStorage(path)
+    storage.save(BASE_COINS)
+    return KnowledgeBase(path, storage=storage)
+
+
+@pytest.mark.parametrize("query, expected", EXPECTED.items())
+def test_find_in_text(kb, query, expected):
+    coin = kb.find_in_text(query)
+    assert (coin.symbol if coin else None) == expected
+
+
+def test_longer_phrase_wins():
+    trie = EntityTrie()
+    trie.add("bitcoin", "BTC")
+    trie.add("bitcoin cash", "BCH")
+    assert trie.find("price of bitcoin cash") == "BCH"
+    assert trie.find("price of bitcoin") == "BTC"
+
+
+def test_uppercase_symbol_beats_lowercase_name():
+    trie = EntityTrie()
+    trie.add("gas", "GAS")
+    trie.add("eth", "ETH", is_name=False)
+    assert trie.find("how much gas for an ETH transfer") == "ETH"
+    # Typed lowercase, the symbol ranks below a one-word name
+    trie.add("bitcoin", "BTC")
+    assert trie.find("is eth like bitcoin") == "BTC"
+    assert trie.find("is ETH like bitcoin") == "ETH"
+
+
+def test_stop_word_needs_uppercase():
+    trie = EntityTrie()
+    trie.add("the", "THE", is_name=False)
+    assert trie.find("what is the price") is None
+    assert trie.find("what is the price of THE") == "THE"
+
+
+def test_name_replaces_symbol_for_same_phrase():
+    trie = EntityTrie()
+    trie.add("bitcoin", "MEME", is_name=False)
+    trie.add("bitcoin", "BTC")
+    trie.add("bitcoin", "OTHER")
+    assert trie.find("price of bitcoin") == "BTC"
+    assert len(trie) == 1
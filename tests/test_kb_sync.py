@@ -0,0 +1,85 @@
+import time
+
+from agent.knowledge_base import KnowledgeBase
+from agent.models import CoinData
+from agent.storage import JSONStorage, SQLiteStorage, import_json
+
+
+def bitcoin():
+    return CoinData("Bitcoin", "BTC", 2009, "Proof of Work", 95000.0, price_ts=time.time())
+
+
+def test_sqlite_sync_between_workers(tmp_path):
+    path = str(tmp_path / "kb.db")
+    writer = KnowledgeBase(path)
+    reader = KnowledgeBase(path)
+    seen = []
+    reader.add_listener(seen.extend)
+
+    writer.update_coin(bitcoin())
+    assert reader.get_coin("BTC").last_price == 95000.0
+    assert [c.symbol for c in seen] == ["BTC"]
+
+    writer.update_coin(CoinData("Bitcoin", "BTC", 2009, "Proof of Work", 96000.0, price_ts=time.time()))
+    assert reader.find_in_text("price of bitcoin").last_price == 96000.0
+    assert [c.last_price for c in seen] == [96000.0, 96000.0]
+    # The writer doesn't see its own rows as changes
+    assert writer._storage.changes() == []
+
+
+def test_sqlite_sync_keeps_newer_price(tmp_path):
+    path = str(tmp_path / "kb.db")
+    writer = KnowledgeBase(path)
+    reader = KnowledgeBase(path)
+    writer.update_coin(CoinData("Bitcoin", "BTC", 2009, "Proof of Work", 90000.0, price_ts=100.0))
+    reader.get_coin("BTC")
+    reader.apply_prices([("BTC", 95000.0, 200.0)])
+
+    writer.update_coin(CoinData("Bitcoin", "BTC", 2009, "Proof of Work", 91000.0, price_ts=150.0))
+    assert reader.get_coin("BTC").last_price == 95000.0
+
+
+def test_watch_changes_notifies_idle_worker(tmp_path):
+    path = str(tmp_path / "kb.db")
+    writer = KnowledgeBase(path)
+    reader = KnowledgeBase(path)
+    seen = []
+    reader.add_listener(seen.extend)
+    reader.watch_changes(interval=0.05)
+    try:
+        writer.update_coin(bitcoin())
+        deadline = time.monotonic() + 5
+        while not seen and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        reader.stop_watching()
+    assert [c.symbol for c in seen] == ["BTC"]
+
+
+def test_import_json(tmp_path):
+    json_path, db_path = str(tmp_path / "kb.json"), str(tmp_path / "kb.db")
+    JSONStorage(json_path).save([bitcoin(), CoinData("Ethereum", "ETH", 2015, "Proof of Stake", 3000.0)])
+    assert import_json(json_path, db_path) == 2
+
+    kb = KnowledgeBase(db_path)
+    assert isinstance(kb._storage, SQLiteStorage)
+    assert kb.get_coin("ethereum").consensus == "Proof of Stake"
+    assert kb.get_coin("BTC").last_price == 95000.0
+
+
+def test_rename_by_another_worker_is_reindexed(tmp_path):
+    path = str(tmp_path / "kb.db")
+    reader = KnowledgeBase(path, aliases={})
+    reader.update_coin(CoinData("Toncoin", "TON", 2018, "Proof of Stake", 5.0, price_ts=time.time()))
+    assert reader.find_in_text("price of toncoin").symbol == "TON"
+
+    # e.g. `python -m agent.storage` re-importing an edited kb.json
+    other = SQLiteStorage(path)
+    other.save([CoinData("The Open Network", "TON", 2018, "Proof of Stake", 5.5, price_ts=time.time())])
+    other.close()
+
+    assert reader.find_in_text("price of the open network").last_price == 5.5
+    assert reader.get_coin("the open network").symbol == "TON"
+    assert reader.get_coin("toncoin") is None
+    assert reader.find_in_text("price of toncoin") is None
+    assert len(reader._data) == 1
@@ -0,0 +1,46 @@
+import time
+
+import pytest
+
+from agent.knowledge_base import KnowledgeBase
+from agent.models import CoinData
+
+
+def bitcoin():
+    return CoinData("Bitcoin", "BTC", 2009, "Proof of Work", 95000.0, price_ts=time.time())
+
+
+def meme():
+    return CoinData("Bitcoin Meme", "BITCOIN", 2024, "Token", 0.01, price_ts=time.time())
+
+
+@pytest.mark.parametrize("order", [(bitcoin, meme), (meme, bitcoin)])
+def test_symbol_does_not_overwrite_name(tmp_path, order):
+    kb = KnowledgeBase(str(tmp_path / "kb.json"), aliases={})
+    for make in order:
+        kb.update_coins([make()])
+
+    assert kb.get_coin("BTC").last_price == 95000.0
+    assert kb.get_coin("BITCOIN").symbol == "BITCOIN"
+    assert kb.get_coin("bitcoin meme").symbol == "BITCOIN"
+    assert kb.find_in_text("price of bitcoin").symbol == "BTC"
+    # In free text the phrase means the name, however it is typed
+    assert kb.find_in_text("price of BITCOIN").symbol == "BTC"
+    assert len(kb._data) == 2
+
+
+def test_update_matches_by_symbol(tmp_path):
+    kb = KnowledgeBase(str(tmp_path / "kb.json"), aliases={})
+    kb.update_coin(bitcoin())
+    kb.update_coin(CoinData("Bitcoin", "BTC", 2009, "Proof of Work", 96000.0, price_ts=time.time()))
+    assert kb.get_coin("bitcoin").last_price == 96000.0
+    assert len(kb._data) == 1
+
+
+def test_lookup_by_alias_and_case(tmp_path):
+    kb = KnowledgeBase(str(tmp_path / "kb.json"), aliases={"XBT": "btc"})
+    kb.update_coin(bitcoin())
+    for term in ("BTC", "btc", "Bitcoin", "BITCOIN", " xbt "):
+        assert kb.get_coin(term).symbol == "BTC"
+    assert kb.find_in_text("price of xbt").symbol == "BTC"
+    assert kb.get_coin("ETH") is None
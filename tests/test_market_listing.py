@@ -0,0 +1,81 @@
+import pytest
+
+import populate_kb
+from agent.api_client import FreeCryptoAPIClient
+from agent.knowledge_base import KnowledgeBase
+from agent.models import CoinData
+from agent.rate_limiter import RateLimiter
+from agent.resolution_cache import ResolutionCache
+from benchmarks.stub_servers import StubProviders, synthetic_coins
+
+COINS = synthetic_coins(100)
+
+
+@pytest.fixture(scope="module")
+def servers():
+    stubs = StubProviders.start(COINS)
+    yield stubs
+    stubs.stop()
+
+
+@pytest.fixture
+def stubs(servers):
+    servers.set_all(error_rate=0.0)
+    servers.reset_counts()
+    return servers
+
+
+def make_client(stubs, tmp_path, **quotas):
+    config = {name: {**c, "retries": 0, "rate_per_minute": None} for name, c in stubs.provider_config().items()}
+    for name, quota in quotas.items():
+        config[name].update(quota)
+    client = FreeCryptoAPIClient(resolution_cache=ResolutionCache(str(tmp_path / "resolution_cache.json")),
+                                 provider_config=config, rate_limiter=RateLimiter())
+    # Small pages so a 60-coin listing takes several calls
+    client.COINGECKO_PAGE_SIZE = client.COINCAP_PAGE_SIZE = 25
+    return client
+
+
+def test_listing_pages_coingecko(stubs, tmp_path):
+    client = make_client(stubs, tmp_path)
+    listing = client.fetch_market_listing(60)
+    assert [d["symbol"] for d in listing] == [c[2] for c in COINS[:60]]
+    assert [d["rank"] for d in listing] == list(range(1, 61))
+    assert stubs.request_counts() == {"CoinGecko": 3, "CoinCap": 0, "Binance": 0}
+    # Provider ids are cached, so later lookups skip /search
+    assert client.resolutions.get("ETH", "coingecko")["id"] == "ethereum"
+
+
+def test_listing_falls_back_to_coincap(stubs, tmp_path, capsys):
+    stubs.set("CoinGecko", error_rate=1.0)
+    client = make_client(stubs, tmp_path)
+    listing = client.fetch_market_listing(60)
+    assert [d["symbol"] for d in listing] == [c[2] for c in COINS[:60]]
+    assert stubs.request_counts() == {"CoinGecko": 3, "CoinCap": 3, "Binance": 0}
+    assert client.resolutions.get("ETH", "coincap") == "ethereum"
+
+
+def test_rate_limited_pages_are_filled_from_coincap(stubs, tmp_path):
+    # One CoinGecko call of budget and no waiting: pages 2 and 3 are skipped
+    client = make_client(stubs, tmp_path, CoinGecko={"rate_per_minute": 1, "burst": 1})
+    listing = client.fetch_market_listing(60, max_wait=0.0, concurrency=1)
+    assert len(listing) == 60
+    assert stubs.request_counts()["CoinGecko"] == 1
+    assert client.resolutions.get("BTC", "coingecko")["id"] == "bitcoin"
+    assert client.resolutions.get(COINS[59][2], "coincap") == COINS[59][0]
+    # Running out of budget is not a provider failure
+    assert client.breakers["CoinGecko"].allow()
+
+
+def test_bootstrap(stubs, tmp_path, monkeypatch, capsys):
+    kb = KnowledgeBase(str(tmp_path / "kb.json"))
+    kb.update_coin(CoinData("Bitcoin", "BTC", 2009, "Proof of Work", 1.0, price_ts=0.0))
+    monkeypatch.setattr(populate_kb, "open_kb", lambda: (make_client(stubs, tmp_path), kb))
+
+    populate_kb.bootstrap(60)
+    assert len(kb._data) == 60
+    # Curated facts are kept; only the price is refreshed
+    btc = kb.get_coin("BTC")
+    assert (btc.launch_year, btc.consensus, btc.last_price) == (2009, "Proof of Work", 95000.0)
+    assert kb.get_coin(COINS[59][2]).last_price == COINS[59][3]
+    assert (tmp_path / "kb.bin").exists()
@@ -0,0 +1,26 @@
+from agent.metrics import Counter, Histogram
+
+
+def test_render_prometheus_text():
+    calls = Counter("calls", "Calls.", ["provider"])
+    calls.inc(provider="CoinGecko")
+    calls.inc(2, provider="Binance")
+    seconds = Histogram("seconds", "Latency.", buckets=(0.1, 1.0))
+    seconds.observe(0.05)
+    seconds.observe(0.5)
+    seconds.observe(5.0)
+
+    assert calls.render() == [
+        "# HELP calls Calls.",
+        "# TYPE calls counter",
+        'calls_total{provider="Binance"} 2',
+        'calls_total{provider="CoinGecko"} 1',
+    ]
+    assert seconds.render()[2:] == [
+        'seconds_bucket{le="0.1"} 1',
+        'seconds_bucket{le="1"} 2',
+        'seconds_bucket{le="+Inf"} 3',
+        "seconds_sum 5.55",
+        "seconds_count 3",
+    ]
+
@@ -0,0 +1,103 @@
+import time
+
+import numpy as np
+import pytest
+
+from agent.core import CryptoAgent
+from agent.knowledge_base import KnowledgeBase
+from agent.models import CoinData
+from agent.price_history import PriceHistory, PriceRing
+
+
+def test_ring_wraps_in_order():
+    ring = PriceRing(capacity=3, resolution=1.0)
+    for t in range(5):
+        ring.append(float(t), 100.0 + t)
+    ts, prices = ring.arrays()
+    assert ts.tolist() == [2.0, 3.0, 4.0]
+    assert prices.tolist() == [102.0, 103.0, 104.0]
+
+
+def test_ring_overwrites_within_resolution_and_drops_old_samples():
+    ring = PriceRing(capacity=10, resolution=60.0)
+    ring.append(0.0, 1.0)
+    ring.append(30.0, 2.0)
+    ring.append(20.0, 3.0)
+    ring.append(60.0, 4.0)
+    ts, prices = ring.arrays()
+    assert ts.tolist() == [30.0, 60.0]
+    assert prices.tolist() == [2.0, 4.0]
+
+
+def test_ring_grows_up_to_capacity():
+    ring = PriceRing(capacity=40, resolution=1.0)
+    assert len(ring.ts) == PriceRing.INITIAL_SIZE
+    for t in range(20):
+        ring.append(float(t), float(t))
+    assert len(ring.ts) == 32
+    for t in range(20, 50):
+        ring.append(float(t), float(t))
+    # Capped at capacity, then wraps
+    assert len(ring.ts) == 40
+    ts, prices = ring.arrays()
+    assert ts.tolist() == [float(t) for t in range(10, 50)]
+
+
+def test_least_recently_updated_coin_is_evicted():
+    history = PriceHistory(resolution=1.0, max_coins=2)
+    history.record("BTC", 1.0, 100.0)
+    history.record("ETH", 1.0, 10.0)
+    history.record("BTC", 2.0, 101.0)
+    history.record("SOL", 2.0, 1.0)
+    assert len(history) == 2
+    assert history.stats("BTC", 10, now=2.0).samples == 2
+    assert len(history.window("ETH", 10, now=2.0)[0]) == 0
+
+
+def test_window_stats():
+    history = PriceHistory(resolution=1.0)
+    for t, price in enumerate([100.0, 110.0, 90.0, 105.0]):
+        history.record("btc", 1000.0 + t, price)
+    stats = history.stats("BTC", 10, now=1003.0)
+    assert (stats.first, stats.last, stats.high, stats.low) == (100.0, 105.0, 110.0, 90.0)
+    assert stats.change_pct == pytest.approx(5.0)
+    returns = np.diff(np.log([100.0, 110.0, 90.0, 105.0]))
+    assert stats.volatility == pytest.approx(returns.std(ddof=1) * 100)
+    # Only the last two samples are inside a 1.5-second window
+    assert history.stats("BTC", 1.5, now=1003.0).samples == 2
+    assert history.stats("ETH", 10, now=1003.0) is None
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / "price_history.npz")
+    history = PriceHistory(path, capacity=5, resolution=1.0)
+    for t in range(8):
+        history.record("BTC", float(t), float(t))
+    history.record("ETH", 0.0, 1.0)
+    history.save()
+
+    loaded = PriceHistory(path, capacity=5, resolution=1.0)
+    assert len(loaded) == 2
+    assert loaded.window("BTC", 100, now=7.0)[1].tolist() == [3.0, 4.0, 5.0, 6.0, 7.0]
+    assert loaded.window("ETH", 100, now=7.0)[1].tolist() == [1.0]
+    loaded.record("BTC", 8.0, 8.0)
+    assert loaded.window("BTC", 100, now=8.0)[1].tolist() == [4.0, 5.0, 6.0, 7.0, 8.0]
+    # Only the most recently updated coin (ETH) fits
+    capped = PriceHistory(path, capacity=5, resolution=1.0, max_coins=1)
+    assert len(capped) == 1
+    assert capped.window("ETH", 100, now=7.0)[1].tolist() == [1.0]
+
+
+def test_agent_answers_change_from_history(tmp_path):
+    now = time.time()
+    kb = KnowledgeBase(str(tmp_path / "kb.json"))
+    agent = CryptoAgent(kb=kb)
+    for minutes_ago, price in ((90, 100.0), (30, 120.0), (0, 110.0)):
+        kb.update_coin(CoinData("Bitcoin", "BTC", 2009, "Proof of Work", price, price_ts=now - minutes_ago * 60))
+
+    answer = agent.process_query("How has the BTC price changed in the last 2 hours?").answer
+    assert answer.startswith("Bitcoin (BTC) is up 10.00% over the last 2 hours")
+    answer = agent.process_query("What was the BTC price high and low in the last hour?").answer
+    assert answer == "Bitcoin (BTC) over the last hour (history covers only 30 minutes): high $120.00, low $110.00."
+    # Not a question about recorded prices
+    assert agent.process_query("What is Bitcoin's all-time high price?").answer.startswith("The price of Bitcoin")
@@ -0,0 +1,124 @@
+import importlib
+import json
+import sys
+import time
+
+import pytest
+
+from agent.core import CryptoAgent
+from agent.knowledge_base import KnowledgeBase
+from agent.models import CoinData
+from agent.price_stream import (LocalTickerPublisher, PriceBroadcaster, PriceStreamIngestor,
+                                parse_binance_tickers)
+
+
+@pytest.fixture(scope="module")
+def web_app(tmp_path_factory):
+    # app.py builds its agent on import; point it (and the rate-limit db and
+    # caches kept next to its KB) away from data/
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("KB_PATH", str(tmp_path_factory.mktemp("app") / "kb.json"))
+        sys.modules.pop("app", None)
+        yield importlib.import_module("app")
+    sys.modules.pop("app", None)
+
+
+@pytest.fixture
+def kb_path(tmp_path):
+    path = str(tmp_path / "kb.db")
+    kb = KnowledgeBase(path)
+    kb.update_coins([
+        CoinData("Bitcoin", "BTC", 2009, "Proof of Work", 90000.0, price_ts=time.time() - 60),
+        CoinData("Ethereum", "ETH", 2015, "Proof of Stake", 3000.0, price_ts=time.time() - 60),
+    ])
+    return path
+
+
+def publish_until(publisher, prices, subscription, timeout=5.0):
+    # The ingestor connects to the publisher on its own thread; keep
+    # publishing until a tick gets through
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        publisher.publish(prices)
+        updates = subscription.get(timeout=0.1)
+        if updates:
+            return updates
+    return []
+
+
+def test_parse_binance_tickers():
+    message = json.dumps([
+        {"s": "BTCUSDT", "c": "95000.5", "E": 1700000000000},
+        {"s": "ETHBTC", "c": "0.03", "E": 1700000000000},
+    ])
+    assert parse_binance_tickers(message) == [("BTC", 95000.5, 1700000000.0)]
+
+
+def test_stream_applies_flushes_and_publishes(kb_path):
+    kb = KnowledgeBase(kb_path)
+    other_worker = KnowledgeBase(kb_path)
+    prices = PriceBroadcaster()
+    kb.add_listener(prices.publish)
+    subscription = prices.subscribe(["BTC"])
+    publisher = LocalTickerPublisher(idle_timeout=0.05)
+    ingestor = PriceStreamIngestor(kb, publisher.source, flush_interval=3600)
+    ingestor.start()
+    try:
+        updates = publish_until(publisher, {"BTC": 95000.0, "ETH": 3100.0, "NOPE": 1.0}, subscription)
+        assert [(u["symbol"], u["price"]) for u in updates] == [("BTC", 95000.0)]
+        assert kb.get_coin("ETH").last_price == 3100.0
+        # Applied in memory only until the next flush
+        assert other_worker.get_coin("BTC").last_price == 90000.0
+    finally:
+        ingestor.stop()
+    assert other_worker.get_coin("BTC").last_price == 95000.0
+    assert other_worker.get_coin("ETH").last_price == 3100.0
+
+
+def test_old_and_unchanged_ticks_are_skipped(kb_path):
+    kb = KnowledgeBase(kb_path)
+    coin = kb.get_coin("BTC")
+    assert kb.apply_prices([("BTC", 91000.0, coin.price_ts - 1)]) == []
+    assert kb.apply_prices([("BTC", 90000.0, time.time())]) == []
+    assert kb.apply_prices([("btc", 91000.0, time.time())]) == [coin]
+    assert kb.flush() == 1
+    assert kb.flush() == 0
+
+
+def test_subscription_coalesces_to_latest_price():
+    prices = PriceBroadcaster()
+    subscription = prices.subscribe(["btc"])
+    prices.publish([CoinData("Bitcoin", "BTC", 2009, "Proof of Work", 1.0, price_ts=1.0)])
+    prices.publish([CoinData("Bitcoin", "BTC", 2009, "Proof of Work", 2.0, price_ts=2.0)])
+    prices.publish([CoinData("Ethereum", "ETH", 2015, "Proof of Stake", 3.0, price_ts=3.0)])
+    assert [u["price"] for u in subscription.get(timeout=0)] == [2.0]
+    assert subscription.get(timeout=0) == []
+    prices.unsubscribe(subscription)
+    assert len(prices) == 0
+
+
+def test_sse_endpoint_streams_prices(web_app, kb_path, monkeypatch):
+    agent = CryptoAgent(kb=KnowledgeBase(kb_path))
+    monkeypatch.setattr(web_app, "agent", agent)
+    monkeypatch.setitem(web_app.app.config, "BACKGROUND_TASKS", False)
+    publisher = LocalTickerPublisher(idle_timeout=0.05)
+    agent.start_price_stream(publisher.source, flush_interval=3600)
+    try:
+        response = web_app.app.test_client().get("/prices/stream?symbols=BTC", buffered=False)
+        assert response.mimetype == "text/event-stream"
+        events = (chunk.decode() for chunk in response.response)
+        # Current price first
+        assert json.loads(next(events).split("data: ")[1])["price"] == 90000.0
+
+        # Then streamed changes, once the ingestor is connected
+        watcher = agent.prices.subscribe(["BTC"])
+        publish_until(publisher, {"BTC": 95000.0}, watcher)
+        agent.prices.unsubscribe(watcher)
+        chunk = next(events)
+        assert chunk.startswith("event: price\n")
+        assert json.loads(chunk.split("data: ")[1])["price"] == 95000.0
+        response.close()
+    finally:
+        agent.stop_price_stream()
+    assert len(agent.prices) == 0
+    assert KnowledgeBase(kb_path).get_coin("BTC").last_price == 95000.0
@@ -0,0 +1,78 @@
+import time
+
+import pytest
+
+from agent.api_client import FreeCryptoAPIClient
+from agent.rate_limiter import RateLimited, RateLimiter
+from agent.resolution_cache import ResolutionCache
+from benchmarks.stub_servers import StubProviders
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def limiter(request, tmp_path):
+    limiter = RateLimiter(str(tmp_path / "ratelimit.db") if request.param == "sqlite" else None)
+    limiter.configure("coingecko", rate_per_minute=60, burst=3)
+    yield limiter
+    limiter.close()
+
+
+def test_burst_then_wait(limiter):
+    for _ in range(3):
+        assert limiter.try_acquire("coingecko") == 0.0
+    wait = limiter.try_acquire("coingecko")
+    assert 0.0 < wait <= 1.0
+    assert not limiter.has_budget("coingecko")
+
+
+def test_acquire_raises_when_wait_too_long(limiter):
+    for _ in range(3):
+        limiter.acquire("coingecko")
+    with pytest.raises(RateLimited) as excinfo:
+        limiter.acquire("coingecko", max_wait=0.0)
+    assert excinfo.value.provider == "coingecko"
+    assert excinfo.value.retry_in > 0.0
+
+
+def test_acquire_waits_for_refill(limiter):
+    limiter.configure("coingecko", rate_per_minute=600, burst=1)
+    limiter.acquire("coingecko")
+    start = time.monotonic()
+    limiter.acquire("coingecko", max_wait=1.0)
+    assert time.monotonic() - start >= 0.05
+
+
+def test_unconfigured_provider_is_unlimited(limiter):
+    for _ in range(100):
+        assert limiter.try_acquire("binance") == 0.0
+
+
+def test_workers_share_buckets(tmp_path):
+    path = str(tmp_path / "ratelimit.db")
+    first, second = RateLimiter(path), RateLimiter(path)
+    for limiter in (first, second):
+        limiter.configure("coingecko", rate_per_minute=60, burst=2)
+    try:
+        assert first.try_acquire("coingecko") == 0.0
+        assert second.try_acquire("coingecko") == 0.0
+        assert first.try_acquire("coingecko") > 0.0
+        assert not second.has_budget("coingecko")
+    finally:
+        first.close()
+        second.close()
+
+
+def test_client_routes_around_spent_provider(tmp_path):
+    stubs = StubProviders.start()
+    try:
+        config = {name: {**c, "retries": 0, "rate_per_minute": None} for name, c in stubs.provider_config().items()}
+        # Two CoinGecko calls (/search + /simple/price), then no budget for a minute
+        config["CoinGecko"].update(rate_per_minute=1, burst=2)
+        client = FreeCryptoAPIClient(hedge_delay=None, provider_config=config,
+                                     resolution_cache=ResolutionCache(str(tmp_path / "resolution_cache.json")))
+        assert client.fetch_coin_data("BTC")["symbol"] == "BTC"
+        assert stubs.request_counts() == {"CoinGecko": 2, "CoinCap": 0, "Binance": 0}
+        assert client.fetch_coin_data("ETH")["symbol"] == "ETH"
+        counts = stubs.request_counts()
+        assert counts["CoinGecko"] == 2 and counts["CoinCap"] > 0
+    finally:
+        stubs.stop()
@@ -0,0 +1,96 @@
+import time
+
+import pytest
+
+from agent.core import CryptoAgent
+from agent.knowledge_base import KnowledgeBase
+from agent.models import CoinData
+from agent.refresher import PriceRefresher
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("agent.refresher.time.time", lambda: now[0])
+    return now
+
+
+def test_popularity_decays(clock):
+    refresher = PriceRefresher(lambda symbols: None, lambda symbol: None, half_life=600.0)
+    for symbol in ("BTC", "BTC", "BTC", "eth"):
+        refresher.record_query(symbol)
+    assert refresher.hot_symbols() == ["BTC", "ETH"]
+
+    # Two half-lives later: BTC 0.75, ETH 0.25 (forgotten); SOL is now hotter
+    clock[0] += 1200
+    refresher.record_query("SOL")
+    refresher.record_query("SOL")
+    assert refresher.hot_symbols() == ["SOL", "BTC"]
+    assert "ETH" not in refresher._scores
+
+
+def test_run_once_refreshes_due_coins_in_one_call(clock):
+    ages = {"BTC": 100.0, "ETH": 10.0, "SOL": None}
+    calls = []
+    refresher = PriceRefresher(calls.append, ages.get, interval=30.0, soft_ttl=120.0)
+    for symbol in ages:
+        refresher.record_query(symbol)
+    refresher.request_refresh("doge")
+
+    refresher.run_once()
+    # BTC goes stale before the next tick, SOL has no price, ETH is fresh
+    assert len(calls) == 1 and sorted(calls[0]) == ["BTC", "DOGE", "SOL"]
+    refresher.run_once()
+    assert sorted(calls[1]) == ["BTC", "SOL"]
+
+
+@pytest.fixture
+def agent(tmp_path):
+    agent = CryptoAgent(kb=KnowledgeBase(str(tmp_path / "kb.json")))
+    agent.fetches = []
+
+    def fetch_coin_data(symbol):
+        agent.fetches.append(symbol)
+        return {"coin": "Bitcoin", "symbol": "BTC", "last_price": 96000.0, "price_ts": time.time()}
+
+    agent.api.fetch_coin_data = fetch_coin_data
+    return agent
+
+
+def set_age(agent, age):
+    agent.kb.update_coin(CoinData("Bitcoin", "BTC", 2009, "Proof of Work", 95000.0, price_ts=time.time() - age))
+
+
+@pytest.fixture
+def refresher_running(monkeypatch):
+    monkeypatch.setattr(PriceRefresher, "is_running", property(lambda self: True))
+
+
+def test_fresh_price_is_served(agent, refresher_running):
+    set_age(agent, 60)
+    assert agent.process_query("Price of BTC").answer == "The price of Bitcoin (BTC) is $95000.0."
+    assert agent.fetches == [] and agent.refresher._pending == set()
+
+
+def test_soft_stale_price_is_served_and_refreshed_in_background(agent, refresher_running):
+    set_age(agent, agent.SOFT_TTL + 30)
+    response = agent.process_query("Price of BTC")
+    assert response.answer == "The price of Bitcoin (BTC) is $95000.0."
+    assert response.source == "Knowledge Base"
+    assert agent.fetches == []
+    assert agent.refresher._pending == {"BTC"}
+
+
+def test_soft_stale_price_blocks_without_refresher(agent):
+    set_age(agent, agent.SOFT_TTL + 30)
+    assert agent.process_query("Price of BTC").answer == "The price of Bitcoin (BTC) is $96000.0."
+    assert agent.fetches == ["BTC"]
+
+
+def test_price_past_hard_max_age_blocks(agent, refresher_running):
+    set_age(agent, agent.HARD_MAX_AGE + 30)
+    response = agent.process_query("Price of BTC")
+    assert response.answer == "The price of Bitcoin (BTC) is $96000.0."
+    assert response.source == "FreeCryptoAPI"
+    assert agent.fetches == ["BTC"]
+    assert agent.refresher._pending == set()
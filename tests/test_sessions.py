@@ -0,0 +1,45 @@
+from agent.core import ConversationMemory
+from agent.sessions import SessionStore
+
+
+def test_sessions_are_separate_and_reused():
+    store = SessionStore(ConversationMemory)
+    alice, bob = store.get("alice"), store.get("bob")
+    alice.set_last_entity("BTC")
+    assert store.get("alice") is alice
+    assert bob.get_last_entity() is None
+
+
+def test_least_recently_used_session_is_evicted():
+    store = SessionStore(ConversationMemory, max_sessions=2)
+    first = store.get("a")
+    store.get("b")
+    store.get("a")
+    store.get("c")
+    assert len(store) == 2
+    assert store.get("a") is first
+    assert "b" not in store._sessions
+
+
+def test_idle_sessions_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("agent.sessions.time.monotonic", lambda: now[0])
+    store = SessionStore(ConversationMemory, idle_ttl=60)
+    first = store.get("a")
+    now[0] += 30
+    store.get("b")
+    now[0] += 45
+    store.get("b")
+    assert len(store) == 1
+    assert store.get("a") is not first
+
+
+def test_memory_keeps_recent_turns():
+    memory = ConversationMemory(limit=2, watch_limit=2)
+    for query in ("one", "two", "three"):
+        memory.add_turn(query)
+    for symbol in ("BTC", "ETH", "BTC", "SOL"):
+        memory.set_last_entity(symbol)
+    assert list(memory.history) == ["two", "three"]
+    assert list(memory.watching) == ["ETH", "SOL"]
+    assert memory.get_last_entity() == "SOL"
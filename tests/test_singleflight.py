@@ -0,0 +1,136 @@
+import threading
+import time
+
+import pytest
+
+from agent import metrics
+from agent.core import CryptoAgent
+from agent.knowledge_base import KnowledgeBase
+from agent.models import CoinData
+from agent.singleflight import SingleFlight
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def run_concurrently(fn, count):
+    results = [None] * count
+    threads = [threading.Thread(target=lambda i=i: results.__setitem__(i, fn())) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    release = threading.Event()
+    executions = []
+
+    def fetch():
+        executions.append(1)
+        release.wait(5)
+        return "BTC"
+
+    def call():
+        return flights.do("BTC", fetch)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    wait_until(lambda: flights.stats()["in_flight"])
+    followers = threading.Thread(target=lambda: run_concurrently(call, 5))
+    followers.start()
+    wait_until(lambda: flights.stats()["calls"] == 6)
+    release.set()
+    leader.join()
+    followers.join()
+    assert len(executions) == 1
+    assert flights.stats() == {"calls": 6, "executions": 1, "coalesced": 5, "in_flight": 0}
+
+
+def test_error_is_raised_and_not_cached():
+    flights = SingleFlight()
+
+    def broken():
+        raise ValueError("down")
+
+    with pytest.raises(ValueError):
+        flights.do("BTC", broken)
+    assert flights.do("BTC", lambda: 1) == 1
+
+
+def test_do_many_joins_keys_in_flight():
+    flights = SingleFlight()
+    release = threading.Event()
+    batches = []
+
+    def slow_btc():
+        release.wait(5)
+        return "btc"
+
+    leader = threading.Thread(target=lambda: flights.do("BTC", slow_btc))
+    leader.start()
+    wait_until(lambda: flights.stats()["in_flight"])
+
+    def fetch_many(keys):
+        batches.append(keys)
+        return {key: key.lower() for key in keys if key != "NOPE"}
+
+    waiter = threading.Thread(target=lambda: batches.append(flights.do_many(["BTC", "ETH", "ETH", "NOPE"], fetch_many)))
+    waiter.start()
+    wait_until(lambda: flights.stats()["calls"] == 4)
+    release.set()
+    leader.join()
+    waiter.join()
+    # BTC was already in flight: only ETH and NOPE are fetched, once
+    assert batches == [["ETH", "NOPE"], {"ETH": "eth", "NOPE": None, "BTC": "btc"}]
+
+
+def test_roles_are_counted_in_metric():
+    counter = metrics.Counter("flights", "Flights.", ["role"])
+    flights = SingleFlight(counter)
+    release = threading.Event()
+    leader = threading.Thread(target=lambda: flights.do("BTC", lambda: release.wait(5)))
+    leader.start()
+    wait_until(lambda: flights.stats()["in_flight"])
+    waiter = threading.Thread(target=lambda: flights.do_many(["BTC", "ETH"], lambda keys: {}))
+    waiter.start()
+    wait_until(lambda: flights.stats()["calls"] == 3)
+    release.set()
+    leader.join()
+    waiter.join()
+    assert counter.render()[2:] == ['flights_total{role="coalesced"} 1', 'flights_total{role="leader"} 2']
+
+
+def test_request_joins_background_refresh(tmp_path):
+    kb = KnowledgeBase(str(tmp_path / "kb.json"))
+    agent = CryptoAgent(kb=kb)
+    kb.update_coin(CoinData("Bitcoin", "BTC", 2009, "Proof of Work", 90000.0, price_ts=time.time() - 3600))
+    release = threading.Event()
+    bulk_calls = []
+
+    def fetch_many_coin_data(symbols, max_wait=0.0):
+        bulk_calls.append((symbols, max_wait))
+        release.wait(5)
+        return {"BTC": {"coin": "Bitcoin", "symbol": "BTC", "last_price": 95000.0, "price_ts": time.time()}}
+
+    agent.api.fetch_many_coin_data = fetch_many_coin_data
+    agent.api.fetch_coin_data = lambda symbol: pytest.fail("chat request fetched on its own")
+
+    refresh = threading.Thread(target=agent.refresher.refresh_fn, args=(["BTC"],))
+    refresh.start()
+    wait_until(lambda: agent.fetch_stats()["in_flight"])
+    answers = []
+    chat = threading.Thread(target=lambda: answers.append(agent.process_query("Price of BTC").answer))
+    chat.start()
+    wait_until(lambda: agent.fetch_stats()["coalesced"])
+    release.set()
+    refresh.join()
+    chat.join()
+    assert answers == ["The price of Bitcoin (BTC) is $95000.0."]
+    assert bulk_calls == [(["BTC"], agent.BACKGROUND_RATE_WAIT)]
@@ -0,0 +1,91 @@
+import os
+import sqlite3
+
+from agent.knowledge_base import KnowledgeBase
+from agent.models import CoinData, iso_to_epoch
+from agent.snapshot import read_snapshot, write_snapshot
+from agent.storage import JSONStorage, SQLiteStorage
+
+
+def coins():
+    return [
+        CoinData("Bitcoin", "BTC", 2009, "Proof of Work", 95000.5, price_ts=1700000000.0),
+        CoinData("Unknown Coin", "X", None, None),
+        CoinData("Zero", "ZERO", 0, "", 0.0, price_ts=0.0),
+    ]
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "kb.bin")
+    write_snapshot(path, coins())
+    assert read_snapshot(path) == coins()
+
+
+def test_empty_snapshot(tmp_path):
+    path = str(tmp_path / "kb.bin")
+    write_snapshot(path, [])
+    assert read_snapshot(path) == []
+
+
+def test_load_and_save_leave_snapshot_alone(tmp_path):
+    storage = JSONStorage(str(tmp_path / "kb.json"))
+    storage.save(coins())
+    assert storage.load() == coins()
+    assert not os.path.exists(storage.snapshot_path)
+
+
+def test_checkpoint_snapshot_is_loaded_until_next_save(tmp_path):
+    storage = JSONStorage(str(tmp_path / "kb.json"))
+    storage.save(coins())
+    storage.checkpoint(coins())
+    assert storage._snapshot_is_current()
+    assert storage.load() == coins()
+
+    # Backdate the snapshot so the next save is certainly newer
+    os.utime(storage.snapshot_path, (0, 0))
+    changed = coins()[:1]
+    storage.save(changed)
+    assert not storage._snapshot_is_current()
+    assert storage.load() == changed
+
+
+def test_kb_checkpoint_persists_streamed_prices(tmp_path):
+    path = str(tmp_path / "kb.json")
+    kb = KnowledgeBase(path, aliases={})
+    kb.update_coins(coins())
+    kb.apply_prices([("BTC", 96000.0, 1700000060.0)])
+    kb.checkpoint()
+
+    storage = JSONStorage(path)
+    assert storage._snapshot_is_current()
+    assert KnowledgeBase(path, aliases={}).get_coin("BTC").last_price == 96000.0
+
+
+def test_sqlite_migrates_iso_timestamps(tmp_path):
+    path = str(tmp_path / "kb.db")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE coins (
+            symbol TEXT PRIMARY KEY COLLATE NOCASE,
+            coin TEXT NOT NULL,
+            launch_year INTEGER,
+            consensus TEXT,
+            last_price REAL,
+            price_timestamp TEXT,
+            version INTEGER NOT NULL DEFAULT 0
+        );
+        INSERT INTO coins VALUES ('BTC', 'Bitcoin', 2009, 'Proof of Work', 95000.0, '2026-01-17T10:55:09Z', 1);
+        INSERT INTO coins VALUES ('X', 'Unknown Coin', NULL, NULL, NULL, NULL, 1);
+    """)
+    conn.close()
+
+    storage = SQLiteStorage(path)
+    try:
+        btc, unknown = storage.load()
+        assert btc.price_ts == iso_to_epoch("2026-01-17T10:55:09Z")
+        assert btc.price_timestamp == "2026-01-17T10:55:09Z"
+        assert unknown.price_ts is None
+    finally:
+        storage.close()
+    # Already migrated: opening again is a no-op
+    SQLiteStorage(path).close()
@@ -0,0 +1,104 @@
+import pytest
+
+from agent.api_client import FreeCryptoAPIClient
+from agent.resolution_cache import ResolutionCache
+from agent.symbol_filter import BloomFilter, KnownSymbols, NegativeCache
+
+LISTING = [
+    {"id": "bitcoin", "symbol": "btc", "name": "Bitcoin"},
+    {"id": "ethereum", "symbol": "eth", "name": "Ethereum"},
+    {"symbol": "PEPE"},
+]
+
+
+def test_negative_cache_expires(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("agent.symbol_filter.time.monotonic", lambda: now[0])
+    cache = NegativeCache(ttl=60)
+    cache.add("HELLO")
+    assert "HELLO" in cache
+    now[0] += 61
+    assert "HELLO" not in cache
+    assert len(cache) == 0
+
+
+def test_negative_cache_evicts_least_recent():
+    cache = NegativeCache(max_size=2)
+    for key in ("A", "B", "A", "C"):
+        cache.add(key)
+    assert "A" in cache and "C" in cache
+    assert "B" not in cache
+
+
+def test_known_symbols_fail_open_until_built(tmp_path):
+    path = str(tmp_path / "known_symbols.bloom")
+    known = KnownSymbols(path)
+    assert known.might_exist("anything")
+
+    known.build(LISTING)
+    for term in ("BTC", "bitcoin", "Ethereum", "pepe"):
+        assert known.might_exist(term)
+    assert not known.might_exist("hello")
+
+    # Reloaded from disk
+    assert not KnownSymbols(path).might_exist("hello")
+    assert KnownSymbols(path).might_exist("eth")
+
+
+def test_truncated_filter_is_ignored(tmp_path, capsys):
+    path = str(tmp_path / "known_symbols.bloom")
+    bloom = BloomFilter(100)
+    bloom.add("btc")
+    bloom.dump(path, 0.0)
+    with open(path, "r+b") as f:
+        f.truncate(BloomFilter.HEADER.size + 1)
+    assert KnownSymbols(path).might_exist("hello")
+    assert "truncated" in capsys.readouterr().out
+
+
+def test_bloom_false_positive_rate():
+    bloom = BloomFilter(10000, error_rate=0.01)
+    for i in range(10000):
+        bloom.add(f"coin{i}")
+    assert all(f"coin{i}" in bloom for i in range(10000))
+    false_positives = sum(f"other{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch, calls):
+    client = FreeCryptoAPIClient(hedge_delay=None,
+                                 resolution_cache=ResolutionCache(str(tmp_path / "resolution_cache.json")))
+    # Every provider answers "not found"
+    names = list(client.DEFAULT_PROVIDER_CONFIG)
+    monkeypatch.setattr(client, "_providers",
+                        lambda: [(name, lambda symbol, name=name: calls.append(name)) for name in names])
+    return client
+
+
+def test_miss_from_every_provider_is_cached(client, calls, capsys):
+    assert client.fetch_coin_data("hello") is None
+    assert calls == ["CoinGecko", "CoinCap", "Binance"]
+    assert client.fetch_coin_data("HELLO") is None
+    assert len(calls) == 3
+
+
+def test_error_is_not_cached(client, monkeypatch, capsys):
+    def broken(symbol):
+        raise ConnectionError("down")
+
+    monkeypatch.setattr(client, "_providers", lambda: [("CoinGecko", broken)])
+    assert client.fetch_coin_data("BTC") is None
+    assert "BTC" not in client.unknown_symbols
+
+
+def test_unlisted_symbols(client):
+    assert client.is_listed("hello")
+    client.known_symbols.build(LISTING)
+    assert client.is_listed("BTC")
+    assert not client.is_listed("hello")